@@ -0,0 +1,792 @@
+import argparse
+import asyncio
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import unittest.mock
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+import connectutor_code as cc
+
+# 지정한 수의 지인과 대화 기록을 메모리에 만드는 함수 (저장소에는 기록하지 않음)
+def generate_data(contact_count, conversation_count, seed):
+    rng = random.Random(seed)
+    cc.reset_data()
+    for idx in range(max(1, contact_count // 100)):
+        cc.apply_change({'op': 'add_group', 'name': f"그룹{idx}", 'contact_interval': rng.randint(7, 60), 'tolerance': rng.randint(1, 5)})
+    for idx in range(contact_count):
+        cc.apply_change({
+            'op': 'add_contact', 'name': f"지인{idx}", 'group': rng.randrange(len(cc.groups)),
+            'birthday': None, 'gender': None, 'residence': None, 'hobbies': None
+        })
+
+    for record in generate_records(rng, conversation_count):
+        cc.contacts[rng.randrange(contact_count)].contact_history.append(cc.Conversation(record['date'], record['topics']))
+    cc.aggregates.rebuild(cc.contacts)
+
+# 임의의 대화 기록을 딕셔너리로 만들어 내는 생성기
+def generate_records(rng, count):
+    for _ in range(count):
+        topics = {}
+        for category in rng.sample(cc.CATEGORIES, rng.randint(1, 3)):
+            topics[category] = {'importance': rng.randint(1, 5), 'details': f"{category} 이야기 {rng.randrange(100000)}"}
+        yield {'date': f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", 'topics': topics}
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+# 저장소 하나로 저장, 시작(지연 로딩), 전체 대화 기록 복원에 걸린 시간과 파일 크기를 재는 함수
+def bench_snapshot(name, make_store, lazy_load):
+    directory = tempfile.mkdtemp(prefix="connectutor_bench_")
+    try:
+        cc.LAZY_LOAD = lazy_load
+        gc.collect()
+        started = time.perf_counter()
+        make_store(directory).save()
+        save_time = time.perf_counter() - started
+        size = directory_size(directory)
+
+        cc.reset_data()
+        gc.collect()
+        started = time.perf_counter()
+        loaded_store = make_store(directory)
+        loaded_store.load()
+        load_time = time.perf_counter() - started
+        conversations = sum(len(contact.contact_history) for contact in cc.contacts)
+        history_time = time.perf_counter() - started
+
+        if isinstance(loaded_store, cc.BinaryStore):
+            # 대화 기록은 위에서 모두 메모리로 복원되었으므로 메모리 맵을 닫아도 됨
+            loaded_store.snapshot.close()
+        print(f"{name:<10} 저장 {save_time:7.2f}초  크기 {size / 1024 / 1024:8.1f}MB  "
+              f"시작 {load_time:7.2f}초  전체 대화 기록 {history_time:7.2f}초  ({conversations}건)")
+    finally:
+        shutil.rmtree(directory)
+
+def json_store(directory):
+    return cc.JsonStore(os.path.join(directory, "contacts_data.json"), os.path.join(directory, "contacts_data.journal"))
+
+def binary_store(directory):
+    return cc.BinaryStore(os.path.join(directory, "contacts_data.bin"), os.path.join(directory, "contacts_data.bin.journal"))
+
+# 스냅샷 형식별 저장/불러오기 벤치마크
+def run_snapshot_bench(args):
+    print(f"지인 {args.contacts}명, 대화 기록 {args.conversations}건 생성 중...")
+    generate_data(args.contacts, args.conversations, args.seed)
+    bench_snapshot("json", json_store, False)
+    bench_snapshot("json-lazy", json_store, True)
+    bench_snapshot("binary", binary_store, True)
+
+# build()가 만든 객체가 차지하는 메모리(바이트)를 재는 함수
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+# 같은 대화 기록을 예전 딕셔너리 형태와 Conversation 형태로 불러왔을 때의 메모리 사용량 비교
+def run_memory_bench(args):
+    text = json.dumps(list(generate_records(random.Random(args.seed), args.conversations)))
+    dict_size = traced_size(lambda: json.loads(text))
+    record_size = traced_size(lambda: cc.make_history(json.loads(text)))
+    print(f"대화 기록 {args.conversations}건")
+    print(f"dict 기록          {dict_size / 1024 / 1024:8.1f}MB  (기록당 {dict_size / args.conversations:6.0f}바이트)")
+    print(f"Conversation 기록  {record_size / 1024 / 1024:8.1f}MB  (기록당 {record_size / args.conversations:6.0f}바이트)")
+    print(f"{dict_size / record_size:.1f}배 감소")
+
+# 걸린 시간(초)과 결과를 반환하는 함수
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+# 중요도 4 이상 대화를 지인의 대화 기록을 직접 돌며 찾는 예전 방식
+def loop_important_topics(contact, min_importance):
+    important_conversations = {}
+    for record in contact.contact_history:
+        for category, details in record['topics'].items():
+            if details['importance'] >= min_importance:
+                important_conversations.setdefault(category, []).append(details['details'])
+    return important_conversations
+
+# 모든 대화 기록을 돌며 중요도 3 이상 주제의 카테고리별 합계를 구하는 예전 방식
+def loop_category_importance():
+    totals = {}
+    for contact in cc.contacts:
+        for record in contact.contact_history:
+            for category, details in record['topics'].items():
+                if details['importance'] >= 3:
+                    totals[category] = totals.get(category, 0) + details['importance']
+    return totals
+
+# 모든 대화 기록을 돌며 월별 대화 수를 세는 예전 방식
+def loop_conversations_by_month():
+    counts = {}
+    for contact in cc.contacts:
+        for record in contact.contact_history:
+            counts[record['date'][:7]] = counts.get(record['date'][:7], 0) + 1
+    return dict(sorted(counts.items()))
+
+# 분석 엔진(NumPy)과 대화 기록을 직접 도는 방식의 조회 시간 비교
+def run_analytics_bench(args):
+    if not cc.analytics.available:
+        print("NumPy가 설치되어 있지 않아 분석 엔진을 측정할 수 없습니다.")
+        return
+    print(f"지인 {args.contacts}명, 대화 기록 {args.conversations}건 생성 중...")
+    generate_data(args.contacts, args.conversations, args.seed)
+    contact = max(cc.contacts, key=lambda item: len(item.contact_history))
+
+    build_time, _ = timed(cc.analytics.ensure)
+    print(f"열 배열 생성             {build_time:8.3f}초")
+    queries = (
+        ("중요도 3 이상 카테고리 합계", lambda: cc.analytics.category_importance(3), loop_category_importance),
+        ("중요도 4 이상 대화", lambda: cc.analytics.important_topics(contact, 4), lambda: loop_important_topics(contact, 4)),
+        ("월별 대화 수", lambda: cc.analytics.conversations_by_period('month'), loop_conversations_by_month),
+        ("중요도 상위 지인 10명", lambda: cc.analytics.top_contacts(10), None),
+    )
+    for name, engine_query, loop_query in queries:
+        # 처음 조회에는 지인별 정렬 순서를 만드는 시간이 포함되므로 두 번째 조회 시간도 함께 표시
+        first_time, _ = timed(engine_query)
+        engine_time, _ = timed(engine_query)
+        line = f"{name:<20} 분석 엔진 {first_time:8.4f}초 (다시 조회 {engine_time:8.4f}초)"
+        if loop_query is not None:
+            loop_time, _ = timed(loop_query)
+            line += f"  반복문 {loop_time:8.4f}초"
+        print(line)
+
+# 모든 대화 기록을 돌며 내용에 검색어가 들어 있는 주제를 세는 예전 방식
+def loop_search(query):
+    return sum(query in details for contact in cc.contacts for record in contact.contact_history for details in record.details)
+
+# 전문 검색 색인 생성 시간과 검색 시간 (대화 기록을 직접 도는 방식과 비교)
+def run_search_bench(args):
+    print(f"지인 {args.contacts}명, 대화 기록 {args.conversations}건 생성 중...")
+    generate_data(args.contacts, args.conversations, args.seed)
+    build_time, _ = timed(cc.search_index.ensure)
+    print(f"색인 생성                {build_time:8.3f}초  (문서 {len(cc.search_index.doc_owners)}개, 단어 {len(cc.search_index.word_docs)}개)")
+    queries = (
+        ("드문 검색어", {'query': "12345"}),
+        ("두 단어", {'query': "취미 99999"}),
+        ("카테고리/중요도 조건", {'query': "4242", 'category': "취미", 'min_importance': 3}),
+        ("기간 조건", {'query': "이야기 777", 'date_from': "2020-01-01", 'date_to': "2020-12-31"}),
+        ("흔한 검색어", {'query': "이야기"}),
+    )
+    for name, query in queries:
+        search_time, results = timed(lambda: cc.search_index.search(**query))
+        line = f"{name:<20} 색인 {search_time * 1000:8.1f}ms ({len(results)}건)"
+        if len(query) == 1:
+            loop_time, _ = timed(loop_search, query['query'].split()[0])
+            line += f"  반복문 {loop_time * 1000:8.1f}ms"
+        print(line)
+
+# 지정한 수의 지인을 임의의 최근 연락 날짜로 만드는 함수 (대화 기록 없음, 스케줄러는 만들지 않음)
+def generate_contacts(contact_count, seed, now):
+    rng = random.Random(seed)
+    cc.reset_data()
+    for idx in range(max(1, contact_count // 1000)):
+        cc.apply_change({'op': 'add_group', 'name': f"그룹{idx}", 'contact_interval': rng.randint(7, 60), 'tolerance': rng.randint(1, 5)})
+    for idx in range(contact_count):
+        contact = cc.Contact(f"지인{idx}", cc.groups[rng.randrange(len(cc.groups))], None, None, None, None)
+        contact.id = idx
+        if rng.random() < 0.95:
+            contact.last_contact_date = now - timedelta(days=rng.uniform(0, 90))
+        cc.contacts.append(contact)
+        cc.data_index.add_contact(contact)
+
+# 스케줄러를 만들어 확인하는 방식과 여러 프로세스로 나누어 확인하는 방식의 연락 주기 확인 시간 비교
+def run_due_bench(args):
+    now = datetime.now()
+    print(f"지인 {args.contacts}명 생성 중...")
+    generate_contacts(args.contacts, args.seed, now)
+
+    def scheduler_check():
+        cc.scheduler.rebuild(cc.contacts)
+        return ([contact.id for contact in cc.scheduler.due_now(now)], [contact.id for contact in cc.scheduler.overdue(now)],
+                [contact.id for contact in cc.scheduler.due_within(cc.DUE_LOOKAHEAD_DAYS, now)])
+
+    scheduler_time, expected = timed(scheduler_check)
+    print(f"스케줄러 (1개 프로세스)         {scheduler_time:7.2f}초  {args.contacts / scheduler_time:10.0f}명/초")
+    serial_time, _ = timed(cc.check_due_shard, 0, 1, None, now, cc.DUE_LOOKAHEAD_DAYS)
+    print(f"순차 확인 (1개 프로세스)        {serial_time:7.2f}초  {args.contacts / serial_time:10.0f}명/초")
+
+    workers = 1
+    while workers <= args.max_workers:
+        for partition in ("hash", "group"):
+            elapsed, result = timed(cc.sharded_due_check, now, workers, partition)
+            matches = [[contact.id for contact in contacts] for contacts in result[:3]] == list(expected)
+            print(f"나누어 확인 ({partition:<5}, 프로세스 {workers:2d}개) {elapsed:7.2f}초  {args.contacts / elapsed:10.0f}명/초  "
+                  f"순차 대비 {serial_time / elapsed:5.2f}배{'' if matches else '  (결과 불일치!)'}")
+        workers *= 2
+
+# 여러 사용자에게 번갈아 요청이 올 때, 사용자 풀에 열어 둔 데이터를 재사용하는 경우와 요청마다 다시 여는 경우의 처리량 비교
+def run_tenants_bench(args):
+    rng = random.Random(args.seed)
+    tenants_dir = tempfile.mkdtemp(prefix="connectutor_tenants_")
+    try:
+        print(f"사용자 {args.tenants}명 생성 중 (사용자당 지인 {args.contacts}명, 대화 {args.conversations}건)...")
+        setup_pool = cc.ContextPool(tenants_dir, max_open=1)
+        for idx in range(args.tenants):
+            with setup_pool.session(f"user{idx}", create=True):
+                generate_data(args.contacts, args.conversations, args.seed + idx)
+                cc.store.save()
+        setup_pool.close_all()
+
+        # 자주 요청하는 사용자가 있도록 앞쪽 사용자에게 요청이 몰리게 선택
+        requests = [f"user{min(int(rng.paretovariate(1.2)) - 1, args.tenants - 1)}" for _ in range(args.requests)]
+
+        def serve(pool):
+            for tenant in requests:
+                with pool.session(tenant):
+                    cc.scheduler.due_now()
+            pool.close_all()
+
+        for max_open in (0, args.pool_size):
+            pool = cc.ContextPool(tenants_dir, max_open=max_open)
+            elapsed, _ = timed(serve, pool)
+            stats = pool.stats()
+            name = "요청마다 열기" if max_open == 0 else f"풀 (최대 {max_open}명)"
+            print(f"{name:<16} {elapsed:7.2f}초  {args.requests / elapsed:9.0f}요청/초  "
+                  f"재사용 {stats['hits']}회, 열기 {stats['opens']}회, 닫기 {stats['evictions']}회")
+    finally:
+        shutil.rmtree(tenants_dir, ignore_errors=True)
+
+# 요청 하나를 보내고 응답을 끝까지 읽어 상태 코드를 반환하는 함수 (keep-alive 연결 재사용)
+async def send_api_request(reader, writer, method, path, tenant=None, body=None):
+    data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+    head = f"{method} {path} HTTP/1.1\r\nHost: connectutor\r\nContent-Length: {len(data)}\r\n"
+    if tenant:
+        head += f"X-Tenant: {tenant}\r\n"
+    writer.write((head + "\r\n").encode('latin-1') + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+# 읽기 위주의 요청 구성에서 요청 하나를 고르는 함수 (write_ratio 비율로 대화 기록 추가)
+def pick_api_request(rng, contact_count, write_ratio):
+    contact = rng.randrange(contact_count)
+    if rng.random() < write_ratio:
+        return "POST /contacts/<id>/conversations", "POST", f"/contacts/{contact}/conversations", next(generate_records(rng, 1))
+    name, path = rng.choice((
+        ("GET /due", "/due"),
+        ("GET /report", "/report"),
+        ("GET /dashboard", "/dashboard"),
+        ("GET /contacts/<id>", f"/contacts/{contact}"),
+        ("GET /contacts/<id>/conversations", f"/contacts/{contact}/conversations"),
+        ("GET /search", "/search?q=" + quote(f"이야기 {rng.randrange(100000)}")),
+    ))
+    return name, "GET", path, None
+
+# 클라이언트 하나: 연결 하나로 요청을 count번 보내고 요청 종류별 응답 시간(초)을 기록
+async def api_client(host, port, count, seed, tenants, args, latencies, statuses):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            name, method, path, body = pick_api_request(rng, args.contacts, args.write_ratio)
+            started = time.perf_counter()
+            status = await send_api_request(reader, writer, method, path, rng.choice(tenants), body)
+            latencies.setdefault(name, []).append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+async def run_api_load(host, port, tenants, args):
+    latencies, statuses = {}, {}
+    per_client = max(1, args.requests // args.clients)
+    started = time.perf_counter()
+    await asyncio.gather(*(api_client(host, port, per_client, args.seed + idx, tenants, args, latencies, statuses) for idx in range(args.clients)))
+    return time.perf_counter() - started, latencies, statuses
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+# 임시 폴더의 사용자 데이터로 API 서버를 별도 프로세스에서 실행하고, 요청을 받을 수 있을 때까지 기다리는 함수
+def start_api_server(tenants_dir, workers):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    log = open(os.path.join(tenants_dir, "server.log"), "w")
+    env = dict(os.environ, CONNECTUTOR_TENANTS_DIR=tenants_dir, OPENAI_API_KEY="")
+    process = subprocess.Popen([sys.executable, os.path.abspath(cc.__file__), "--tenant", "user0", "serve",
+                                "--port", str(port), "--workers", str(workers)], env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    with open(os.path.join(tenants_dir, "server.log")) as file:
+        raise RuntimeError(f"API 서버를 시작하지 못했습니다.\n{file.read()}")
+
+# HTTP API 서버에 여러 클라이언트가 동시에 요청을 보내 처리량(요청/초)과 응답 시간 분포(p50/p99)를 재는 부하 시험
+def run_api_bench(args):
+    tenants_dir = None
+    process = None
+    try:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+            tenants = [args.tenant]
+        else:
+            tenants_dir = tempfile.mkdtemp(prefix="connectutor_api_")
+            print(f"사용자 {args.tenants}명 생성 중 (사용자당 지인 {args.contacts}명, 대화 {args.conversations}건)...")
+            setup_pool = cc.ContextPool(tenants_dir, max_open=1)
+            for idx in range(args.tenants):
+                with setup_pool.session(f"user{idx}", create=True):
+                    generate_data(args.contacts, args.conversations, args.seed + idx)
+                    cc.store.save()
+            setup_pool.close_all()
+            process, port = start_api_server(tenants_dir, args.workers)
+            host = "127.0.0.1"
+            tenants = [f"user{idx}" for idx in range(args.tenants)]
+
+        print(f"클라이언트 {args.clients}개, 요청 {args.requests}건 (쓰기 {args.write_ratio:.0%}) 보내는 중...")
+        elapsed, latencies, statuses = asyncio.run(run_api_load(host, port, tenants, args))
+        total = sum(len(values) for values in latencies.values())
+        all_latencies = sorted(value for values in latencies.values() for value in values)
+        print(f"{'전체':<36} {total / elapsed:8.0f}요청/초  p50 {percentile(all_latencies, 0.5) * 1000:7.2f}ms  "
+              f"p99 {percentile(all_latencies, 0.99) * 1000:7.2f}ms  최대 {all_latencies[-1] * 1000:7.2f}ms")
+        for name, values in sorted(latencies.items()):
+            values.sort()
+            print(f"{name:<36} {len(values):8d}건     p50 {percentile(values, 0.5) * 1000:7.2f}ms  "
+                  f"p99 {percentile(values, 0.99) * 1000:7.2f}ms  최대 {values[-1] * 1000:7.2f}ms")
+        print("응답 상태 코드: " + ", ".join(f"{status} {count}건" for status, count in sorted(statuses.items())))
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+        if tenants_dir is not None:
+            shutil.rmtree(tenants_dir, ignore_errors=True)
+
+# OpenAI 대화 완성 API(/chat/completions)를 흉내 내는 로컬 서버의 요청 처리기
+# 설정한 지연 시간(초)에 추정 프롬프트 토큰 1000개당 token_latency초를 더한 만큼 기다린 뒤 프롬프트로 정해지는 주제를 돌려주므로, AI 호출을 포함한 동작을 네트워크나 비용 없이 잴 수 있음
+class OpenAIStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        prompt_tokens = sum(cc.estimate_tokens(message.get('content', '')) for message in body.get('messages', []))
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter) + self.server.token_latency * prompt_tokens / 1000)
+        with self.server.lock:
+            self.server.requests += 1
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        content = f"(stub) 대화 주제 {hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]}"
+        data = json.dumps({
+            'id': f"chatcmpl-stub-{self.server.requests}", 'object': "chat.completion", 'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': "assistant", 'content': content}, 'finish_reason': "stop"}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': cc.estimate_tokens(content),
+                      'total_tokens': prompt_tokens + cc.estimate_tokens(content)}
+        }, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+# 스텁 서버를 백그라운드 스레드에서 시작하고 (서버, OPENAI_API_BASE로 쓸 주소)를 반환하는 함수 (port가 0이면 빈 포트 사용)
+def start_openai_stub(latency, jitter=0.0, port=0, token_latency=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), OpenAIStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.token_latency = token_latency
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+# openai 패키지가 설치되어 있지 않을 때 스텁 서버에 직접 요청하는 대체 클라이언트 (openai.ChatCompletion.create와 같은 모양)
+class StubChatCompletion:
+    api_base = None
+
+    @classmethod
+    def create(cls, model, messages, max_tokens=None):
+        payload = json.dumps({'model': model, 'messages': messages, 'max_tokens': max_tokens}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(f"{cls.api_base}/chat/completions", data=payload, headers={'Content-Type': "application/json"})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            data = json.load(response)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=choice['message']) for choice in data['choices']])
+
+# 대화 주제 추천이 스텁 서버를 사용하도록 설정하는 함수 (openai 패키지가 있으면 OPENAI_API_BASE로, 없으면 대체 클라이언트로 연결)
+def use_openai_stub(api_base, cache_file):
+    os.environ["OPENAI_API_BASE"] = api_base
+    cc.openai_api_key = "stub"
+    cc.ai_enabled = True
+    cc.openai = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = cc.load_openai()
+    if client is None:
+        StubChatCompletion.api_base = api_base
+        cc.openai = types.SimpleNamespace(ChatCompletion=StubChatCompletion)
+        cc.ai_enabled = True
+    cc.ai_rate_limiter = cc.RateLimiter(0)
+    cc.topic_cache = cc.TopicCache(cache_file, cc.TOPIC_CACHE_TTL, cc.TOPIC_CACHE_MAX_ENTRIES)
+
+# 예전 방식의 대화 주제 추천 메시지 (전체 대화 기록을 날짜로 정렬하여 최근 3개의 카테고리/중요도만 넣음)
+def legacy_topic_messages(contact):
+    recent_conversations = sorted(contact.contact_history, key=lambda x: x['date'], reverse=True)[:3]
+    conversation_summary = ""
+    for conv in recent_conversations:
+        topics = ', '.join([f"{topic}: {details['importance']}" for topic, details in conv['topics'].items()])
+        conversation_summary += f"Date: {conv['date']}, Topics: {topics}. "
+    return [
+        {"role": "system", "content": "You are a helpful assistant that suggests conversation topics."},
+        {"role": "user", "content": f"Generate a conversation topic for {contact.name}. Recent conversation history: {conversation_summary or 'No recent conversations available.'}. Additional notes: {contact.additional_info}."}
+    ]
+
+# 전체 대화 기록을 내용과 함께 모두 넣은 메시지 (토큰 예산이 없을 때의 비교 대상)
+def full_history_messages(contact):
+    history = ' '.join(
+        f"[{conv['date']}] " + '; '.join(f"{category} ({importance}): {details}" for category, importance, details in conv.topic_items())
+        for conv in sorted(contact.contact_history, key=lambda x: x['date'], reverse=True)
+    )
+    return [
+        {"role": "system", "content": "You are a helpful assistant that suggests conversation topics."},
+        {"role": "user", "content": f"Generate a conversation topic for {contact.name}. Conversation history, newest first: {history}"}
+    ]
+
+def message_tokens(messages):
+    return sum(cc.estimate_tokens(message['content']) for message in messages)
+
+# 대화 주제 추천 메시지를 만드는 방식별로 메시지 생성 시간, 추정 토큰 수, 스텁 서버 응답 시간을 비교
+# 스텁 서버는 추정 토큰 1000개당 --token-latency초를 더 기다리므로, 메시지가 짧아진 만큼 응답 시간이 줄어드는 것을 볼 수 있음
+def run_prompt_bench(args):
+    directory = tempfile.mkdtemp(prefix="connectutor_bench_")
+    stub, api_base = start_openai_stub(args.latency, token_latency=args.token_latency)
+    try:
+        with cc.use_context(cc.DataContext(None, directory)):
+            use_openai_stub(api_base, os.path.join(directory, "topic_cache.db"))
+            generate_data(args.contacts, args.conversations, args.seed)
+            print(f"지인 {args.contacts}명, 대화 기록 {args.conversations}건 (지인당 평균 {args.conversations // args.contacts}건), "
+                  f"토큰 예산 {cc.TOPIC_PROMPT_TOKENS}, 스텁 지연 {args.latency}초 + 1000토큰당 {args.token_latency}초")
+            sample = random.Random(args.seed).sample(list(cc.contacts), min(args.requests, len(cc.contacts)))
+            variants = [
+                ("기존 (전체 정렬, 최근 3건)", legacy_topic_messages),
+                ("전체 기록", full_history_messages),
+                ("요약 (처음 호출)", cc.build_topic_messages),
+                ("요약", cc.build_topic_messages),
+            ]
+            print(f"{'방식':<20} {'메시지 생성':>12} {'평균 토큰':>10} {'응답 p50':>10} {'응답 p99':>10}")
+            for name, build in variants:
+                build_time, messages = timed(lambda: [build(contact) for contact in cc.contacts])
+                tokens = sum(message_tokens(message) for message in messages) / len(messages)
+                latencies = []
+                for contact in sample:
+                    started = time.perf_counter()
+                    cc.request_topic(build(contact))
+                    latencies.append(time.perf_counter() - started)
+                latencies.sort()
+                print(f"{name:<20} {build_time / len(messages) * 1000:10.3f}ms {tokens:10.0f} "
+                      f"{percentile(latencies, 0.5) * 1000:8.1f}ms {percentile(latencies, 0.99) * 1000:8.1f}ms")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+# 스텁 서버만 실행하는 명령 (다른 터미널에서 OPENAI_API_BASE를 출력된 주소로 설정하고 프로그램을 실행)
+def run_openai_stub(args):
+    server, api_base = start_openai_stub(args.latency, args.jitter, args.port, args.token_latency)
+    print(f"OpenAI 스텁 서버 실행 중: OPENAI_API_BASE={api_base} "
+          f"(지연 {args.latency}초 + 최대 {args.jitter}초 + 1000토큰당 {args.token_latency}초, 종료: Ctrl+C)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"받은 요청 {server.requests}건")
+
+# 벤치마크 모음의 규모 이름 -> 대화 기록 수 (지인은 대화 10건당 1명, 그룹은 지인 100명당 1개)
+SUITE_SCALES = {"1k": 1000, "100k": 100000, "1m": 1000000}
+
+# 규모에 맞는 그룹, 지인, 대화 기록과 최근 연락 날짜를 시드로 재현 가능하게 만드는 함수
+def generate_dataset(conversation_count, seed, now):
+    generate_data(max(10, conversation_count // 10), conversation_count, seed)
+    rng = random.Random(seed + 1)
+    for contact in cc.contacts:
+        if rng.random() < 0.95:
+            contact.last_contact_date = (now - timedelta(days=rng.uniform(0, 90))).replace(microsecond=0)
+    cc.scheduler.rebuild(cc.contacts)
+
+# 메뉴 함수를 입력값을 정해 두고 출력 없이 실행하는 함수
+def run_quietly(function, *inputs):
+    answers = iter(inputs)
+    with unittest.mock.patch("builtins.input", lambda prompt="": next(answers)), contextlib.redirect_stdout(io.StringIO()):
+        return function()
+
+# 대화 주제 추천 없이 연락 시기 확인만 실행하는 함수 (AI 호출은 suggest_conversation_topics에서 따로 잼)
+def due_check_without_ai():
+    with unittest.mock.patch.object(cc, "ai_enabled", False):
+        run_quietly(cc.check_all_contacts_due)
+
+# 함수를 한 번 실행하여 걸린 시간(초)과 실행 중 늘어난 최대 메모리(바이트)를 재는 함수
+def measure(function, trace_memory):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        function()
+        return time.perf_counter() - started, tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+# 규모 하나에서 측정할 동작 목록 [(이름, 함수)] (저장 -> 다시 불러오기 -> 조회 순서로 실행)
+def suite_operations(directory, now, rng, args):
+    sample = rng.sample(list(cc.contacts), min(100, len(cc.contacts)))
+    ai_sample = sample[:args.ai_contacts]
+
+    def reload():
+        cc.reset_data()
+        cc.active_context().close()
+        cc.load_data(quiet=True)
+
+    operations = [
+        ("save_data", lambda: cc.active_context().store.save()),
+        ("load_data", reload),
+        ("load_all_history", lambda: sum(len(contact.contact_history) for contact in cc.contacts)),
+        ("check_all_contacts_due", due_check_without_ai),
+        ("view_conversations_by_date", lambda: run_quietly(cc.view_conversations_by_date, "2020-01-01~2020-01-31")),
+        ("visualize_category_importance", lambda: (cc.analytics.category_importance(), cc.analytics.top_contacts(5))),
+        ("visualize_contact_conversations", lambda: [cc.contact_conversation_charts(contact) for contact in sample]),
+        ("visualize_important_conversations", lambda: [cc.analytics.important_topics(contact, 4) for contact in sample]),
+        ("visualize_contact_history", cc.contact_history_counts),
+        ("visualize_contact_schedule", lambda: [cc.contact_schedule_chart(contact, now) for contact in sample]),
+        ("search", lambda: cc.search_index.search("이야기 4242")),
+    ]
+    if ai_sample:
+        # 첫 실행은 캐시가 비어 있어 모두 스텁 서버에 요청하고, 이후 실행은 주제 캐시에서 읽음
+        operations.append(("suggest_conversation_topics", lambda: list(cc.suggest_conversation_topics(ai_sample))))
+    return operations
+
+# 이전 결과 파일에서 (규모, 동작) -> 시간(초)을 읽는 함수
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return {(result['scale'], result['operation']): result['seconds'] for result in data['results']}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# 주요 동작을 규모별로 측정하고, 결과를 JSON 파일로 저장하여 릴리스 사이에 비교할 수 있게 하는 벤치마크 모음
+# 동작마다 repeat번 실행하여 첫 실행(캐시/색인이 비어 있는 상태)과 나머지 실행의 중앙값을 기록하고, 따로 한 번 더 실행하여 최대 메모리를 잼
+def run_suite_bench(args):
+    scales = [scale.strip().lower() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SUITE_SCALES and not scale.isdigit()]
+    if unknown:
+        raise SystemExit(f"알 수 없는 규모: {', '.join(unknown)} (사용 가능: {', '.join(SUITE_SCALES)} 또는 대화 기록 수)")
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    cc.STORAGE_BACKEND = args.storage
+    stub, api_base = start_openai_stub(args.ai_latency)
+    now = datetime.now().replace(microsecond=0)
+    results = []
+    try:
+        for scale in scales:
+            conversation_count = SUITE_SCALES.get(scale) or int(scale)
+            directory = tempfile.mkdtemp(prefix="connectutor_suite_")
+            try:
+                with cc.use_context(cc.DataContext(None, directory)):
+                    use_openai_stub(api_base, os.path.join(directory, "topic_cache.db"))
+                    build_time, _ = timed(generate_dataset, conversation_count, args.seed, now)
+                    print(f"\n[{scale}] 지인 {len(cc.contacts)}명, 대화 기록 {conversation_count}건 (생성 {build_time:.2f}초, 저장소 {args.storage})")
+                    rng = random.Random(args.seed)
+                    for name, function in suite_operations(directory, now, rng, args):
+                        times = [measure(function, False)[0] for _ in range(args.repeat)]
+                        peak = measure(function, True)[1] if args.memory else None
+                        seconds = statistics.median(times[1:] or times)
+                        result = {'scale': scale, 'operation': name, 'seconds': seconds, 'first_seconds': times[0],
+                                  'repeat': args.repeat, 'peak_memory_bytes': peak}
+                        results.append(result)
+                        line = f"{name:<36} {seconds * 1000:10.2f}ms (첫 실행 {times[0] * 1000:10.2f}ms)"
+                        if peak is not None:
+                            line += f"  최대 메모리 {peak / 1024 / 1024:8.1f}MB"
+                        previous = baseline.get((scale, name))
+                        if previous:
+                            line += f"  기준 대비 {seconds / previous:5.2f}배"
+                        print(line)
+                    cc.active_context().close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        stub.shutdown()
+
+    if args.output:
+        report = {
+            'generated_at': datetime.now().strftime(cc.DATETIME_FORMAT),
+            'git_commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': cc.load_numpy() is not None,
+            'storage': args.storage,
+            'seed': args.seed,
+            'ai_latency': args.ai_latency,
+            'results': results
+        }
+        cc.write_file_atomic(args.output, json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n결과를 저장했습니다: {args.output}")
+
+# 새 파이썬 프로세스에서 import_code를 실행하여 걸린 시간, 최대 메모리, 불러온 무거운 모듈을 재는 코드
+STARTUP_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - started
+heavy = [name for name in ('numpy', 'matplotlib', 'openai') if name in sys.modules]
+print(json.dumps({'elapsed': elapsed, 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'heavy': heavy}))
+"""
+
+def probe_startup(import_code):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, "-c", STARTUP_PROBE, import_code], cwd=script_dir,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+# 프로그램 시작(모듈 불러오기)에 걸리는 시간과 메모리 비교 (무거운 모듈을 처음부터 불러오는 경우와 비교)
+def run_startup_bench(args):
+    cases = (
+        ("시작 (지연 로딩)", "import connectutor_code"),
+        ("시작 + 무거운 모듈", "import connectutor_code\nfor name in ('numpy', 'matplotlib.pyplot', 'openai'):\n"
+                           "    connectutor_code.import_optional(name)"),
+    )
+    for name, import_code in cases:
+        results = [probe_startup(import_code) for _ in range(args.repeat)]
+        elapsed = sorted(result['elapsed'] for result in results)[len(results) // 2]
+        max_rss = max(result['max_rss_kb'] for result in results)
+        heavy = ", ".join(results[0]['heavy']) or "없음"
+        print(f"{name:<16} {elapsed * 1000:8.1f}ms (중앙값)  최대 메모리 {max_rss / 1024:7.1f}MB  불러온 모듈: {heavy}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지인 연락 관리 도구 성능 측정")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="스냅샷 형식별 저장/불러오기 시간과 파일 크기")
+    snapshot_parser.add_argument("--contacts", type=int, default=10000)
+    snapshot_parser.add_argument("--conversations", type=int, default=1000000)
+    snapshot_parser.add_argument("--seed", type=int, default=0)
+    snapshot_parser.set_defaults(func=run_snapshot_bench)
+
+    memory_parser = subparsers.add_parser("memory", help="대화 기록 표현 방식별 메모리 사용량")
+    memory_parser.add_argument("--conversations", type=int, default=100000)
+    memory_parser.add_argument("--seed", type=int, default=0)
+    memory_parser.set_defaults(func=run_memory_bench)
+
+    analytics_parser = subparsers.add_parser("analytics", help="분석 엔진 조회 시간")
+    analytics_parser.add_argument("--contacts", type=int, default=10000)
+    analytics_parser.add_argument("--conversations", type=int, default=1000000)
+    analytics_parser.add_argument("--seed", type=int, default=0)
+    analytics_parser.set_defaults(func=run_analytics_bench)
+
+    search_parser = subparsers.add_parser("search", help="전문 검색 색인 생성/검색 시간")
+    search_parser.add_argument("--contacts", type=int, default=10000)
+    search_parser.add_argument("--conversations", type=int, default=1000000)
+    search_parser.add_argument("--seed", type=int, default=0)
+    search_parser.set_defaults(func=run_search_bench)
+
+    due_parser = subparsers.add_parser("due", help="여러 프로세스로 나눈 연락 주기 확인 시간")
+    due_parser.add_argument("--contacts", type=int, default=1000000)
+    due_parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    due_parser.add_argument("--seed", type=int, default=0)
+    due_parser.set_defaults(func=run_due_bench)
+
+    tenants_parser = subparsers.add_parser("tenants", help="사용자 풀 재사용 여부에 따른 요청 처리량")
+    tenants_parser.add_argument("--tenants", type=int, default=200)
+    tenants_parser.add_argument("--contacts", type=int, default=50)
+    tenants_parser.add_argument("--conversations", type=int, default=500)
+    tenants_parser.add_argument("--requests", type=int, default=5000)
+    tenants_parser.add_argument("--pool-size", type=int, default=cc.MAX_OPEN_TENANTS)
+    tenants_parser.add_argument("--seed", type=int, default=0)
+    tenants_parser.set_defaults(func=run_tenants_bench)
+
+    api_parser = subparsers.add_parser("api", help="HTTP API 서버 부하 시험 (처리량과 p99 응답 시간)")
+    api_parser.add_argument("--url", help="이미 실행 중인 서버 주소 (생략하면 임시 데이터로 서버를 실행)")
+    api_parser.add_argument("--tenant", help="--url로 시험할 때 보낼 사용자 이름 (X-Tenant)")
+    api_parser.add_argument("--tenants", type=int, default=20)
+    api_parser.add_argument("--contacts", type=int, default=200)
+    api_parser.add_argument("--conversations", type=int, default=2000)
+    api_parser.add_argument("--clients", type=int, default=32)
+    api_parser.add_argument("--requests", type=int, default=10000)
+    api_parser.add_argument("--write-ratio", type=float, default=0.05)
+    api_parser.add_argument("--workers", type=int, default=cc.API_WORKERS, help="서버의 요청 처리 스레드 수")
+    api_parser.add_argument("--seed", type=int, default=0)
+    api_parser.set_defaults(func=run_api_bench)
+
+    suite_parser = subparsers.add_parser("suite", help="주요 동작의 규모별 시간/메모리 측정 (결과를 JSON으로 저장)")
+    suite_parser.add_argument("--scales", default="1k,100k,1m", help="대화 기록 수 규모 (1k, 100k, 1m 또는 숫자, 쉼표로 구분)")
+    suite_parser.add_argument("--storage", choices=("json", "binary", "sqlite"), default="json")
+    suite_parser.add_argument("--repeat", type=int, default=3)
+    suite_parser.add_argument("--no-memory", dest="memory", action="store_false", help="최대 메모리 측정 생략")
+    suite_parser.add_argument("--ai-latency", type=float, default=0.2, help="OpenAI 스텁 서버의 응답 지연(초)")
+    suite_parser.add_argument("--ai-contacts", type=int, default=20, help="대화 주제 추천을 요청할 지인 수 (0이면 생략)")
+    suite_parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    suite_parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.set_defaults(func=run_suite_bench)
+
+    prompt_parser = subparsers.add_parser("prompt", help="대화 주제 추천 메시지 방식별 생성 시간/토큰 수/응답 시간 비교")
+    prompt_parser.add_argument("--contacts", type=int, default=1000)
+    prompt_parser.add_argument("--conversations", type=int, default=200000)
+    prompt_parser.add_argument("--requests", type=int, default=20, help="방식마다 스텁 서버에 보낼 요청 수")
+    prompt_parser.add_argument("--latency", type=float, default=0.05, help="스텁 서버의 기본 응답 지연(초)")
+    prompt_parser.add_argument("--token-latency", type=float, default=0.5, help="추정 프롬프트 토큰 1000개당 더할 지연(초)")
+    prompt_parser.add_argument("--seed", type=int, default=0)
+    prompt_parser.set_defaults(func=run_prompt_bench)
+
+    stub_parser = subparsers.add_parser("openai-stub", help="지연 시간을 설정할 수 있는 로컬 OpenAI 스텁 서버 실행")
+    stub_parser.add_argument("--port", type=int, default=8001)
+    stub_parser.add_argument("--latency", type=float, default=0.2)
+    stub_parser.add_argument("--jitter", type=float, default=0.0)
+    stub_parser.add_argument("--token-latency", type=float, default=0.0, help="추정 프롬프트 토큰 1000개당 더할 지연(초)")
+    stub_parser.set_defaults(func=run_openai_stub)
+
+    startup_parser = subparsers.add_parser("startup", help="프로그램 시작 시간과 메모리")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    startup_parser.set_defaults(func=run_startup_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
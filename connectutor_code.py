@@ -1,95 +1,2048 @@
-import openai
 import json
 from datetime import datetime, timedelta
 import os
-import matplotlib.pyplot as plt
+import sys
+import argparse
+import array
+import bisect
+import contextlib
+import contextvars
+import csv
+import functools
+import glob
+import hashlib
+import heapq
+import itertools
+import importlib
+import importlib.util
+import mmap
+import multiprocessing
+import math
+import random
+import re
+import signal
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
 
-# 유저가 직접 API 키를 입력하도록 요청
-api_key = input("OpenAI API 키를 입력하세요: ")
-
-# 입력받은 API 키 설정
-openai.api_key = api_key
-
-# API 키가 없으면 프로그램 실행 중단
-if not openai.api_key:
-    raise ValueError("API 키가 입력되지 않았습니다. 프로그램을 종료합니다.")
+# 무거운 선택 모듈은 처음 사용할 때 불러옴 (프로그램 시작이 빨라지고, 설치되어 있지 않아도 해당 기능을 쓰지 않으면 실행 가능)
+np = None  # NumPy: 대화 기록 분석 (없으면 집계 값과 반복문으로 계산)
+plt = None  # matplotlib.pyplot: 대시보드 그래프
+openai = None  # OpenAI: 대화 주제 추천
+asyncio = None  # asyncio: HTTP API 서버 (serve 명령에서만 사용)
+missing_modules = set()  # 불러오기에 실패한 모듈 이름 (다시 시도하지 않음)
 
 # AI 사용 여부 (무료 크레딧 소진 시 False로 설정)
 ai_enabled = True
 
+# OpenAI API 키 (openai 모듈을 불러올 때 설정)
+openai_api_key = None
+
+# 모듈을 불러오는 함수 (설치되어 있지 않으면 None)
+def import_optional(name):
+    if name in missing_modules:
+        return None
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        missing_modules.add(name)
+        return None
+
+def load_numpy():
+    global np
+    if np is None:
+        np = import_optional("numpy")
+    return np
+
+# matplotlib.pyplot을 불러오는 함수 (backend를 지정하면 pyplot을 불러오기 전에 설정)
+def load_pyplot(backend=None):
+    global plt
+    matplotlib = import_optional("matplotlib")
+    if matplotlib is None:
+        return None
+    if backend:
+        matplotlib.use(backend)
+    if plt is None:
+        plt = importlib.import_module("matplotlib.pyplot")
+    return plt
+
+# 파일 잠금 모듈 (유닉스 전용, Windows에서는 None)
+fcntl = import_optional("fcntl")
+
+def load_asyncio():
+    global asyncio
+    if asyncio is None:
+        asyncio = importlib.import_module("asyncio")
+    return asyncio
+
+def matplotlib_installed():
+    return plt is not None or importlib.util.find_spec("matplotlib") is not None
+
+# openai 모듈을 불러와 API 키와 주소를 설정하는 함수 (설치되어 있지 않으면 대화 주제 추천을 끔)
+def load_openai():
+    global openai, ai_enabled
+    if openai is None:
+        module = import_optional("openai")
+        if module is None:
+            if ai_enabled:
+                print("openai 패키지가 설치되어 있지 않아 대화 주제 추천 없이 실행합니다. (pip install openai)")
+            ai_enabled = False
+            return None
+        module.api_key = openai_api_key
+        # 테스트용 로컬 서버 등 다른 API 주소를 사용할 경우 설정
+        if os.environ.get("OPENAI_API_BASE"):
+            module.api_base = os.environ["OPENAI_API_BASE"]
+        openai = module
+    return openai
+
+# AI 대화 주제 추천 설정 (동시 요청 수, 분당 요청 수, 재시도 횟수와 첫 대기 시간(초))
+AI_MODEL = "gpt-3.5-turbo"
+AI_MAX_CONCURRENCY = int(os.environ.get("CONNECTUTOR_AI_CONCURRENCY", "8"))
+AI_REQUESTS_PER_MINUTE = int(os.environ.get("CONNECTUTOR_AI_RPM", "60"))
+AI_MAX_RETRIES = 3
+AI_RETRY_BASE_DELAY = 1.0
+
+# 대화 주제 추천 메시지에 넣을 최근 대화 수와 메시지의 최대 토큰 수(추정치), 대화 내용/메모를 자를 길이(글자)
+TOPIC_RECENT_CONVERSATIONS = int(os.environ.get("CONNECTUTOR_TOPIC_RECENT", "5"))
+TOPIC_PROMPT_TOKENS = int(os.environ.get("CONNECTUTOR_TOPIC_PROMPT_TOKENS", "500"))
+TOPIC_DETAIL_CHARS = 120
+
 # 데이터를 저장할 파일 경로 (실행 파일의 경로 기준으로 절대 경로 생성)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # 현재 파일의 절대 경로를 기준으로 설정
 DATA_FILE = os.path.join(BASE_DIR, "contacts_data.json")
 
-# 그룹 및 지인 데이터를 JSON 파일로 저장하는 함수
-def save_data():
+# AI 대화 주제 캐시 파일 경로와 유효 기간(초), 최대 보관 개수
+TOPIC_CACHE_FILE = os.path.join(BASE_DIR, "topic_cache.db")
+TOPIC_CACHE_TTL = int(os.environ.get("CONNECTUTOR_TOPIC_CACHE_TTL", str(7 * 24 * 60 * 60)))
+TOPIC_CACHE_MAX_ENTRIES = int(os.environ.get("CONNECTUTOR_TOPIC_CACHE_SIZE", "10000"))
+
+# 변경 사항을 한 줄씩 덧붙여 기록하는 저널 파일 경로 (스냅샷 이후의 변경만 담김)
+JOURNAL_FILE = os.path.join(BASE_DIR, "contacts_data.journal")
+
+# 바이너리 스냅샷 저장소를 사용할 때의 스냅샷 및 저널 파일 경로
+BINARY_FILE = os.path.join(BASE_DIR, "contacts_data.bin")
+BINARY_JOURNAL_FILE = os.path.join(BASE_DIR, "contacts_data.bin.journal")
+
+# SQLite 저장소를 사용할 때의 데이터베이스 파일 경로
+DB_FILE = os.path.join(BASE_DIR, "contacts_data.db")
+
+# 사용자별 데이터 폴더 (--tenant로 사용자를 지정하면 tenants/<사용자 이름>/에 저장)
+TENANTS_DIR = os.environ.get("CONNECTUTOR_TENANTS_DIR", os.path.join(BASE_DIR, "tenants"))
+
+# 한 프로세스에서 동시에 열어 둘 최대 사용자 수와, 사용하지 않은 사용자의 데이터를 닫기까지의 시간(초)
+MAX_OPEN_TENANTS = int(os.environ.get("CONNECTUTOR_MAX_TENANTS", "256"))
+TENANT_IDLE_SECONDS = int(os.environ.get("CONNECTUTOR_TENANT_IDLE", "600"))
+
+# 사용할 저장소 종류 ("json", "binary" 또는 "sqlite")
+STORAGE_BACKEND = os.environ.get("CONNECTUTOR_STORAGE", "json")
+
+# 지인의 대화 기록을 처음 사용할 때 불러올지 여부 ("0"이면 시작 시 모두 불러옴)
+LAZY_LOAD = os.environ.get("CONNECTUTOR_LAZY_LOAD", "1") != "0"
+
+# 저널이 이 개수 이상 쌓이면 백그라운드에서 스냅샷으로 압축
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# 다른 프로세스가 압축하는 도중에 불러와 스냅샷과 저널이 맞지 않을 때 다시 시도할 횟수 (마지막 시도는 쓰기 잠금을 잡고 불러옴)
+STORE_LOAD_ATTEMPTS = 3
+
+# SQLite 저장소에서 다른 프로세스의 쓰기가 끝나기를 기다릴 최대 시간(초)
+SQLITE_BUSY_TIMEOUT = 30
+
+# 최근 연락 날짜 저장 형식
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 대화 날짜 저장 형식
+DATE_FORMAT = "%Y-%m-%d"
+
+# 대화 기록 카테고리
+CATEGORIES = ['일', '학업', '취미', '친목', '연애', '건강', '기타']
+
+# 그래프 표시 방식 ("show"이면 화면에 띄우고, "file"이면 작업 프로세스에서 그려 파일로 저장)
+CHART_MODE = os.environ.get("CONNECTUTOR_CHARTS", "show")
+
+# 그래프 파일 형식("png" 또는 "svg")과 저장 폴더, 그래프를 그릴 프로세스 수
+CHART_FORMAT = os.environ.get("CONNECTUTOR_CHART_FORMAT", "png")
+CHART_DIR = os.path.join(BASE_DIR, "charts")
+CHART_WORKERS = int(os.environ.get("CONNECTUTOR_CHART_WORKERS", str(os.cpu_count() or 1)))
+
+# 연락 주기를 여러 프로세스에 나누어 확인할 때의 프로세스 수 (due --workers)
+DUE_WORKERS = int(os.environ.get("CONNECTUTOR_DUE_WORKERS", str(os.cpu_count() or 1)))
+
+# 날짜별 연락 내역 그래프의 최대 막대 수 (넘으면 주별, 월별로 묶어서 표시)
+VISUALIZE_MAX_BARS = 60
+HISTORY_PERIODS = {'day': "날짜", 'week': "주", 'month': "월"}
+
+# 전문 검색 결과 최대 개수와 순위를 매길 최대 일치 문서 수 (넘으면 최근에 추가된 문서부터 이만큼만 비교)
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_MATCHES = 5000
+
+# 대화 기록 일괄 가져오기에서 한 번에 저장소에 기록할 대화 수
+IMPORT_BATCH_SIZE = 1000
+
+# HTTP API 서버 주소와 포트, 요청을 처리할 스레드 수, 요청 본문 최대 크기(바이트)
+API_HOST = os.environ.get("CONNECTUTOR_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("CONNECTUTOR_API_PORT", "8000"))
+API_WORKERS = int(os.environ.get("CONNECTUTOR_API_WORKERS", "8"))
+API_MAX_BODY = 1024 * 1024
+
+# GET /conversations 한 번에 돌려줄 대화 기록 수 (기본값, 최대값)
+API_CONVERSATION_LIMIT = 100
+API_MAX_CONVERSATION_LIMIT = 1000
+
+# 성능 측정 결과를 저장할 파일 (설정하면 종료 시 구간별 실행 시간과 카운터를 저장, .prom/.txt면 Prometheus 텍스트 형식, 그 외에는 JSON)
+METRICS_FILE = os.environ.get("CONNECTUTOR_METRICS_FILE")
+
+# cProfile 결과를 저장할 파일 (설정하면 실행 전체를 cProfile로 측정, python -m pstats 파일명으로 확인)
+PROFILE_FILE = os.environ.get("CONNECTUTOR_PROFILE")
+
+# 구간별 실행 시간과 카운터(읽은 기록 수, 캐시 적중/미적중 등)를 모으는 측정 도구
+# 구간은 횟수, 합계, 최대 시간만 보관하므로 메모리가 늘지 않으며, 저장할 때 sources의 통계(캐시, 사용자 풀)도 함께 읽음
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}  # 구간 이름 -> [횟수, 합계(초), 최대(초)]
+        self.counters = {}  # 카운터 이름 -> 값
+        self.sources = {}  # 이름 -> 현재 통계를 딕셔너리로 돌려주는 함수
+
+    # with 문 안의 실행 시간을 name 구간으로 기록하는 메소드 (예외가 나도 기록)
+    @contextlib.contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    # 함수 실행 전체를 name 구간으로 기록하는 데코레이터
+    def timed(self, name):
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # 지금까지의 측정 결과를 딕셔너리로 반환하는 메소드
+    def snapshot(self):
+        with self.lock:
+            spans = {
+                name: {'count': count, 'total_seconds': total, 'max_seconds': longest}
+                for name, (count, total, longest) in sorted(self.spans.items())
+            }
+            counters = dict(self.counters)
+        for source, stats in list(self.sources.items()):
+            for name, value in stats().items():
+                counters[f"{source}.{name}"] = value
+        return {
+            'generated_at': datetime.now().strftime(DATETIME_FORMAT),
+            'command': " ".join(sys.argv[1:]),
+            'storage': STORAGE_BACKEND,
+            'spans': spans,
+            'counters': dict(sorted(counters.items()))
+        }
+
+    # 측정 결과를 Prometheus 텍스트 형식으로 만드는 메소드 (구간은 summary, 카운터는 이름을 레이블로 하는 하나의 지표)
+    @staticmethod
+    def prometheus_text(snapshot):
+        def label(value):
+            return value.replace('\\', '\\\\').replace('"', '\\"')
+
+        lines = [
+            "# HELP connectutor_span_seconds Time spent in instrumented operations.",
+            "# TYPE connectutor_span_seconds summary"
+        ]
+        for name, stats in snapshot['spans'].items():
+            lines.append(f'connectutor_span_seconds_count{{span="{label(name)}"}} {stats["count"]}')
+            lines.append(f'connectutor_span_seconds_sum{{span="{label(name)}"}} {stats["total_seconds"]:.9f}')
+        lines += ["# HELP connectutor_span_max_seconds Longest single run of each operation.", "# TYPE connectutor_span_max_seconds gauge"]
+        for name, stats in snapshot['spans'].items():
+            lines.append(f'connectutor_span_max_seconds{{span="{label(name)}"}} {stats["max_seconds"]:.9f}')
+        lines += ["# HELP connectutor_counter Records scanned, cache hits and misses and other counts.", "# TYPE connectutor_counter gauge"]
+        for name, value in snapshot['counters'].items():
+            lines.append(f'connectutor_counter{{name="{label(name)}"}} {float(value):g}')
+        return "\n".join(lines) + "\n"
+
+    # 측정 결과를 파일로 저장하는 메소드 (확장자가 .prom 또는 .txt이면 Prometheus 텍스트, 그 외에는 JSON)
+    def export(self, path):
+        snapshot = self.snapshot()
+        if path.endswith((".prom", ".txt")):
+            data = self.prometheus_text(snapshot)
+        else:
+            data = json.dumps(snapshot, ensure_ascii=False, indent=2)
+        write_file_atomic(path, data)
+
+# 프로그램 전체의 측정 결과
+metrics = Metrics()
+
+# 사용자(테넌트) 한 명의 데이터: 그룹/지인 목록, 인덱스, 집계, 스케줄러, 저장소와 잠금
+# (모듈 전역 groups, contacts, store 등은 현재 사용자의 DataContext로 연결되는 대리 객체)
+class DataContext:
+    def __init__(self, tenant=None, data_dir=BASE_DIR):
+        self.tenant = tenant  # 사용자 이름 (None이면 실행 파일 옆의 기본 데이터)
+        self.data_dir = data_dir
+        self.data_lock = threading.RLock()  # 메모리 데이터 변경과 저장소 기록을 직렬화하는 잠금
+        self.groups = []
+        self.contacts = []
+        self.data_index = DataIndex()
+        self.aggregates = Aggregates()
+        self.contact_summaries = ContactSummaries()
+        self.analytics = ConversationAnalytics()
+        self.search_index = SearchIndex()
+        self.scheduler = DueScheduler()
+        self.birthday_index = BirthdayIndex()
+        self._store = None
+        self.loaded = False  # 저장소에서 데이터를 불러왔는지 여부
+        self.users = 0  # 이 데이터를 사용 중인 요청 수 (사용 중이면 풀에서 닫지 않음)
+        self.last_used = time.monotonic()
+
+    # 저장소는 처음 사용할 때 생성 (SQLite 연결 등을 필요할 때만 엶)
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = create_store(self.data_dir)
+        return self._store
+
+    @store.setter
+    def store(self, value):
+        self._store = value
+
+    # 저장소에서 데이터를 한 번만 불러오는 메소드 (이 데이터가 현재 사용자로 설정된 상태에서 호출)
+    def open(self, quiet=True, schedule=True):
+        with self.data_lock:
+            if not self.loaded:
+                self.loaded = True
+                try:
+                    load_data(quiet=quiet, schedule=schedule)
+                except BaseException:
+                    # 일부만 불러온 데이터는 버리고 다음에 처음부터 다시 불러옴
+                    self.loaded = False
+                    reset_data()
+                    raise
+
+    # 저장소의 파일/연결을 닫는 메소드 (변경 기록은 이미 저널/DB에 기록되어 있으므로 따로 저장하지 않음)
+    def close(self):
+        with self.data_lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+# 현재 요청(스레드/작업)이 사용하는 DataContext (설정하지 않으면 기본 데이터)
+current_context = contextvars.ContextVar("current_context")
+default_context = None
+
+def active_context():
+    global default_context
+    context = current_context.get(None)
+    if context is not None:
+        return context
+    if default_context is None:
+        default_context = DataContext()
+    return default_context
+
+# DataContext를 현재 사용자로 설정한 상태에서 실행하는 with 문용 함수
+@contextlib.contextmanager
+def use_context(context):
+    token = current_context.set(context)
     try:
-        data = {
-            'groups': [{'name': group.name, 'contact_interval': group.contact_interval, 'tolerance': group.tolerance} for group in groups],
-            'contacts': [{
-                'name': contact.name,
-                'group': contact.group.name,
-                'birthday': contact.birthday,
-                'gender': contact.gender,
-                'residence': contact.residence,
-                'hobbies': contact.hobbies,
-                'additional_info': contact.additional_info,
-                'last_contact_date': contact.last_contact_date.strftime("%Y-%m-%d %H:%M:%S") if contact.last_contact_date else None,
-                'contact_history': contact.contact_history
-            } for contact in contacts]
+        yield context
+    finally:
+        current_context.reset(token)
+
+# 현재 사용자의 데이터 객체로 속성 접근과 연산을 넘겨 주는 대리 객체
+class ContextProxy:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        object.__setattr__(self, 'name', name)
+
+    def __getattr__(self, attr):
+        return getattr(resolve_proxy(self), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(resolve_proxy(self), attr, value)
+
+    def __len__(self):
+        return len(resolve_proxy(self))
+
+    def __bool__(self):
+        return bool(resolve_proxy(self))
+
+    def __iter__(self):
+        return iter(resolve_proxy(self))
+
+    def __reversed__(self):
+        return reversed(resolve_proxy(self))
+
+    def __contains__(self, item):
+        return item in resolve_proxy(self)
+
+    def __getitem__(self, key):
+        return resolve_proxy(self)[key]
+
+    def __setitem__(self, key, value):
+        resolve_proxy(self)[key] = value
+
+    def __delitem__(self, key):
+        del resolve_proxy(self)[key]
+
+    def __enter__(self):
+        return resolve_proxy(self).__enter__()
+
+    def __exit__(self, *exc_info):
+        return resolve_proxy(self).__exit__(*exc_info)
+
+    def __repr__(self):
+        return repr(resolve_proxy(self))
+
+def resolve_proxy(proxy):
+    return getattr(active_context(), object.__getattribute__(proxy, 'name'))
+
+# 현재 사용자의 잠금과 저장소
+data_lock = ContextProxy('data_lock')
+store = ContextProxy('store')
+
+# 사용자별 DataContext를 열어 두는 풀 (최대 max_open명까지, 오래 쓰지 않은 사용자부터 닫음)
+# 요청마다 저장소를 다시 열고 불러오지 않도록, 한 번 연 사용자의 데이터와 저장소 연결을 재사용
+# 요청이 없을 때도 idle_seconds 넘게 쓰지 않은 사용자가 닫히도록 열린 사용자가 있는 동안 타이머로 주기적으로 정리
+class ContextPool:
+    TENANT_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+    def __init__(self, tenants_dir=TENANTS_DIR, max_open=MAX_OPEN_TENANTS, idle_seconds=TENANT_IDLE_SECONDS):
+        self.tenants_dir = tenants_dir
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self.lock = threading.Lock()
+        self.contexts = OrderedDict()  # 사용자 이름 -> DataContext (오래 쓰지 않은 순)
+        self.sweep_timer = None  # 오래 쓰지 않은 사용자를 정리할 타이머
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
+
+    # 사용자의 DataContext를 꺼내는 메소드 (열려 있지 않으면 새로 열고, 다 쓰면 release를 호출해야 함)
+    # load가 False이면 데이터를 불러오지 않으며, 호출한 쪽에서 open을 호출해야 함
+    # create가 False이면 데이터 폴더가 없는 사용자는 만들지 않고 FileNotFoundError를 발생시킴 (조회 요청으로 사용자가 생기지 않도록)
+    def acquire(self, tenant, load=True, create=False):
+        if not self.TENANT_PATTERN.fullmatch(tenant):
+            raise ValueError(f"사용자 이름은 영문, 숫자, '-', '_'로 64자까지 가능합니다: {tenant}")
+        with self.lock:
+            context = self.contexts.get(tenant)
+            if context is None:
+                data_dir = os.path.join(self.tenants_dir, tenant)
+                if create:
+                    os.makedirs(data_dir, exist_ok=True)
+                elif not os.path.isdir(data_dir):
+                    raise FileNotFoundError(f"없는 사용자입니다: {tenant}")
+                context = self.contexts[tenant] = DataContext(tenant, data_dir)
+                self.opens += 1
+                self.schedule_sweep()
+            else:
+                self.hits += 1
+            self.touch(context)
+            context.users += 1
+            closing = self.take_evictable()
+
+        # 파일을 닫고 여는 동안 다른 사용자의 요청이 기다리지 않도록 풀 잠금 밖에서 처리
+        for old_context in closing:
+            old_context.close()
+        if not load:
+            return context
+        try:
+            with use_context(context):
+                context.open()
+        except BaseException:
+            self.release(context)
+            raise
+        return context
+
+    def release(self, context):
+        with self.lock:
+            context.users -= 1
+            self.touch(context)
+            closing = self.take_evictable()
+        for old_context in closing:
+            old_context.close()
+
+    # 사용한 시각을 기록하고 풀의 맨 뒤(가장 최근)로 옮기는 메소드 (풀 잠금 안에서 호출)
+    # take_evictable은 앞에서부터 보다가 오래되지 않은 사용자를 만나면 멈추므로, 사용 순서와 last_used 순서가 같아야 함
+    def touch(self, context):
+        context.last_used = time.monotonic()
+        if self.contexts.get(context.tenant) is context:
+            self.contexts.move_to_end(context.tenant)
+
+    # 정리 타이머를 시작하는 메소드 (이미 예약되어 있으면 그대로 둠, 풀 잠금 안에서 호출)
+    def schedule_sweep(self):
+        if self.sweep_timer is None:
+            self.sweep_timer = threading.Timer(max(self.idle_seconds / 2, 1), self.sweep)
+            self.sweep_timer.daemon = True
+            self.sweep_timer.start()
+
+    # 오래 쓰지 않은 사용자를 닫고, 열린 사용자가 남아 있으면 다음 정리를 예약하는 메소드 (타이머 스레드에서 실행)
+    def sweep(self):
+        with self.lock:
+            self.sweep_timer = None
+            closing = self.take_evictable()
+            if self.contexts:
+                self.schedule_sweep()
+        for old_context in closing:
+            old_context.close()
+
+    # 최대 개수를 넘었거나 오래 쓰지 않은 사용자를 풀에서 빼내는 메소드 (사용 중인 사용자는 건너뜀, 풀 잠금 안에서 호출)
+    # 모두 사용 중이면 잠시 max_open을 넘을 수 있으며, 사용이 끝나는 대로 정리됨
+    def take_evictable(self):
+        closing = []
+        idle_before = time.monotonic() - self.idle_seconds
+        for tenant, context in list(self.contexts.items()):
+            if len(self.contexts) <= self.max_open and context.last_used > idle_before:
+                break
+            if context.users == 0:
+                del self.contexts[tenant]
+                closing.append(context)
+        self.evictions += len(closing)
+        return closing
+
+    # 사용자를 현재 사용자로 설정한 상태에서 실행하는 with 문용 메소드
+    @contextlib.contextmanager
+    def session(self, tenant, load=True, create=False):
+        context = self.acquire(tenant, load, create)
+        try:
+            with use_context(context):
+                yield context
+        finally:
+            self.release(context)
+
+    # 열려 있는 모든 사용자를 닫는 메소드 (프로그램 종료 시)
+    def close_all(self):
+        with self.lock:
+            closing = list(self.contexts.values())
+            self.contexts.clear()
+            if self.sweep_timer is not None:
+                self.sweep_timer.cancel()
+                self.sweep_timer = None
+        for context in closing:
+            context.close()
+
+    def stats(self):
+        return {'open': len(self.contexts), 'hits': self.hits, 'opens': self.opens, 'evictions': self.evictions}
+
+# 사용자별 데이터 풀
+tenant_pool = ContextPool()
+metrics.sources['tenant_pool'] = tenant_pool.stats
+
+# 파일을 임시 파일에 먼저 쓴 뒤 교체하여, 저장 도중 중단되어도 기존 파일이 보존되도록 하는 함수
+# (data가 문자열/바이트가 아니면 조각들의 목록이나 생성기로 보고 차례로 씀)
+def write_file_atomic(path, data):
+    if isinstance(data, (str, bytes)):
+        data = [data]
+    temp_path = f"{path}.{os.getpid()}.tmp"  # 다른 프로세스가 같은 파일을 쓰는 중이어도 임시 파일이 겹치지 않음
+    with open(temp_path, 'wb') as file:
+        for chunk in data:
+            file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+# 변경 사항을 메모리에 반영하고 저장소에 기록하는 함수 (모든 추가/수정은 이 함수를 거침)
+@metrics.timed("store.commit")
+def commit_change(op, **data):
+    change = dict(data, op=op)
+    with data_lock, store.writing():
+        result = apply_change(change)
+        store.record(change, result)
+    return result
+
+# 여러 변경 사항을 한꺼번에 반영하고 저장소에 한 번에 기록하는 함수 (일괄 가져오기용)
+@metrics.timed("store.commit_batch")
+def commit_changes(changes):
+    with data_lock, store.writing():
+        results = [apply_change(change) for change in changes]
+        store.record_batch(changes, results)
+    return results
+
+# 변경 기록 하나를 메모리의 그룹/지인 데이터에 반영하는 함수 (저널 재생에도 사용)
+def apply_change(change):
+    op = change['op']
+
+    if op == 'add_group':
+        group = Group(change['name'], change['contact_interval'], change['tolerance'])
+        group.id = len(groups)
+        groups.append(group)
+        data_index.add_group(group)
+        return group
+
+    if op == 'edit_group':
+        group = groups[change['group']]
+        old_name = group.name
+        for field in ('name', 'contact_interval', 'tolerance'):
+            if field in change:
+                setattr(group, field, change[field])
+        if group.name != old_name:
+            data_index.rename_group(group, old_name)
+        if 'contact_interval' in change or 'tolerance' in change:
+            scheduler.update_group(group)
+        return group
+
+    if op == 'add_contact':
+        contact = Contact(
+            change['name'], groups[change['group']], change['birthday'],
+            change['gender'], change['residence'], change['hobbies']
+        )
+        contact.additional_info = change.get('additional_info', "")
+        contact.id = len(contacts)
+        contacts.append(contact)
+        data_index.add_contact(contact)
+        search_index.add_contact(contact)
+        birthday_index.update(contact)
+        scheduler.update(contact)
+        return contact
+
+    contact = contacts[change['contact']]
+
+    if op == 'edit_contact':
+        old_name = contact.name
+        search_fields = [field for field in SearchIndex.CONTACT_FIELDS if field in change]
+        search_index.remove_contact(contact, search_fields)
+        for field in ('name', 'birthday', 'gender', 'residence', 'hobbies', 'additional_info'):
+            if field in change:
+                setattr(contact, field, change[field])
+        if contact.name != old_name:
+            data_index.rename_contact(contact, old_name)
+        search_index.add_contact(contact, search_fields)
+        if 'birthday' in change:
+            birthday_index.update(contact)
+    elif op == 'add_conversation':
+        contact.add_conversation(change['date'], change['topics'])
+        data_index.add_conversation(contact, contact.contact_history[-1])
+        aggregates.add(contact, contact.contact_history[-1])
+        contact_summaries.add(contact, len(contact.contact_history) - 1, contact.contact_history[-1])
+        analytics.add(contact, contact.contact_history[-1])
+        search_index.add_conversation(contact, contact.contact_history[-1])
+    elif op == 'edit_conversation':
+        record = contact.contact_history[change['index']]
+        old_date = record['date']
+        # 대화 내용이 바뀌는 주제의 위치 (검색 색인에서 빼고 다시 넣음)
+        positions = [
+            record.category_ids.index(category_numbers[category])
+            for category, values in change.get('topics', {}).items() if 'details' in values
+        ]
+        aggregates.remove(contact, record)
+        search_index.remove_conversation(record, positions)
+        if 'date' in change:
+            record['date'] = change['date']
+        for category, values in change.get('topics', {}).items():
+            record['topics'][category].update(values)
+        aggregates.add(contact, record)
+        contact_summaries.edit(contact, change['index'], record)
+        data_index.move_conversation(contact, record, old_date)
+        analytics.invalidate()
+        search_index.add_conversation(contact, record, positions)
+    elif op == 'update_last_contact_date':
+        if change['last_contact_date']:
+            contact.last_contact_date = datetime.strptime(change['last_contact_date'], DATETIME_FORMAT)
+        else:
+            contact.last_contact_date = None
+        scheduler.update(contact)
+    else:
+        raise ValueError(f"알 수 없는 변경 기록입니다: {op}")
+    return contact
+
+# 그룹 하나를 저장용 딕셔너리로 만드는 함수
+def serialize_group(group):
+    return {'name': group.name, 'contact_interval': group.contact_interval, 'tolerance': group.tolerance}
+
+# 지인 하나를 저장용 딕셔너리로 만드는 함수 (대화 기록 제외)
+def serialize_contact(contact):
+    return {
+        'name': contact.name,
+        'group': contact.group.name,
+        'birthday': contact.birthday,
+        'gender': contact.gender,
+        'residence': contact.residence,
+        'hobbies': contact.hobbies,
+        'additional_info': contact.additional_info,
+        'last_contact_date': contact.last_contact_date.strftime(DATETIME_FORMAT) if contact.last_contact_date else None
+    }
+
+# 여러 프로세스가 같은 데이터 파일을 동시에 고치지 않도록 하는 권고 잠금 (fcntl.flock)
+# reentrant이면 같은 스레드에서 다시 잡을 수 있고, 아니면 잡은 스레드와 다른 스레드에서 풀 수 있음 (백그라운드 압축용)
+# fcntl이 없는 환경(Windows)에서는 같은 프로세스 안에서만 잠금
+class FileLock:
+    def __init__(self, path, reentrant=True):
+        self.path = path
+        self.lock = threading.RLock() if reentrant else threading.Lock()
+        self.depth = 0
+        self.owner = None  # 잠금을 잡은 스레드
+        self.file = None  # 잠금 파일 (처음 잠글 때 열어 두고 close에서 닫음)
+
+    def acquire(self, blocking=True):
+        if not self.lock.acquire(blocking):
+            return False
+        if self.depth == 0 and fcntl is not None:
+            if self.file is None:
+                self.file = open(self.path, 'a+b')
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.lock.release()
+                return False
+        self.depth += 1
+        self.owner = threading.get_ident()
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.owner = None
+            if self.file is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.lock.release()
+
+    # 현재 스레드가 잠금을 잡고 있는지 여부
+    def held(self):
+        return self.owner == threading.get_ident()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def close(self):
+        if self.file is not None and self.depth == 0:
+            self.file.close()
+            self.file = None
+
+# JSON 스냅샷 + 추가 기록 저널 저장소
+class JsonStore:
+    def __init__(self, data_file=DATA_FILE, journal_file=JOURNAL_FILE):
+        self.data_file = data_file
+        self.journal_file = journal_file
+        self.journal_seq = 0  # 마지막으로 기록(또는 재생)된 저널 번호
+        self.snapshot_seq = 0  # 현재 스냅샷에 반영된 저널 번호
+        self.compaction_thread = None  # 실행 중인 백그라운드 압축 스레드
+        self.compaction_error = None  # 백그라운드 압축에서 난 오류 (다음 저장에서 알림)
+        self.history_file = None  # 지연 로딩 스냅샷의 대화 기록 파일
+        self.history_handle = None  # 열어 둔 대화 기록 파일 (다른 프로세스가 압축하며 지워도 계속 읽을 수 있음)
+        self.history_index = {}  # 지인 번호 -> 대화 기록 파일 내 (위치, 길이)
+        self.journal_offsets = {}  # 저널 파일 inode -> 읽은(또는 쓴) 위치 (다른 프로세스가 덧붙인 기록만 이어서 읽음)
+        self.loaded_version = None  # 불러오기 시작할 때의 스냅샷 파일 (snapshot_version 값)
+        self.lock = FileLock(data_file + ".lock")  # 저널에 쓰는 동안 잡는 잠금 (다른 프로세스와 공유)
+        self.compaction_lock = FileLock(data_file + ".compact.lock", reentrant=False)  # 압축하는 동안 잡는 잠금
+
+    # 지인의 대화 기록을 JSON 바이트로 반환 (아직 불러오지 않은 기록은 파싱 없이 그대로 복사)
+    def history_bytes(self, contact, history_file):
+        if contact._contact_history is None:
+            offset, length = self.history_index[contact.id]
+            history_file.seek(offset)
+            return history_file.read(length)
+        return json.dumps(history_to_list(contact.contact_history)).encode('utf-8')
+
+    # 현재 메모리의 그룹 및 지인 데이터를 스냅샷 딕셔너리로 만드는 메소드
+    # (history_positions가 주어지면 대화 기록 대신 별도 파일 내 위치를 기록)
+    def build_snapshot(self, history_file=None, history_positions=None):
+        snapshot = {
+            'journal_seq': self.journal_seq,
+            'aggregates': aggregates.to_dict(),
+            'groups': [serialize_group(group) for group in groups],
+            'contacts': [serialize_contact(contact) for contact in contacts]
         }
+        for idx, contact_data in enumerate(snapshot['contacts']):
+            if history_positions is None:
+                contact_data['contact_history'] = history_to_list(contacts[idx].contact_history)
+            else:
+                contact_data['history'] = history_positions[idx]
+        if history_file is not None:
+            snapshot['history_file'] = os.path.basename(history_file)
+        return snapshot
 
-        with open(DATA_FILE, 'w') as file:
-            json.dump(data, file)
-        print("데이터가 성공적으로 저장되었습니다.")
-    
-    except IOError as e:
-        print(f"데이터 저장 중 오류 발생: {e}")
+    # 변경 기록 하나를 저널 파일 끝에 덧붙이는 메소드
+    def record(self, change, result=None):
+        self.record_batch([change], [result])
+
+        # 저널이 충분히 쌓이면 백그라운드에서 압축
+        if self.journal_seq - self.snapshot_seq >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact(background=True)
+
+    # 여러 변경 기록을 저널 파일 끝에 한 번에 덧붙이는 메소드 (fsync는 한 번만 수행)
+    # (일괄 가져오기 도중 매번 스냅샷을 다시 쓰지 않도록 압축은 끝난 뒤 save에서 수행)
+    def record_batch(self, changes, results):
+        with data_lock, self.lock:
+            lines = []
+            for change in changes:
+                self.journal_seq += 1
+                change['seq'] = self.journal_seq
+                lines.append(json.dumps(change) + "\n")
+            with open(self.journal_file, 'ab') as file:
+                file.write("".join(lines).encode('utf-8'))
+                file.flush()
+                os.fsync(file.fileno())
+                self.journal_offsets[os.fstat(file.fileno()).st_ino] = file.tell()
+
+    # 쓰기 잠금을 잡고, 그동안 다른 프로세스가 기록한 변경을 먼저 반영하는 with 문용 메소드
+    # (변경은 이 안에서 메모리에 반영하고 기록해야 지인/대화 번호가 다른 프로세스의 기록과 겹치지 않음)
+    @contextlib.contextmanager
+    def writing(self):
+        with data_lock, self.lock:
+            if not self.sync():
+                reload_data()
+            yield
+
+    # 다른 프로세스가 기록한 변경을 쓰기 잠금 없이 반영하는 메소드 (메뉴/API 요청마다 호출)
+    def refresh(self):
+        with data_lock:
+            if not self.sync():
+                reload_data()
 
-# 프로그램 시작 시 JSON 파일에서 데이터를 불러오는 함수
-def load_data():
-    if os.path.exists(DATA_FILE):
+    # 저널 파일(압축 중인 것 포함)에서 아직 반영하지 않은 변경을 반영하는 메소드
+    # 중간 번호가 빠져 있으면 False (다른 프로세스가 압축하여 그 변경이 새 스냅샷으로 옮겨짐)
+    def sync(self, strict=True):
+        with data_lock:
+            seen = set()
+            synced = all(self.replay_journal(path, strict, seen) for path in (self.journal_file + ".compacting", self.journal_file))
+            # 지워진 저널 파일의 위치는 버림 (같은 inode 번호가 새 파일에 다시 쓰일 수 있음)
+            for inode in set(self.journal_offsets) - seen:
+                del self.journal_offsets[inode]
+            return synced
+
+    # 스냅샷을 읽는 동안 일관된 데이터를 보도록 하는 with 문용 메소드
+    # (JSON/바이너리 저장소는 불러온 메모리 데이터와 열어 둔 파일을 쓰므로 따로 할 일이 없음)
+    @contextlib.contextmanager
+    def read_snapshot(self):
+        yield
+
+    # 저널 파일을 압축 중인 저널로 옮기는 메소드
+    # 이전 압축이 실패하여 압축 중인 저널이 남아 있으면, 그 기록은 아직 스냅샷에 없으므로 덮어쓰지 않고 뒤에 이어 붙임
+    def rotate_journal(self):
+        compacting_file = self.journal_file + ".compacting"
+        if not os.path.exists(self.journal_file):
+            return
+        if not os.path.exists(compacting_file):
+            os.replace(self.journal_file, compacting_file)
+            return
+        with open(self.journal_file, 'rb') as source, open(compacting_file, 'ab') as target:
+            target.write(source.read())
+            target.flush()
+            os.fsync(target.fileno())
+        os.remove(self.journal_file)
+
+    # 저널을 스냅샷으로 압축하는 메소드 (background=True이면 별도 스레드에서 파일 쓰기 수행)
+    # 백그라운드 압축이 실패하면 오류를 출력하고, 다음에 저장할 때 그 오류를 다시 발생시킴
+    # 다른 프로세스가 압축 중이면 건너뜀 (변경은 모두 저널에 남아 있으므로 압축은 나중에 해도 됨)
+    def compact(self, background=False):
+        if self.compaction_thread is not None and self.compaction_thread.is_alive():
+            if background:
+                return
+            self.compaction_thread.join()
+        if self.compaction_error is not None and not background:
+            error, self.compaction_error = self.compaction_error, None
+            raise error
+        if not self.compaction_lock.acquire(blocking=False):
+            return
+
+        try:
+            with data_lock, self.writing():
+                # 마지막 스냅샷 이후 변경이 없으면 다시 쓸 필요가 없음
+                if self.journal_seq == self.snapshot_seq and os.path.exists(self.data_file):
+                    self.compaction_lock.release()
+                    return
+
+                # 잠금을 잡은 상태에서 다른 프로세스의 변경까지 반영한 현재 상태를 바이트로 고정하고, 이후의 변경은 새 저널에 쌓이도록 교체
+                seq = self.journal_seq
+                files, state = self.build_snapshot_files(seq)
+                self.rotate_journal()
+        except BaseException:
+            self.compaction_lock.release()
+            raise
+
+        def write_snapshot():
+            try:
+                for path, data in files:
+                    write_file_atomic(path, data)
+
+                # 새 스냅샷이 자리 잡은 뒤에 이전 스냅샷 파일과 압축 중이던 저널을 정리
+                with data_lock, self.lock:
+                    self.install_snapshot(state)
+                    if os.path.exists(self.journal_file + ".compacting"):
+                        os.remove(self.journal_file + ".compacting")
+                    self.snapshot_seq = seq
+            finally:
+                self.compaction_lock.release()
+
+        def write_snapshot_in_background():
+            try:
+                write_snapshot()
+            except Exception as e:
+                print(f"백그라운드 저장 중 오류 발생: {e}")
+                self.compaction_error = e
+
+        if background:
+            # 압축 스레드도 현재 사용자의 데이터를 사용하도록 컨텍스트를 복사해서 실행
+            self.compaction_thread = threading.Thread(target=contextvars.copy_context().run, args=(write_snapshot_in_background,), daemon=True)
+            self.compaction_thread.start()
+        else:
+            write_snapshot()
+
+    # 현재 상태로 쓸 (파일 경로, 내용) 목록과 쓰기가 끝난 뒤 install_snapshot에 넘길 값을 만드는 메소드
+    def build_snapshot_files(self, seq):
+        if not LAZY_LOAD:
+            return [(self.data_file, json.dumps(self.build_snapshot()))], (None, None)
+
+        # 지연 로딩 모드에서는 대화 기록을 지인별 한 줄씩 별도 파일에 쓰고 스냅샷에는 위치만 기록
+        history_file = f"{self.data_file}.history.{seq}"
+        history_chunks = []
+        history_positions = []
+        offset = 0
+        old_history = self.open_history() if self.history_file else None
+        for contact in contacts:
+            chunk = self.history_bytes(contact, old_history)
+            history_chunks.append(chunk)
+            history_positions.append((offset, len(chunk)))
+            offset += len(chunk) + 1
+        text = json.dumps(self.build_snapshot(history_file, history_positions))
+        return [(history_file, b"\n".join(history_chunks) + b"\n"), (self.data_file, text)], (history_file, history_positions)
+
+    # 새로 쓴 대화 기록 파일로 바꾸고 이전 파일을 지우는 메소드
+    def install_snapshot(self, state):
+        history_file, history_positions = state
+        self.close_history()
+        self.history_file = history_file
+        if history_file is not None:
+            self.history_index = {contact.id: position for contact, position in zip(contacts, history_positions)}
+            self.open_history()  # 다음 압축을 한 다른 프로세스가 이 파일을 지워도 계속 읽을 수 있도록 바로 열어 둠
+        else:
+            self.history_index = {}
+        self.remove_stale_files()
+
+    # 방금 자리 잡은 대화 기록 파일 외의 대화 기록 파일과 임시 파일을 지우는 메소드 (압축 잠금을 잡은 채 호출)
+    # 그 사이 다른 프로세스가 압축하며 남긴 파일도 함께 지움 (열어 둔 프로세스는 계속 읽을 수 있고, Windows에서는 실패하면 남겨 둠)
+    def remove_stale_files(self):
+        prefix = glob.escape(self.data_file)
+        keep = os.path.abspath(self.history_file) if self.history_file else None
+        for path in glob.glob(prefix + ".history.*") + glob.glob(prefix + ".*.tmp"):
+            if os.path.abspath(path) != keep:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    # 대화 기록 파일을 열어 두고 반환하는 메소드
+    def open_history(self):
+        if self.history_handle is None:
+            self.history_handle = open(self.history_file, 'rb')
+        return self.history_handle
+
+    def close_history(self):
+        if self.history_handle is not None:
+            self.history_handle.close()
+            self.history_handle = None
+
+    # 불러온 상태를 모두 잊는 메소드 (처음부터 다시 불러오기 전에 호출)
+    def reset_state(self):
+        self.close_history()
+        self.journal_seq = self.snapshot_seq = 0
+        self.history_file = None
+        self.history_index = {}
+        self.journal_offsets = {}
+
+    def save(self):
+        self.compact()
+
+    # 진행 중인 백그라운드 압축이 끝나기를 기다리고 열어 둔 파일을 닫는 메소드
+    def close(self):
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+        self.close_history()
+        self.lock.close()
+        self.compaction_lock.close()
+
+    # 저널 파일에서 지난번에 읽은 위치 이후의 변경 기록을 순서대로 재생하는 메소드
+    # 번호가 이어지지 않는 기록이 나오면 strict일 때 False를 반환하고, 아니면 ValueError를 발생시킴 (읽은 파일의 inode는 seen에 추가)
+    def replay_journal(self, path, strict=True, seen=None):
+        try:
+            # 기록 도중 중단된 마지막 줄은 쓰기 잠금을 잡고 있을 때만 잘라냄 (잠금 없이 읽을 때는 다른 프로세스가 쓰는 중일 수 있음)
+            file = open(path, 'rb+' if self.lock.held() else 'rb')
+        except FileNotFoundError:
+            return True
+
+        with file:
+            inode = os.fstat(file.fileno()).st_ino
+            if seen is not None:
+                seen.add(inode)
+            offset = self.journal_offsets.get(inode, 0)
+            if offset > os.fstat(file.fileno()).st_size:
+                offset = 0
+            file.seek(offset)
+            data = file.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data) and self.lock.held():
+                file.truncate(offset + end)
+            self.journal_offsets[inode] = offset + end
+
+        replayed = 0
+        for line in data[:end].split(b"\n")[:-1]:
+            try:
+                change = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if change['seq'] <= self.journal_seq:
+                continue  # 이미 스냅샷에 반영된 기록
+            if change['seq'] != self.journal_seq + 1:
+                if strict:
+                    return False
+                # 중간 기록이 빠진 채 이어서 재생하면 지인/그룹 번호가 어긋나므로 재생을 멈춤
+                raise ValueError(f"저널 기록 번호가 이어지지 않습니다: {self.journal_seq} 다음이 {change['seq']}")
+            apply_change(change)
+            self.journal_seq = change['seq']
+            replayed += 1
+        if replayed:
+            metrics.count("store.journal_replayed", replayed)
+        return True
+
+    # 스냅샷과 저널에서 데이터를 불러오는 메소드 (불러올 데이터가 없으면 False)
+    # 잠금 없이 읽으므로, 읽는 도중 다른 프로세스가 압축하여 스냅샷과 저널이 이어지지 않으면 처음부터 다시 읽음
+    def load(self):
+        for attempt in range(STORE_LOAD_ATTEMPTS):
+            # 마지막 시도는 쓰기 잠금을 잡고 불러옴 (그동안 다른 프로세스는 압축할 수 없으므로 스냅샷과 저널이 항상 맞음)
+            last = attempt == STORE_LOAD_ATTEMPTS - 1
+            try:
+                with data_lock, self.lock if last else contextlib.nullcontext():
+                    self.loaded_version = self.snapshot_version()
+                    found = self.load_snapshot()
+                    # 압축 도중 중단된 저널과 현재 저널을 순서대로 재생
+                    # (그 사이 스냅샷 파일이 바뀌었으면 압축된 저널을 읽지 못해 이전 상태를 불러왔을 수 있으므로 다시 읽음)
+                    if self.sync(strict=not last) and (last or self.snapshot_version() == self.loaded_version):
+                        return found or self.journal_seq > 0
+            except FileNotFoundError:
+                pass  # 스냅샷을 읽은 뒤 대화 기록 파일이 지워짐
+            reset_data()
+            self.reset_state()
+            metrics.count("store.load_retries")
+        return False
+
+    # 스냅샷 파일이 새로 쓰였는지 비교하기 위한 값 (파일이 없으면 None)
+    def snapshot_version(self):
         try:
-            with open(DATA_FILE, 'r') as file:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    # 스냅샷 파일을 불러오는 메소드 (스냅샷이 없으면 False)
+    def load_snapshot(self):
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r', encoding='utf-8') as file:
                 data = json.load(file)
 
             # 그룹 데이터를 불러오기
             for group_data in data['groups']:
-                group = Group(group_data['name'], group_data['contact_interval'], group_data['tolerance'])
-                groups.append(group)
+                apply_change(dict(group_data, op='add_group'))
+
+            if 'history_file' in data:
+                self.history_file = os.path.join(os.path.dirname(self.data_file), data['history_file'])
+                self.open_history()
 
-            # 지인 데이터를 불러오기
+            # 지인 데이터를 불러오기 (대화 기록이 별도 파일에 있으면 위치만 기억해 두고 나중에 불러옴)
             for contact_data in data['contacts']:
-                group = next((g for g in groups if g.name == contact_data['group']), None)
-                if group:
-                    contact = Contact(
-                        contact_data['name'], group, contact_data['birthday'],
-                        contact_data['gender'], contact_data['residence'], contact_data['hobbies']
-                    )
-                    contact.additional_info = contact_data['additional_info']
-                    if contact_data['last_contact_date']:
-                        contact.last_contact_date = datetime.strptime(contact_data['last_contact_date'], "%Y-%m-%d %H:%M:%S")
-                    contact.contact_history = contact_data['contact_history']
-                    contacts.append(contact)
-            print("데이터가 성공적으로 불러와졌습니다.")
-
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"데이터 불러오기 중 오류 발생: {e}")
-    else:
-        print("데이터 파일이 존재하지 않습니다. 새로운 데이터를 생성합니다.")
+                contact = self.load_contact(contact_data)
+                if contact is not None:
+                    if 'history' in contact_data:
+                        self.history_index[contact.id] = tuple(contact_data['history'])
+                        contact.defer_history(self)
+                    else:
+                        contact.contact_history = contact_data['contact_history']
+
+            # 지연 로딩을 사용하지 않으면 대화 기록 파일을 한 번에 모두 읽음
+            if not LAZY_LOAD and self.history_file:
+                for contact in contacts:
+                    contact.contact_history
+
+            # 저장된 집계를 불러오고, 없으면(예전 데이터) 대화 기록으로 한 번 계산
+            if 'aggregates' in data:
+                aggregates.load_dict(data['aggregates'])
+            else:
+                aggregates.rebuild(contacts)
+
+            self.journal_seq = self.snapshot_seq = data.get('journal_seq', 0)
+            return True
+        return False
+
+    # 스냅샷에 저장된 지인 하나를 추가하는 메소드 (그룹이 없으면 None)
+    def load_contact(self, contact_data):
+        group = data_index.group_by_name(contact_data['group'])
+        if group is None:
+            return None
+        contact = apply_change(dict(contact_data, op='add_contact', group=group.id))
+        if contact_data['last_contact_date']:
+            contact.last_contact_date = datetime.strptime(contact_data['last_contact_date'], DATETIME_FORMAT)
+        return contact
+
+    # 대화 기록 파일에서 특정 지인의 기록 한 줄만 읽어 오는 메소드
+    def load_history(self, contact):
+        with data_lock:
+            if contact.id not in self.history_index:
+                return []
+            offset, length = self.history_index[contact.id]
+            file = self.open_history()
+            file.seek(offset)
+            return json.loads(file.read(length))
+
+    # 특정 날짜의 대화 기록을 (지인, 기록) 목록으로 반환
+    def conversations_by_date(self, date):
+        return data_index.conversations_on(date)
+
+    # start 이상 end 이하 날짜의 대화 기록을 (지인, 기록) 목록으로 반환
+    def conversations_between(self, start, end):
+        return data_index.conversations_between(start, end)
+
+    # 특정 지인의 중요도가 기준 이상인 대화 내용을 카테고리별로 반환
+    def important_topics(self, contact, min_importance):
+        important_conversations = {}
+        for record in contact.contact_history:
+            for category, details in record['topics'].items():
+                if details['importance'] >= min_importance:
+                    important_conversations.setdefault(category, []).append(details['details'])
+        return important_conversations
+
+# 열(column) 단위 바이너리 스냅샷 형식
+# 헤더(매직 4바이트 + 메타데이터 길이 8바이트) + 메타데이터 JSON(그룹/지인/집계, 날짜와 카테고리 사전, 열 위치) + 8바이트 단위로 정렬한 열 배열들
+# 대화 기록은 지인 순서대로 이어 붙이고, 날짜와 카테고리는 사전 번호로, 대화 내용은 하나의 UTF-8 덩어리에 길이만 기록
+BINARY_MAGIC = b"CNTB"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sQ")
+BINARY_COLUMNS = (
+    ('contact_conversation_start', 'Q'),  # 지인별 첫 대화의 번호 (지인 수 + 1개)
+    ('contact_topic_start', 'Q'),  # 지인별 첫 주제의 번호 (지인 수 + 1개)
+    ('contact_details_start', 'Q'),  # 지인별 대화 내용 시작 위치 (지인 수 + 1개)
+    ('conversation_date', 'I'),  # 대화별 날짜 사전 번호
+    ('conversation_topic_count', 'I'),  # 대화별 주제 수
+    ('topic_category', 'I'),  # 주제별 카테고리 사전 번호
+    ('topic_importance', 'i'),  # 주제별 중요도
+    ('topic_details_length', 'I'),  # 주제별 대화 내용 길이 (바이트)
+    ('details', 'B'),  # 모든 대화 내용을 이어 붙인 UTF-8 바이트
+)
+
+# 바이너리 스냅샷 파일을 메모리 맵으로 열어 지인별 대화 기록을 필요할 때 복원하는 클래스
+class BinarySnapshot:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = BINARY_HEADER.unpack_from(self.map, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"바이너리 스냅샷 파일이 아닙니다: {path}")
+        self.meta = json.loads(self.map[BINARY_HEADER.size:BINARY_HEADER.size + meta_length])
+        if self.meta['version'] != BINARY_VERSION or self.meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"지원하지 않는 바이너리 스냅샷 형식입니다: {path}")
+
+        # 열 배열은 복사하지 않고 메모리 맵 위의 뷰로 사용
+        self.view = memoryview(self.map)
+        self.columns = {}
+        for name, typecode in BINARY_COLUMNS:
+            offset, count = self.meta['columns'][name]
+            size = count * array.array(typecode).itemsize
+            self.columns[name] = self.view[offset:offset + size].cast(typecode)
+        self.dates = self.meta['dates']
+        self.categories = self.meta['categories']
+        self.days = None  # 처음 복원할 때 만드는 날짜 서수 표
+        self.category_map = None  # 처음 복원할 때 만드는 카테고리 번호 표
+
+    # 지인 하나의 대화 기록을 Conversation 목록으로 복원하는 메소드 (지인의 구간만 잘라 한 번에 읽음)
+    def history(self, index):
+        if self.days is None:
+            # 스냅샷의 날짜/카테고리 사전 번호를 메모리의 날짜 서수/카테고리 번호로 바꾸는 표
+            self.days = [date_ordinal(date) for date in self.dates]
+            self.category_map = [category_id(category) for category in self.categories]
+        days, category_map = self.days, self.category_map
+
+        columns = self.columns
+        conversation_start, conversation_end = columns['contact_conversation_start'][index:index + 2]
+        topic_start, topic_end = columns['contact_topic_start'][index:index + 2]
+        details_start, details_end = columns['contact_details_start'][index:index + 2]
+        topic_counts = columns['conversation_topic_count'][conversation_start:conversation_end].tolist()
+        topic_categories = [category_map[number] for number in columns['topic_category'][topic_start:topic_end].tolist()]
+        topic_importance = columns['topic_importance'][topic_start:topic_end].tolist()
+        topic_details_length = columns['topic_details_length'][topic_start:topic_end].tolist()
+        details = bytes(columns['details'][details_start:details_end])
+
+        history = []
+        topic = position = 0
+        for date, count in zip(columns['conversation_date'][conversation_start:conversation_end].tolist(), topic_counts):
+            topic_details = []
+            for length in topic_details_length[topic:topic + count]:
+                topic_details.append(details[position:position + length].decode('utf-8'))
+                position += length
+            history.append(Conversation.from_parts(
+                days[date], tuple(topic_categories[topic:topic + count]),
+                tuple(topic_importance[topic:topic + count]), tuple(topic_details)
+            ))
+            topic += count
+        return history
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+# 지인별 대화 기록을 열 배열에 차례로 쌓아 바이너리 스냅샷을 만드는 클래스
+# (base 스냅샷의 날짜/카테고리 사전을 그대로 이어 쓰므로, 아직 불러오지 않은 지인의 기록은 복원 없이 바이트 그대로 복사)
+class BinarySnapshotWriter:
+    def __init__(self, base=None):
+        self.base = base
+        self.dates = list(base.dates) if base else []
+        self.categories = list(base.categories) if base else []
+        self.date_ids = {date: idx for idx, date in enumerate(self.dates)}
+        self.category_ids = {category: idx for idx, category in enumerate(self.categories)}
+        self.columns = {name: array.array(typecode) for name, typecode in BINARY_COLUMNS}
+        for name in ('contact_conversation_start', 'contact_topic_start', 'contact_details_start'):
+            self.columns[name].append(0)
+
+    # 사전 번호를 찾고, 처음 나온 값이면 사전에 추가
+    @staticmethod
+    def lookup(table, ids, value):
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(table)
+            table.append(value)
+        return idx
+
+    # 지인 하나의 시작 위치 열을 현재 길이로 닫는 메소드
+    def end_contact(self):
+        columns = self.columns
+        columns['contact_conversation_start'].append(len(columns['conversation_date']))
+        columns['contact_topic_start'].append(len(columns['topic_category']))
+        columns['contact_details_start'].append(len(columns['details']))
+
+    # 메모리에 있는 대화 기록 목록을 추가
+    def add_history(self, history):
+        columns = self.columns
+        for record in history:
+            columns['conversation_date'].append(self.lookup(self.dates, self.date_ids, record.date))
+            columns['conversation_topic_count'].append(len(record.category_ids))
+            columns['topic_importance'].extend(record.importance)
+            for category, importance, details in record.topic_items():
+                encoded = str(details).encode('utf-8')
+                columns['topic_category'].append(self.lookup(self.categories, self.category_ids, category))
+                columns['topic_details_length'].append(len(encoded))
+                columns['details'].frombytes(encoded)
+        self.end_contact()
+
+    # base 스냅샷에 있는 지인 하나의 대화 기록을 바이트 그대로 복사
+    def copy_history(self, index):
+        source = self.base.columns
+        ranges = (
+            ('contact_conversation_start', ('conversation_date', 'conversation_topic_count')),
+            ('contact_topic_start', ('topic_category', 'topic_importance', 'topic_details_length')),
+            ('contact_details_start', ('details',)),
+        )
+        for start_column, names in ranges:
+            start, end = source[start_column][index], source[start_column][index + 1]
+            for name in names:
+                self.columns[name].frombytes(source[name][start:end].cast('B'))
+        self.end_contact()
+
+    # 메타데이터와 열 배열을 파일에 쓸 조각 목록으로 반환
+    def chunks(self, meta):
+        layout = {}
+        offset = 0
+        for name, typecode in BINARY_COLUMNS:
+            column = self.columns[name]
+            layout[name] = (offset, len(column))
+            offset += -(-len(column) * column.itemsize // 8) * 8
+
+        meta = dict(meta, version=BINARY_VERSION, byteorder=sys.byteorder, dates=self.dates, categories=self.categories)
+        data_start = None
+        while True:
+            # 열 위치는 메타데이터 길이에 따라 달라지므로, 위치를 넣은 메타데이터의 길이로 시작 위치가 바뀌지 않을 때까지 다시 계산
+            meta_bytes = json.dumps(meta).encode('utf-8')
+            start = -(-(BINARY_HEADER.size + len(meta_bytes)) // 8) * 8
+            if start == data_start:
+                break
+            data_start = start
+            meta['columns'] = {name: (data_start + column_offset, count) for name, (column_offset, count) in layout.items()}
+
+        yield BINARY_HEADER.pack(BINARY_MAGIC, len(meta_bytes))
+        yield meta_bytes
+        yield b"\0" * (data_start - BINARY_HEADER.size - len(meta_bytes))
+        for name, typecode in BINARY_COLUMNS:
+            column = self.columns[name]
+            yield column
+            yield b"\0" * (-(len(column) * column.itemsize) % 8)
+
+# 현재 데이터를 바이너리 스냅샷 조각으로 만드는 함수
+# (base 스냅샷을 가진 history_store에서 아직 불러오지 않은 지인의 기록은 복사만 함)
+def encode_binary_snapshot(meta, base=None, history_store=None):
+    writer = BinarySnapshotWriter(base)
+    for contact in contacts:
+        if base is not None and contact._contact_history is None and contact.history_store is history_store:
+            writer.copy_history(contact.id)
+        else:
+            writer.add_history(contact.read_history())
+    meta = dict(meta, groups=[serialize_group(group) for group in groups], contacts=[serialize_contact(contact) for contact in contacts])
+    return writer.chunks(meta)
+
+# 바이너리 스냅샷 + 추가 기록 저널 저장소 (저널 기록과 압축 방식은 JSON 저장소와 같고, 스냅샷만 열 단위 바이너리로 저장)
+class BinaryStore(JsonStore):
+    def __init__(self, data_file=BINARY_FILE, journal_file=BINARY_JOURNAL_FILE):
+        super().__init__(data_file, journal_file)
+        self.snapshot = None  # 메모리 맵으로 열어 둔 현재 스냅샷
+
+    def build_snapshot_files(self, seq):
+        # 생성기는 잠금 밖에서 실행되므로 열 배열은 여기서 (잠금 안에서) 모두 만들어 둠
+        chunks = list(encode_binary_snapshot({'journal_seq': seq, 'aggregates': aggregates.to_dict()}, self.snapshot, self))
+        return [(self.data_file, chunks)], None
+
+    # 새로 쓴 스냅샷을 메모리 맵으로 다시 열고 이전 스냅샷을 닫는 메소드
+    def install_snapshot(self, state):
+        old_snapshot = self.snapshot
+        self.snapshot = BinarySnapshot(self.data_file)
+        if old_snapshot is not None:
+            old_snapshot.close()
+        self.remove_stale_files()
+
+    def load_snapshot(self):
+        if not os.path.exists(self.data_file):
+            return self.migrate_from_json()
+
+        self.snapshot = BinarySnapshot(self.data_file)
+        meta = self.snapshot.meta
+        for group_data in meta['groups']:
+            apply_change(dict(group_data, op='add_group'))
+        for contact_data in meta['contacts']:
+            contact = self.load_contact(contact_data)
+            if contact is not None:
+                contact.defer_history(self)
+
+        # 지연 로딩을 사용하지 않으면 모든 대화 기록을 바로 복원
+        if not LAZY_LOAD:
+            for contact in contacts:
+                contact.contact_history
+
+        aggregates.load_dict(meta['aggregates'])
+        self.journal_seq = self.snapshot_seq = meta['journal_seq']
+        return True
+
+    # 스냅샷이 없으면 기존 JSON 데이터를 불러와 바이너리 스냅샷으로 저장하는 메소드
+    def migrate_from_json(self):
+        if not JsonStore(*data_files(os.path.dirname(self.data_file))['json']).load():
+            return False
+        self.compact()
+        # 방금 직접 쓴 스냅샷이면 다시 불러올 필요가 없음 (다른 프로세스가 먼저 옮기는 중이었으면 그 스냅샷을 다시 불러옴)
+        if self.snapshot is not None:
+            self.loaded_version = self.snapshot_version()
+        print("기존 JSON 데이터를 바이너리 스냅샷으로 옮겼습니다.")
+        return True
+
+    def load_history(self, contact):
+        with data_lock:
+            if self.snapshot is None or contact.id >= len(self.snapshot.meta['contacts']):
+                return []
+            return self.snapshot.history(contact.id)
+
+    def close(self):
+        super().close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def reset_state(self):
+        super().reset_state()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+# SQLite 저장소 (대화 기록은 필요할 때만 불러오고, 조회와 집계는 SQL로 처리)
+class SqliteStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            contact_interval INTEGER NOT NULL,
+            tolerance INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            birthday TEXT,
+            gender TEXT,
+            residence TEXT,
+            hobbies TEXT,
+            additional_info TEXT,
+            last_contact_date TEXT
+        );
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id INTEGER NOT NULL REFERENCES contacts(id),
+            position INTEGER NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS topics (
+            conversation_id INTEGER NOT NULL REFERENCES conversations(id),
+            category TEXT NOT NULL,
+            importance INTEGER NOT NULL,
+            details TEXT,
+            PRIMARY KEY (conversation_id, category)
+        );
+        CREATE TABLE IF NOT EXISTS category_stats (
+            contact_id INTEGER NOT NULL REFERENCES contacts(id),
+            category TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            importance INTEGER NOT NULL,
+            PRIMARY KEY (contact_id, category)
+        );
+        CREATE TABLE IF NOT EXISTS date_counts (
+            date TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_conversations_date ON conversations(date);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_conversations_contact ON conversations(contact_id, position);
+        CREATE INDEX IF NOT EXISTS idx_topics_category ON topics(category, importance);
+    """
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT)
+        # WAL 모드: 읽는 쪽은 쓰는 쪽을 막지 않고, 읽기 트랜잭션을 시작한 시점의 데이터를 봄
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self.data_version = None  # 마지막으로 메모리에 반영한 데이터베이스 버전 (다른 연결이 커밋하면 바뀜)
+        self.reading = False  # read_snapshot의 읽기 트랜잭션 안인지 여부
+        self.migrated = False  # prepare에서 JSON 데이터를 옮기며 메모리에 불러 두었는지 여부
+
+    def version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # 쓰기 잠금을 먼저 잡는 트랜잭션을 여는 with 문용 메소드 (이미 트랜잭션 안이면 그 트랜잭션을 그대로 사용)
+    @contextlib.contextmanager
+    def transaction(self):
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    # 쓰기 트랜잭션을 먼저 시작하여 다른 프로세스의 쓰기를 막고, 그동안 다른 프로세스가 커밋했으면 메모리 데이터를 다시 불러오는 with 문용 메소드
+    @contextlib.contextmanager
+    def writing(self):
+        with data_lock:
+            if self.conn.in_transaction:
+                yield
+                return
+            with self.transaction():
+                version = self.version()
+                if self.data_version is not None and version != self.data_version:
+                    reload_data()
+                self.data_version = version
+                yield
+
+    # 다른 프로세스가 커밋했으면 메모리 데이터를 다시 불러오는 메소드 (메뉴/API 요청마다 호출)
+    def refresh(self):
+        with data_lock:
+            if not self.conn.in_transaction and self.version() != self.data_version:
+                reload_data()
+
+    # 하나의 읽기 트랜잭션 안에서 불러오고 조회하는 with 문용 메소드 (도중에 다른 프로세스가 커밋해도 같은 시점의 데이터를 봄)
+    # (옮기기/집계 계산처럼 써야 하는 일은 읽기 트랜잭션을 시작하기 전에 끝냄)
+    @contextlib.contextmanager
+    def read_snapshot(self):
+        try:
+            self.prepare()
+        except LOAD_ERRORS as e:
+            raise DataLoadError(e) from e
+        self.conn.execute("BEGIN")
+        self.conn.execute("SELECT COUNT(*) FROM groups").fetchone()
+        self.reading = True
+        try:
+            yield
+        finally:
+            self.reading = False
+            if self.conn.in_transaction:
+                self.conn.commit()
+
+    # 데이터베이스가 비어 있으면 기존 JSON 데이터를 옮기고, 집계 테이블이 비어 있으면 다시 계산하는 메소드
+    # WAL 모드에서는 읽기 트랜잭션을 쓰기로 올릴 수 없으므로 (다른 프로세스가 먼저 쓰면 바로 실패) 쓰기 잠금부터 잡는 별도 트랜잭션에서 처리하고,
+    # 잠금을 기다리는 동안 다른 프로세스가 먼저 처리했을 수 있으므로 잠금을 잡은 뒤 다시 확인
+    def prepare(self):
+        with data_lock:
+            if not (self.needs_migration() or self.needs_rebuild()):
+                return
+            with self.transaction():
+                if self.needs_migration():
+                    self.migrated = self.migrate_from_json()
+                elif self.needs_rebuild():
+                    self.rebuild_aggregates()
+
+    # 데이터베이스가 비어 있고 옮겨 올 JSON 데이터가 있는지 여부
+    def needs_migration(self):
+        return (self.conn.execute("SELECT COUNT(*) FROM groups").fetchone()[0] == 0
+                and any(os.path.exists(path) for path in data_files(os.path.dirname(self.db_file))['json']))
+
+    # 대화 기록은 있는데 집계 테이블이 비어 있는지 여부 (집계 테이블이 생기기 전의 데이터베이스)
+    def needs_rebuild(self):
+        return (self.conn.execute("SELECT COUNT(*) FROM date_counts").fetchone()[0] == 0
+                and self.conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0] > 0)
+
+    def reset_state(self):
+        self.data_version = None
+
+    # 변경 기록 하나를 반영하고 커밋하는 메소드
+    def record(self, change, result=None):
+        with data_lock, self.conn:
+            self.write(change, result)
+
+    # 여러 변경 기록을 하나의 트랜잭션으로 반영하는 메소드
+    # (대화 기록 추가는 위치를 이어서 매기고, 집계는 바뀐 지인마다 마지막에 한 번만 기록)
+    def record_batch(self, changes, results):
+        with data_lock, self.conn:
+            added = {}
+            for change in changes:
+                if change['op'] == 'add_conversation':
+                    added[change['contact']] = added.get(change['contact'], 0) + 1
+            positions = {contact_id: len(contacts[contact_id].contact_history) - count for contact_id, count in added.items()}
+            dates = {}
+            for change, result in zip(changes, results):
+                if change['op'] != 'add_conversation':
+                    self.write(change, result)
+                    continue
+                contact_id = change['contact']
+                self.insert_conversation(contact_id, positions[contact_id], change['date'], change['topics'])
+                positions[contact_id] += 1
+                dates.setdefault(contact_id, set()).add(change['date'])
+            for contact_id, contact_dates in dates.items():
+                self.write_aggregates(contacts[contact_id], contact_dates)
+
+    # 변경 기록 하나를 해당 테이블에 반영하는 메소드 (커밋은 호출한 쪽에서 처리)
+    def write(self, change, result=None):
+        op = change['op']
+        if op == 'add_group':
+            self.conn.execute(
+                "INSERT INTO groups (id, name, contact_interval, tolerance) VALUES (?, ?, ?, ?)",
+                (result.id, result.name, result.contact_interval, result.tolerance)
+            )
+        elif op == 'edit_group':
+            self.update_fields('groups', change['group'], change, ('name', 'contact_interval', 'tolerance'))
+        elif op == 'add_contact':
+            self.conn.execute(
+                "INSERT INTO contacts (id, name, group_id, birthday, gender, residence, hobbies, additional_info) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.id, result.name, result.group.id, result.birthday, result.gender, result.residence, result.hobbies, result.additional_info)
+            )
+        elif op == 'edit_contact':
+            self.update_fields('contacts', change['contact'], change, ('name', 'birthday', 'gender', 'residence', 'hobbies', 'additional_info'))
+        elif op == 'update_last_contact_date':
+            self.update_fields('contacts', change['contact'], change, ('last_contact_date',))
+        elif op == 'add_conversation':
+            self.insert_conversation(change['contact'], len(result.contact_history) - 1, change['date'], change['topics'])
+            self.write_aggregates(result, [change['date']])
+        elif op == 'edit_conversation':
+            old_date = self.conn.execute(
+                "SELECT date FROM conversations WHERE contact_id = ? AND position = ?",
+                (change['contact'], change['index'])
+            ).fetchone()[0]
+            if 'date' in change:
+                self.conn.execute(
+                    "UPDATE conversations SET date = ? WHERE contact_id = ? AND position = ?",
+                    (change['date'], change['contact'], change['index'])
+                )
+            for category, values in change.get('topics', {}).items():
+                columns = [column for column in ('importance', 'details') if column in values]
+                self.conn.execute(
+                    f"UPDATE topics SET {', '.join(f'{column} = ?' for column in columns)} "
+                    "WHERE category = ? AND conversation_id = (SELECT id FROM conversations WHERE contact_id = ? AND position = ?)",
+                    [values[column] for column in columns] + [category, change['contact'], change['index']]
+                )
+            self.write_aggregates(result, [old_date, change.get('date', old_date)])
+
+    # 메모리의 집계 중 바뀐 지인과 날짜의 값만 테이블에 반영하는 메소드
+    def write_aggregates(self, contact, dates):
+        self.conn.execute("DELETE FROM category_stats WHERE contact_id = ?", (contact.id,))
+        self.conn.executemany(
+            "INSERT INTO category_stats (contact_id, category, count, importance) VALUES (?, ?, ?, ?)",
+            [(contact.id, category, counts[0], counts[1]) for category, counts in aggregates.contact_stats.get(contact.id, {}).items()]
+        )
+        for date in set(dates):
+            count = aggregates.date_counts.get(date, 0)
+            if count:
+                self.conn.execute("INSERT OR REPLACE INTO date_counts (date, count) VALUES (?, ?)", (date, count))
+            else:
+                self.conn.execute("DELETE FROM date_counts WHERE date = ?", (date,))
+
+    # 집계 테이블을 대화 기록 테이블로부터 다시 계산하는 메소드 (집계가 없던 예전 데이터베이스용)
+    def rebuild_aggregates(self):
+        with data_lock, self.transaction():
+            self.conn.execute("DELETE FROM category_stats")
+            self.conn.execute("DELETE FROM date_counts")
+            self.conn.execute(
+                "INSERT INTO category_stats (contact_id, category, count, importance) "
+                "SELECT c.contact_id, t.category, COUNT(*), SUM(t.importance) FROM conversations c "
+                "JOIN topics t ON t.conversation_id = c.id GROUP BY c.contact_id, t.category"
+            )
+            self.conn.execute("INSERT INTO date_counts (date, count) SELECT date, COUNT(*) FROM conversations GROUP BY date")
+
+    # 집계 테이블을 메모리로 불러오는 메소드
+    def load_aggregates(self):
+        aggregates.reset()
+        for contact_id, category, count, importance in self.conn.execute(
+                "SELECT contact_id, category, count, importance FROM category_stats"):
+            aggregates.contact_stats.setdefault(contact_id, {})[category] = [count, importance]
+            aggregates.category_counts[category] = aggregates.category_counts.get(category, 0) + count
+            aggregates.category_importance[category] = aggregates.category_importance.get(category, 0) + importance
+        aggregates.date_counts = dict(self.conn.execute("SELECT date, count FROM date_counts"))
+
+    # 변경 기록에 포함된 컬럼만 UPDATE하는 메소드
+    def update_fields(self, table, row_id, change, fields):
+        columns = [field for field in fields if field in change]
+        if columns:
+            self.conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                [change[column] for column in columns] + [row_id]
+            )
+
+    # 대화 기록 하나와 카테고리별 주제를 추가하는 메소드
+    def insert_conversation(self, contact_id, position, date, topics):
+        cursor = self.conn.execute(
+            "INSERT INTO conversations (contact_id, position, date) VALUES (?, ?, ?)",
+            (contact_id, position, date)
+        )
+        self.conn.executemany(
+            "INSERT INTO topics (conversation_id, category, importance, details) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, category, details['importance'], details['details']) for category, details in topics.items()]
+        )
+
+    # 변경마다 바로 커밋되므로 저장 시에는 추가 작업이 없음
+    def save(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # 그룹과 지인의 기본 정보만 불러오는 메소드 (대화 기록은 처음 접근할 때 불러옴)
+    def load(self):
+        # 읽기 트랜잭션 안이면 read_snapshot에서 이미 처리함
+        if not self.reading:
+            self.prepare()
+        # 불러오기 전에 버전을 기억 (불러오는 도중 다른 프로세스가 커밋했으면 다음 쓰기/새로 고침에서 다시 불러옴)
+        self.data_version = self.version()
+        if self.migrated:
+            # JSON 데이터를 옮기며 이미 메모리에 불러 두었음
+            self.migrated = False
+            return True
+        for group_id, name, contact_interval, tolerance in self.conn.execute(
+                "SELECT id, name, contact_interval, tolerance FROM groups ORDER BY id"):
+            apply_change({'op': 'add_group', 'name': name, 'contact_interval': contact_interval, 'tolerance': tolerance})
+
+        if not groups:
+            return False
+
+        for row in self.conn.execute(
+                "SELECT name, group_id, birthday, gender, residence, hobbies, additional_info, last_contact_date FROM contacts ORDER BY id"):
+            contact = apply_change({
+                'op': 'add_contact', 'name': row[0], 'group': row[1], 'birthday': row[2], 'gender': row[3],
+                'residence': row[4], 'hobbies': row[5], 'additional_info': row[6] or ""
+            })
+            if row[7]:
+                contact.last_contact_date = datetime.strptime(row[7], DATETIME_FORMAT)
+            contact.defer_history(self)  # 대화 기록은 처음 접근할 때 불러옴
+
+        # 대화 기록 없이 저장된 집계만 불러옴
+        self.load_aggregates()
+
+        # 지연 로딩을 사용하지 않으면 모든 대화 기록을 한 번의 쿼리로 불러옴
+        if not LAZY_LOAD:
+            for contact in contacts:
+                contact.contact_history = []
+            for contact_id, history in self.iter_histories():
+                contacts[contact_id].contact_history = history
+        return True
+
+    # 데이터베이스가 비어 있으면 기존 JSON 데이터를 옮겨오는 메소드 (prepare의 쓰기 트랜잭션 안에서 호출)
+    def migrate_from_json(self):
+        json_store = JsonStore(*data_files(os.path.dirname(self.db_file))['json'])
+        try:
+            if not json_store.load():
+                return False
+            for contact in contacts:
+                contact.contact_history  # 옮기기 전에 모든 대화 기록을 불러옴
+        finally:
+            json_store.close()
+
+        with data_lock:
+            for group in groups:
+                self.write({'op': 'add_group'}, group)
+            for contact in contacts:
+                self.write({'op': 'add_contact'}, contact)
+                if contact.last_contact_date:
+                    self.update_fields('contacts', contact.id, {'last_contact_date': contact.last_contact_date.strftime(DATETIME_FORMAT)}, ('last_contact_date',))
+                for position, record in enumerate(contact.contact_history):
+                    self.insert_conversation(contact.id, position, record['date'], record['topics'])
+                self.write_aggregates(contact, [])
+            self.conn.executemany("INSERT INTO date_counts (date, count) VALUES (?, ?)", aggregates.date_counts.items())
+        print("기존 JSON 데이터를 SQLite 저장소로 옮겼습니다.")
+        return True
+
+    # 대화 기록 조회 결과를 지인별 기록 목록으로 묶어 반환하는 메소드
+    def iter_histories(self, where="", params=()):
+        contact_id = None
+        history = []
+        conversation_id = None
+        for row_id, row_contact_id, date, category, importance, details in self.conn.execute(
+                "SELECT c.id, c.contact_id, c.date, t.category, t.importance, t.details FROM conversations c "
+                f"LEFT JOIN topics t ON t.conversation_id = c.id {where} ORDER BY c.contact_id, c.position",
+                params):
+            if row_contact_id != contact_id:
+                if contact_id is not None:
+                    yield contact_id, history
+                contact_id = row_contact_id
+                history = []
+            if row_id != conversation_id:
+                conversation_id = row_id
+                history.append({'date': date, 'topics': {}})
+            if category is not None:
+                history[-1]['topics'][category] = {'importance': importance, 'details': details}
+        if contact_id is not None:
+            yield contact_id, history
+
+    # 특정 지인의 대화 기록을 순서대로 불러오는 메소드
+    def load_history(self, contact):
+        for contact_id, history in self.iter_histories("WHERE c.contact_id = ?", (contact.id,)):
+            return history
+        return []
+
+    # 날짜 조건에 맞는 대화 기록을 (지인, 기록) 목록으로 반환 (날짜 인덱스 사용)
+    def query_conversations(self, where, params):
+        results = []
+        conversation_id = None
+        for row_id, contact_id, date, category, importance, details in self.conn.execute(
+                "SELECT c.id, c.contact_id, c.date, t.category, t.importance, t.details FROM conversations c "
+                f"LEFT JOIN topics t ON t.conversation_id = c.id WHERE {where} ORDER BY c.date, c.contact_id, c.position",
+                params):
+            if row_id != conversation_id:
+                conversation_id = row_id
+                results.append((contacts[contact_id], {'date': date, 'topics': {}}))
+            if category is not None:
+                results[-1][1]['topics'][category] = {'importance': importance, 'details': details}
+        return results
+
+    # 특정 날짜의 대화 기록을 (지인, 기록) 목록으로 반환
+    def conversations_by_date(self, date):
+        return self.query_conversations("c.date = ?", (date,))
+
+    # start 이상 end 이하 날짜의 대화 기록을 (지인, 기록) 목록으로 반환
+    def conversations_between(self, start, end):
+        return self.query_conversations("c.date BETWEEN ? AND ?", (start, end))
+
+    # 특정 지인의 중요도가 기준 이상인 대화 내용을 카테고리별로 반환
+    def important_topics(self, contact, min_importance):
+        important_conversations = {}
+        for category, details in self.conn.execute(
+                "SELECT t.category, t.details FROM conversations c JOIN topics t ON t.conversation_id = c.id "
+                "WHERE c.contact_id = ? AND t.importance >= ? ORDER BY c.position",
+                (contact.id, min_importance)):
+            important_conversations.setdefault(category, []).append(details)
+        return important_conversations
+
+# 데이터 폴더 안의 저장소 종류별 파일 경로
+def data_files(data_dir):
+    return {
+        'json': (os.path.join(data_dir, "contacts_data.json"), os.path.join(data_dir, "contacts_data.journal")),
+        'binary': (os.path.join(data_dir, "contacts_data.bin"), os.path.join(data_dir, "contacts_data.bin.journal")),
+        'sqlite': (os.path.join(data_dir, "contacts_data.db"),)
+    }
+
+# 설정된 종류의 저장소를 생성하는 함수 (data_dir: 데이터 파일을 둘 폴더)
+def create_store(data_dir=BASE_DIR):
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStore(*data_files(data_dir)['sqlite'])
+    if STORAGE_BACKEND == "binary":
+        return BinaryStore(*data_files(data_dir)['binary'])
+    return JsonStore(*data_files(data_dir)['json'])
+
+# 그룹 및 지인 데이터를 저장하는 함수 (JSON 저장소는 저널을 스냅샷으로 압축)
+@metrics.timed("save_data")
+def save_data():
+    try:
+        store.save()
+        print("데이터가 성공적으로 저장되었습니다.")
+    
+    except (IOError, sqlite3.Error) as e:
+        print(f"데이터 저장 중 오류 발생: {e}")
+
+# 데이터를 불러오는 중 날 수 있는 오류 (파일/DB 오류와 손상된 데이터)
+LOAD_ERRORS = (IOError, json.JSONDecodeError, sqlite3.Error, KeyError, IndexError, ValueError)
+
+# 저장소에서 데이터를 불러오지 못했을 때 발생하는 오류
+# (일부만 불러온 데이터로 명령을 실행하지 않도록 main은 0이 아닌 상태로 종료하고, API는 500으로 응답)
+class DataLoadError(Exception):
+    pass
+
+# 프로그램 시작 시 저장소에서 데이터를 불러오는 함수
+# (schedule이 False이면 스케줄러를 만들지 않음: 여러 프로세스로 연락 주기를 확인할 때는 스케줄러를 쓰지 않음)
+@metrics.timed("load_data")
+def load_data(quiet=False, schedule=True):
+    try:
+        if store.load():
+            metrics.count("load.contacts", len(contacts))
+            # 불러온 최근 연락 날짜로 연락 주기 스케줄러를 구성
+            if schedule:
+                scheduler.rebuild(contacts)
+            if not quiet:
+                print("데이터가 성공적으로 불러와졌습니다.")
+        elif not quiet:
+            print("데이터 파일이 존재하지 않습니다. 새로운 데이터를 생성합니다.")
+    except LOAD_ERRORS as e:
+        raise DataLoadError(e) from e
+
+# 메모리의 그룹/지인 데이터와 인덱스, 집계, 스케줄러를 모두 비우는 함수 (다른 저장소를 다시 불러올 때 사용)
+def reset_data():
+    with data_lock:
+        groups.clear()
+        contacts.clear()
+        data_index.reset()
+        aggregates.reset()
+        contact_summaries.reset()
+        analytics.reset()
+        search_index.reset()
+        birthday_index.reset()
+        scheduler.reset()
+
+# 다른 프로세스의 변경을 이어서 반영할 수 없을 때 (중간 기록이 다른 프로세스의 압축으로 스냅샷에 옮겨짐)
+# 메모리 데이터를 비우고 저장소에서 다시 불러오는 함수 (지인/그룹 번호는 저장소의 순서 그대로이므로 유지됨)
+def reload_data():
+    with data_lock:
+        reset_data()
+        store.reset_state()
+        load_data(quiet=True)
+        metrics.count("store.reloads")
+
+# 카테고리 이름 <-> 번호 사전 (고정 목록 외의 카테고리는 처음 나올 때 번호를 붙임)
+category_names = list(CATEGORIES)
+category_numbers = {name: idx for idx, name in enumerate(category_names)}
+category_id_tuples = {}  # 같은 카테고리 조합은 하나의 튜플을 공유
+category_lock = threading.Lock()  # 카테고리 사전은 모든 사용자가 함께 쓰므로 사용자별 data_lock이 아닌 별도 잠금으로 보호
+importance_tuples = {}  # 같은 중요도 조합도 하나의 튜플을 공유
+date_ordinals = {}  # 날짜 문자열 -> 서수 (같은 날짜는 하나의 정수 객체를 공유)
+date_strings = {}  # 서수 -> 날짜 문자열
+
+# 카테고리 이름을 번호로 바꾸는 함수
+def category_id(name):
+    number = category_numbers.get(name)
+    if number is None:
+        with category_lock:
+            number = category_numbers.get(name)
+            if number is None:
+                # 이름을 먼저 추가한 뒤 번호를 공개 (잠금 없이 번호를 읽은 스레드가 category_names에서 바로 찾을 수 있도록)
+                number = len(category_names)
+                category_names.append(name)
+                category_numbers[name] = number
+    return number
+
+# 날짜 문자열을 서수(정수)로 바꾸는 함수 (YYYY-MM-DD 형식이 아니면 문자열 그대로 보관)
+def date_ordinal(text):
+    day = date_ordinals.get(text)
+    if day is None:
+        try:
+            parsed = datetime.strptime(text, DATE_FORMAT)
+        except (TypeError, ValueError):
+            return text
+        if parsed.strftime(DATE_FORMAT) != text:
+            return text
+        day = date_ordinals.setdefault(text, parsed.toordinal())
+        date_strings.setdefault(day, text)
+    return day
+
+# 서수를 날짜 문자열로 바꾸는 함수
+def date_string(day):
+    if isinstance(day, str):
+        return day
+    text = date_strings.get(day)
+    if text is None:
+        text = date_strings.setdefault(day, datetime.fromordinal(day).strftime(DATE_FORMAT))
+    return text
+
+# 대화 기록 하나 (날짜는 서수, 카테고리는 번호 튜플, 중요도는 정수 튜플로 보관)
+# 예전처럼 record['date'], record['topics'][카테고리]['importance']로 읽고 고칠 수 있음
+class Conversation(Mapping):
+    __slots__ = ('day', 'category_ids', 'importance', 'details')
+
+    def __init__(self, date, topics):
+        self.day = date_ordinal(date)
+        self.set_topics(topics)
+
+    # 이미 변환된 값으로 대화 기록을 만드는 메소드 (바이너리 스냅샷 복원용)
+    @classmethod
+    def from_parts(cls, day, category_ids, importance, details):
+        record = cls.__new__(cls)
+        record.day = day
+        record.category_ids = category_id_tuples.setdefault(category_ids, category_ids)
+        record.importance = importance_tuples.setdefault(importance, importance)
+        record.details = details
+        return record
+
+    def set_topics(self, topics):
+        category_ids = []
+        importance = []
+        details = []
+        for category, values in topics.items():
+            number = category_numbers.get(category)
+            category_ids.append(category_id(category) if number is None else number)
+            importance.append(values['importance'])
+            details.append(values['details'])
+        category_ids = tuple(category_ids)
+        self.category_ids = category_id_tuples.setdefault(category_ids, category_ids)
+        importance = tuple(importance)
+        self.importance = importance_tuples.setdefault(importance, importance)
+        self.details = tuple(details)
+
+    @property
+    def date(self):
+        return date_string(self.day)
+
+    # (카테고리, 중요도, 내용)을 차례로 돌려주는 메소드
+    def topic_items(self):
+        return zip([category_names[number] for number in self.category_ids], self.importance, self.details)
+
+    def __getitem__(self, key):
+        if key == 'date':
+            return self.date
+        if key == 'topics':
+            return TopicsView(self)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'date':
+            self.day = date_ordinal(value)
+        elif key == 'topics':
+            self.set_topics(value)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('date', 'topics'))
+
+    def __len__(self):
+        return 2
+
+    def to_dict(self):
+        return {
+            'date': self.date,
+            'topics': {category: {'importance': importance, 'details': details} for category, importance, details in self.topic_items()}
+        }
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+# 대화 기록의 카테고리별 주제를 딕셔너리처럼 보여 주는 뷰
+class TopicsView(Mapping):
+    __slots__ = ('record',)
+
+    def __init__(self, record):
+        self.record = record
+
+    def __getitem__(self, category):
+        number = category_numbers.get(category)
+        if number is None or number not in self.record.category_ids:
+            raise KeyError(category)
+        return TopicView(self.record, self.record.category_ids.index(number))
+
+    def __iter__(self):
+        return (category_names[number] for number in self.record.category_ids)
+
+    def __len__(self):
+        return len(self.record.category_ids)
+
+    def __repr__(self):
+        return repr(self.record.to_dict()['topics'])
+
+# 주제 하나의 중요도와 내용을 딕셔너리처럼 보여 주는 뷰 (update로 수정 가능)
+class TopicView(Mapping):
+    __slots__ = ('record', 'index')
+
+    def __init__(self, record, index):
+        self.record = record
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == 'importance':
+            return self.record.importance[self.index]
+        if key == 'details':
+            return self.record.details[self.index]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'importance':
+            importance = list(self.record.importance)
+            importance[self.index] = value
+            importance = tuple(importance)
+            self.record.importance = importance_tuples.setdefault(importance, importance)
+        elif key == 'details':
+            details = list(self.record.details)
+            details[self.index] = value
+            self.record.details = tuple(details)
+        else:
+            raise KeyError(key)
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def __iter__(self):
+        return iter(('importance', 'details'))
+
+    def __len__(self):
+        return 2
 
-# 프로그램 실행 시 데이터를 불러오기
-load_data()
+    def __repr__(self):
+        return repr(dict(self))
+
+# 딕셔너리 대화 기록 목록을 Conversation 목록으로 바꾸는 함수
+def make_history(records):
+    return [record if isinstance(record, Conversation) else Conversation(record['date'], record['topics']) for record in records]
+
+# Conversation 목록을 JSON으로 저장할 수 있는 딕셔너리 목록으로 바꾸는 함수
+def history_to_list(history):
+    return [record.to_dict() for record in history]
 
 # 그룹 클래스
 class Group:
+    __slots__ = ('name', 'contact_interval', 'tolerance', 'id')
+
     def __init__(self, name, contact_interval, tolerance):
         self.name = name  # 그룹 이름
         self.contact_interval = contact_interval  # 연락 주기 (일 기준)
         self.tolerance = tolerance  # 오차 범위 (일 기준)
+        self.id = None  # 그룹 목록에서의 위치 (저널 기록 시 사용)
 
 # 지인 클래스
 class Contact:
+    __slots__ = ('name', 'group', 'birthday', 'gender', 'residence', 'hobbies', 'additional_info',
+                 'last_contact_date', '_contact_history', 'history_store', 'id')
+
     def __init__(self, name, group, birthday, gender, residence, hobbies):
         self.name = name  # 지인 이름
         self.group = group  # 지인이 속한 그룹
@@ -99,7 +2052,34 @@ class Contact:
         self.hobbies = hobbies  # 취미
         self.additional_info = ""  # 추가 정보 (메모)
         self.last_contact_date = None  # 최근 연락 날짜
-        self.contact_history = []  # 연락 기록 저장
+        self.contact_history = []  # 연락 기록 저장 (None이면 아직 저장소에서 불러오지 않음)
+        self.history_store = None  # 대화 기록을 불러올 저장소
+        self.id = None  # 지인 목록에서의 위치 (저널 기록 시 사용)
+
+    # 대화 기록은 처음 접근할 때 저장소에서 불러옴
+    @property
+    def contact_history(self):
+        if self._contact_history is None:
+            self.contact_history = self.history_store.load_history(self)
+            metrics.count("history.lazy_loads")
+            metrics.count("history.records_loaded", len(self._contact_history))
+        return self._contact_history
+
+    # 딕셔너리로 된 기록도 Conversation으로 바꿔서 보관
+    @contact_history.setter
+    def contact_history(self, history):
+        self._contact_history = make_history(history)
+
+    # 대화 기록을 지금 불러오지 않고, 처음 접근할 때 저장소에서 불러오도록 표시하는 메소드
+    def defer_history(self, history_store):
+        self._contact_history = None
+        self.history_store = history_store
+
+    # 대화 기록을 읽되, 아직 불러오지 않은 기록은 메모리에 남기지 않는 메소드 (내보내기/스냅샷 변환용)
+    def read_history(self):
+        if self._contact_history is None:
+            return make_history(self.history_store.load_history(self))
+        return self._contact_history
 
     # 추가 정보를 입력하는 메소드
     def add_additional_info(self, info):
@@ -111,20 +2091,712 @@ class Contact:
 
     # 대화 기록을 저장하는 메소드
     def add_conversation(self, date, topics):
-        self.contact_history.append({
-            'date': date,
-            'topics': topics
-        })
+        self.contact_history.append(Conversation(date, topics))
+
+# 이름, 그룹, 날짜, 카테고리로 지인과 대화 기록을 바로 찾기 위한 보조 인덱스
+# (추가/수정 시 apply_change에서 함께 갱신되며, 대화 기록 인덱스는 처음 조회할 때 만들어짐)
+class DataIndex:
+    def __init__(self):
+        self.reset()
+
+    # 모든 인덱스를 비우는 메소드
+    def reset(self):
+        self.contacts_by_name = {}  # 이름 -> 지인 목록 (동명이인 허용)
+        self.groups_by_name = {}  # 그룹 이름 -> 그룹
+        self.group_contacts = {}  # 그룹 번호 -> 지인 목록
+        self.by_date = {}  # 날짜 -> [(지인, 대화 기록)]
+        self.sorted_dates = []  # 날짜 범위 조회를 위한 정렬된 날짜 목록
+        self.by_category = {}  # 카테고리 -> [(지인, 대화 기록)]
+        self.conversations_ready = False  # 대화 기록 인덱스를 만들었는지 여부
+
+    def add_group(self, group):
+        self.groups_by_name[group.name] = group
+        self.group_contacts.setdefault(group.id, [])
+
+    def rename_group(self, group, old_name):
+        if self.groups_by_name.get(old_name) is group:
+            del self.groups_by_name[old_name]
+        self.groups_by_name[group.name] = group
+
+    def add_contact(self, contact):
+        self.contacts_by_name.setdefault(contact.name, []).append(contact)
+        self.group_contacts.setdefault(contact.group.id, []).append(contact)
+
+    def rename_contact(self, contact, old_name):
+        same_name = self.contacts_by_name.get(old_name, [])
+        if contact in same_name:
+            same_name.remove(contact)
+            if not same_name:
+                del self.contacts_by_name[old_name]
+        self.contacts_by_name.setdefault(contact.name, []).append(contact)
+
+    def group_by_name(self, name):
+        return self.groups_by_name.get(name)
+
+    def find_contacts(self, name):
+        return list(self.contacts_by_name.get(name, []))
+
+    def contacts_in_group(self, group):
+        return list(self.group_contacts.get(group.id, []))
+
+    # 대화 기록 하나를 날짜/카테고리 인덱스에 넣는 메소드
+    def add_conversation(self, contact, record):
+        if not self.conversations_ready:
+            return
+        date = record.date
+        if date not in self.by_date:
+            self.by_date[date] = []
+            bisect.insort(self.sorted_dates, date)
+        self.by_date[date].append((contact, record))
+        for number in record.category_ids:
+            self.by_category.setdefault(category_names[number], []).append((contact, record))
+
+    # 대화 날짜가 바뀐 기록을 새 날짜로 옮기는 메소드
+    def move_conversation(self, contact, record, old_date):
+        if not self.conversations_ready or old_date == record['date']:
+            return
+        entries = self.by_date.get(old_date, [])
+        for idx, (_, entry) in enumerate(entries):
+            if entry is record:
+                del entries[idx]
+                break
+        if not entries and old_date in self.by_date:
+            del self.by_date[old_date]
+            del self.sorted_dates[bisect.bisect_left(self.sorted_dates, old_date)]
+        date = record['date']
+        if date not in self.by_date:
+            self.by_date[date] = []
+            bisect.insort(self.sorted_dates, date)
+        self.by_date[date].append((contact, record))
+
+    # 처음 조회할 때 모든 대화 기록으로 날짜/카테고리 인덱스를 만드는 메소드
+    def ensure_conversations(self):
+        if self.conversations_ready:
+            return
+        self.conversations_ready = True
+        for contact in contacts:
+            for record in contact.contact_history:
+                self.add_conversation(contact, record)
+
+    # 특정 날짜의 (지인, 대화 기록) 목록
+    def conversations_on(self, date):
+        self.ensure_conversations()
+        return list(self.by_date.get(date, []))
+
+    # start 이상 end 이하 날짜의 (지인, 대화 기록) 목록 (날짜순)
+    def conversations_between(self, start, end):
+        self.ensure_conversations()
+        left = bisect.bisect_left(self.sorted_dates, start)
+        right = bisect.bisect_right(self.sorted_dates, end)
+        return [entry for date in self.sorted_dates[left:right] for entry in self.by_date[date]]
+
+    # 특정 카테고리를 다룬 (지인, 대화 기록) 목록
+    def conversations_in_category(self, category):
+        self.ensure_conversations()
+        return list(self.by_category.get(category, []))
+
+# 지인/대화 기록 보조 인덱스
+data_index = ContextProxy('data_index')
+
+# 대시보드용 집계 값 (대화 기록이 추가/수정될 때마다 바뀐 만큼만 갱신하고 데이터와 함께 저장)
+class Aggregates:
+    def __init__(self):
+        self.reset()
+
+    # 모든 집계를 비우는 메소드
+    def reset(self):
+        self.category_importance = {}  # 카테고리 -> 중요도 합계
+        self.category_counts = {}  # 카테고리 -> 대화 빈도
+        self.contact_stats = {}  # 지인 번호 -> {카테고리: [대화 빈도, 중요도 합계]}
+        self.date_counts = {}  # 날짜 -> 대화 기록 수
+
+    # 대화 기록 하나를 집계에 더하거나(sign=1) 빼는(sign=-1) 메소드
+    def apply(self, contact, record, sign=1):
+        stats = self.contact_stats.setdefault(contact.id, {})
+        for category, importance, _ in record.topic_items():
+            self.category_importance[category] = self.category_importance.get(category, 0) + sign * importance
+            self.category_counts[category] = self.category_counts.get(category, 0) + sign
+            if self.category_counts[category] == 0:
+                del self.category_counts[category]
+                del self.category_importance[category]
+            counts = stats.setdefault(category, [0, 0])
+            counts[0] += sign
+            counts[1] += sign * importance
+            if counts[0] == 0:
+                del stats[category]
+        date = record.date
+        self.date_counts[date] = self.date_counts.get(date, 0) + sign
+        if self.date_counts[date] == 0:
+            del self.date_counts[date]
+
+    def add(self, contact, record):
+        self.apply(contact, record, 1)
+
+    def remove(self, contact, record):
+        self.apply(contact, record, -1)
+
+    # 특정 지인의 카테고리별 대화 빈도와 중요도 합계
+    def contact_topic_stats(self, contact):
+        stats = self.contact_stats.get(contact.id, {})
+        topic_counts = {category: counts[0] for category, counts in stats.items()}
+        importance_counts = {category: counts[1] for category, counts in stats.items()}
+        return topic_counts, importance_counts
+
+    # 모든 대화 기록으로 집계를 다시 만드는 메소드 (집계가 저장되지 않은 예전 데이터용)
+    def rebuild(self, contacts):
+        self.reset()
+        for contact in contacts:
+            for record in contact.contact_history:
+                self.add(contact, record)
+
+    def to_dict(self):
+        return {
+            'category_importance': self.category_importance,
+            'category_counts': self.category_counts,
+            'contact_stats': self.contact_stats,
+            'date_counts': self.date_counts
+        }
+
+    def load_dict(self, data):
+        self.category_importance = dict(data['category_importance'])
+        self.category_counts = dict(data['category_counts'])
+        self.contact_stats = {int(contact_id): stats for contact_id, stats in data['contact_stats'].items()}
+        self.date_counts = dict(data['date_counts'])
+
+# 대시보드 집계
+aggregates = ContextProxy('aggregates')
+
+# 지인별 최근 대화 요약 (AI 대화 주제 추천용)
+# 지인마다 가장 최근 대화 TOPIC_RECENT_CONVERSATIONS개만 (날짜, 기록 번호, 대화 기록)으로 날짜 순서대로 보관하여,
+# 추천할 때마다 전체 대화 기록을 정렬하지 않음 (카테고리별 통계는 대시보드 집계의 contact_stats를 그대로 사용)
+# 요약은 지인의 주제를 처음 추천할 때 한 번 만들고, 이후에는 대화 추가/수정 때 해당 지인의 요약만 고침
+class ContactSummaries:
+    def __init__(self, size=None):
+        self.size = size or TOPIC_RECENT_CONVERSATIONS
+        self.reset()
+
+    def reset(self):
+        self.recent = {}  # 지인 번호 -> [(날짜, 기록 번호, 대화 기록)] (오래된 것부터)
+
+    # 지인의 최근 대화 목록 (최근 것부터)
+    def recent_conversations(self, contact):
+        entries = self.recent.get(contact.id)
+        if entries is None:
+            # (날짜, 기록 번호)가 모두 다르므로 대화 기록끼리 비교하는 일은 없음
+            entries = heapq.nlargest(self.size, ((record['date'], index, record) for index, record in enumerate(contact.contact_history)))
+            entries.reverse()
+            self.recent[contact.id] = entries
+            metrics.count("summary.builds")
+        return [record for date, index, record in reversed(entries)]
+
+    # 새 대화 기록을 요약에 넣는 메소드 (요약을 아직 만들지 않은 지인은 나중에 전체 기록으로 만듦)
+    def add(self, contact, index, record):
+        entries = self.recent.get(contact.id)
+        if entries is None:
+            return
+        entry = (record['date'], index, record)
+        if len(entries) < self.size or entry[:2] > entries[0][:2]:
+            bisect.insort(entries, entry)
+            if len(entries) > self.size:
+                del entries[0]
+
+    # 대화 기록이 수정되었을 때 호출하는 메소드
+    # 요약에 있던 기록의 날짜가 바뀌면 그 다음 후보를 알 수 없으므로 해당 지인의 요약만 버리고 다음 추천 때 다시 만듦
+    def edit(self, contact, index, record):
+        entries = self.recent.get(contact.id)
+        if entries is None:
+            return
+        if any(item[2] is record for item in entries):
+            del self.recent[contact.id]
+        else:
+            self.add(contact, index, record)
+
+# 지인별 최근 대화 요약
+contact_summaries = ContextProxy('contact_summaries')
+
+# 대화 기록 분석 엔진 (NumPy가 있으면 대화/주제 기록을 열 배열로 모아 벡터 연산으로 집계하고, 없으면 집계 값과 저장소로 계산)
+# 대화 배열: 지인 번호, 날짜 서수(날짜 형식이 아니면 -1) / 주제 배열: 대화 행 번호, 카테고리 번호, 중요도, 대화 안의 주제 위치
+# 대화 기록 인덱스와 같이 처음 조회할 때 만들고, 이후 추가된 기록은 모아 두었다가 다음 조회 때 배열에 이어 붙임
+class ConversationAnalytics:
+    CONVERSATION_COLUMNS = ('contact', 'day')
+    TOPIC_COLUMNS = ('conversation', 'category', 'importance', 'position')
+    UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ready = False  # 열 배열을 만들었는지 여부
+        self.records = []  # 대화 행 번호 -> Conversation (대화 내용 조회용)
+        self.columns = {}  # 열 이름 -> NumPy 배열
+        self.contact_orders = {}  # 'conversation'/'topic' -> (지인 번호로 정렬한 행 번호, 정렬된 지인 번호)
+        self.pending = {name: array.array('i') for name in self.CONVERSATION_COLUMNS + self.TOPIC_COLUMNS}
+
+    @property
+    def available(self):
+        return load_numpy() is not None
+
+    # 대화 기록 하나를 배열에 추가 (아직 배열을 만들지 않았으면 처음 조회할 때 한꺼번에 만듦)
+    def add(self, contact, record):
+        if not self.ready:
+            return
+        pending = self.pending
+        row = len(self.records)
+        self.records.append(record)
+        pending['contact'].append(contact.id)
+        pending['day'].append(record.day if isinstance(record.day, int) else -1)
+        for position, (number, importance) in enumerate(zip(record.category_ids, record.importance)):
+            pending['conversation'].append(row)
+            pending['category'].append(number)
+            pending['importance'].append(importance)
+            pending['position'].append(position)
+
+    # 기존 기록이 수정되면 다음 조회 때 배열을 다시 만듦
+    def invalidate(self):
+        if self.ready:
+            self.reset()
+
+    def ensure(self):
+        if not self.ready:
+            self.ready = True
+            with metrics.span("analytics.build"):
+                for contact in contacts:
+                    for record in contact.contact_history:
+                        self.add(contact, record)
+            metrics.count("analytics.records_indexed", len(self.records))
+        if len(self.pending['contact']) or len(self.pending['conversation']) or not self.columns:
+            for name, values in self.pending.items():
+                added = np.frombuffer(values, dtype=np.int32) if len(values) else np.zeros(0, dtype=np.int32)
+                self.columns[name] = np.concatenate([self.columns[name], added]) if name in self.columns else added.copy()
+            self.pending = {name: array.array('i') for name in self.pending}
+            self.contact_orders = {}
+        return self.columns
+
+    # 특정 지인의 대화(table='conversation') 또는 주제(table='topic') 행 번호를 기록 순서대로 반환
+    # (지인 번호로 정렬한 행 순서를 한 번 만들어 두고 이진 탐색으로 구간만 잘라냄)
+    def contact_rows(self, contact, table):
+        columns = self.ensure()
+        if table not in self.contact_orders:
+            keys = columns['contact'] if table == 'conversation' else columns['contact'][columns['conversation']]
+            order = np.argsort(keys, kind='stable')
+            self.contact_orders[table] = (order, keys[order])
+        order, sorted_keys = self.contact_orders[table]
+        key = sorted_keys.dtype.type(contact.id)  # 자료형이 다르면 배열 전체를 변환하므로 같은 자료형으로 맞춤
+        return order[np.searchsorted(sorted_keys, key):np.searchsorted(sorted_keys, key, side='right')]
+
+    # 조건에 맞는 주제 행 번호 (contact, category, min_importance 중 주어진 조건만 적용)
+    def topic_rows(self, contact=None, category=None, min_importance=None):
+        columns = self.ensure()
+        rows = self.contact_rows(contact, 'topic') if contact is not None else np.arange(len(columns['conversation']))
+        if category is not None:
+            rows = rows[columns['category'][rows] == category_numbers.get(category, -1)]
+        if min_importance is not None:
+            rows = rows[columns['importance'][rows] >= min_importance]
+        return rows
+
+    # 주제 행을 group 기준(category 또는 contact)으로 묶어 (빈도, 중요도 합계)를 구하는 메소드
+    def topic_totals(self, group, rows):
+        columns = self.ensure()
+        keys = columns['category'][rows] if group == 'category' else columns['contact'][columns['conversation'][rows]]
+        counts = np.bincount(keys)
+        sums = np.bincount(keys, weights=columns['importance'][rows])
+        present = np.nonzero(counts)[0]
+        return present, counts[present], sums[present].astype(np.int64)
+
+    # 카테고리별 중요도 합계 (중요도 기준이 없으면 항상 유지되는 집계 값을 그대로 사용)
+    def category_importance(self, min_importance=None):
+        if min_importance is None:
+            return dict(aggregates.category_importance)
+        if not self.available:
+            totals = {}
+            for contact in contacts:
+                for record in contact.contact_history:
+                    for category, importance, _ in record.topic_items():
+                        if importance >= min_importance:
+                            totals[category] = totals.get(category, 0) + importance
+            return totals
+        present, _, sums = self.topic_totals('category', self.topic_rows(min_importance=min_importance))
+        return {category_names[number]: int(total) for number, total in zip(present, sums)}
+
+    # 특정 지인의 카테고리별 대화 빈도와 중요도 합계 (중요도 기준이 없으면 집계 값을 그대로 사용)
+    def contact_topic_stats(self, contact, min_importance=None):
+        if min_importance is None:
+            return aggregates.contact_topic_stats(contact)
+        if not self.available:
+            topic_counts, importance_counts = {}, {}
+            for record in contact.contact_history:
+                for category, importance, _ in record.topic_items():
+                    if importance >= min_importance:
+                        topic_counts[category] = topic_counts.get(category, 0) + 1
+                        importance_counts[category] = importance_counts.get(category, 0) + importance
+            return topic_counts, importance_counts
+        present, counts, sums = self.topic_totals('category', self.topic_rows(contact, min_importance=min_importance))
+        names = [category_names[number] for number in present]
+        return dict(zip(names, counts.tolist())), dict(zip(names, sums.tolist()))
+
+    # 특정 지인의 중요도가 기준 이상인 대화 내용을 카테고리별로 반환 (기록 순서 유지)
+    def important_topics(self, contact, min_importance):
+        if not self.available:
+            return store.important_topics(contact, min_importance)
+        columns = self.ensure()
+        rows = self.topic_rows(contact, min_importance=min_importance)
+        important_conversations = {}
+        for conversation, number, position in zip(columns['conversation'][rows].tolist(), columns['category'][rows].tolist(), columns['position'][rows].tolist()):
+            important_conversations.setdefault(category_names[number], []).append(self.records[conversation].details[position])
+        return important_conversations
+
+    # 중요도 합계(value='importance') 또는 대화 빈도(value='count')가 큰 지인 n명을 [(지인, 값)]으로 반환
+    def top_contacts(self, n, value='importance', category=None):
+        if not self.available:
+            totals = {}
+            for contact_id, stats in aggregates.contact_stats.items():
+                selected = [counts for name, counts in stats.items() if category is None or name == category]
+                if selected:
+                    totals[contact_id] = sum(counts[1 if value == 'importance' else 0] for counts in selected)
+            return [(contacts[contact_id], total) for contact_id, total in heapq.nlargest(n, totals.items(), key=lambda item: item[1])]
+
+        present, counts, sums = self.topic_totals('contact', self.topic_rows(category=category))
+        values = sums if value == 'importance' else counts
+        order = np.argsort(-values, kind='stable')[:n]
+        return [(contacts[int(present[idx])], int(values[idx])) for idx in order]
+
+    # 날짜(day), 주(week, 월요일 기준), 월(month)별 대화 수를 {구간 이름: 대화 수}로 반환 (contact가 주어지면 해당 지인만)
+    def conversations_by_period(self, period='day', contact=None):
+        if not self.available:
+            counts = {}
+            if contact is not None:
+                date_counts = {}
+                for record in contact.contact_history:
+                    date_counts[record.date] = date_counts.get(record.date, 0) + 1
+            else:
+                date_counts = aggregates.date_counts
+            for date, count in date_counts.items():
+                label = period_label(date, period)
+                if label is not None:
+                    counts[label] = counts.get(label, 0) + count
+            return dict(sorted(counts.items()))
+
+        columns = self.ensure()
+        days = columns['day'] if contact is None else columns['day'][self.contact_rows(contact, 'conversation')]
+        days = days[days >= 0]
+        if period == 'week':
+            keys = (days - 1) // 7
+            labels = week_label
+        elif period == 'month':
+            keys = (days - self.UNIX_EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+            labels = lambda key: str(np.datetime64(key, 'M'))
+        else:
+            keys = days
+            labels = date_string
+        unique, counts = np.unique(keys, return_counts=True)
+        return {labels(int(key)): int(count) for key, count in zip(unique, counts)}
+
+# 날짜 문자열이 속한 구간 이름 (날짜 형식이 아니면 None)
+def period_label(date, period):
+    day = date_ordinal(date)
+    if isinstance(day, str):
+        return None
+    if period == 'week':
+        return week_label((day - 1) // 7)
+    if period == 'month':
+        return date[:7]
+    return date
+
+# 주 번호(서수 기준, 월요일 시작)를 그 주 월요일의 날짜 문자열로 바꾸는 함수 (같은 주는 한 번만 계산)
+week_labels = {}
+
+def week_label(week):
+    label = week_labels.get(week)
+    if label is None:
+        label = week_labels.setdefault(week, datetime.fromordinal(week * 7 + 1).strftime(DATE_FORMAT))
+    return label
+
+# 대화 기록 분석 엔진
+analytics = ContextProxy('analytics')
+
+# 대화 내용과 지인 정보(취미, 거주지, 메모)를 찾는 전문 검색 역색인
+# 단어마다 문서 번호 목록을 두고, 단어를 두 글자씩 겹쳐 자른 n-gram(한 글자도 포함)에서 그 n-gram이 들어간 단어를 찾음
+# 한국어는 조사가 붙어 단어 모양이 제각각이므로 검색어가 일부로 들어 있는 단어를 n-gram으로 찾아 그 단어들의 문서를 합침
+# (예: '여행' -> '여행을', '해외여행' 등의 문서). 검색어의 단어 중 가장 드문 단어의 문서만 최근에 추가된 순서로 보면서
+# 실제 내용에 다른 단어도 모두 들어 있는지 확인하고 BM25 점수로 정렬함
+# (흔한 검색어라서 일치하는 문서가 SEARCH_MAX_MATCHES개를 넘으면 최근에 추가된 문서부터 그만큼만 비교)
+# 다른 인덱스처럼 처음 검색할 때 만들고, 이후 추가/수정된 내용은 apply_change에서 바로 반영
+# (내용이 수정되면 예전 문서를 단어별 문서 목록에서 빼고 새 문서로 다시 넣음)
+class SearchIndex:
+    CONTACT_FIELDS = ('hobbies', 'residence', 'additional_info')
+    FIELD_LABELS = {'hobbies': "취미", 'residence': "거주지", 'additional_info': "메모"}
+    WORD_PATTERN = re.compile(r"\w+")
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ready = False  # 색인을 만들었는지 여부
+        self.word_docs = {}  # 단어 -> 문서 번호 배열 (문서 번호 순)
+        self.gram_words = {}  # n-gram -> 그 n-gram이 들어간 단어 집합
+        self.doc_owners = []  # 문서 번호 -> 대화 기록(Conversation) 또는 지인(Contact)
+        self.doc_contacts = array.array('i')  # 문서 번호 -> 지인 번호
+        self.doc_slots = array.array('i')  # 문서 번호 -> 대화 안의 주제 위치 (지인 정보는 -1 - 필드 번호)
+        self.owner_docs = {}  # (대화 기록/지인 객체 id, 주제 위치 또는 필드 번호) -> 현재 문서 번호
+        self.document_count = 0  # 지워지지 않은 문서 수
+        self.total_length = 0  # 지워지지 않은 문서의 전체 길이 (평균 길이 계산용)
+
+    # 텍스트를 소문자 단어 목록으로 나누는 메소드 (구두점이 없으면 정규식 없이 공백으로만 나눔)
+    @classmethod
+    def words(cls, text):
+        text = text.lower()
+        words = text.split()
+        if all(map(str.isalnum, words)):
+            return words
+        return cls.WORD_PATTERN.findall(text)
+
+    # 단어 하나의 n-gram 집합 (두 글자씩 겹쳐 자른 것과 한 글자씩)
+    @staticmethod
+    def word_grams(word):
+        return set(word) | {word[idx:idx + 2] for idx in range(len(word) - 1)}
+
+    # 문서 하나를 색인에 넣는 메소드 (내용이 없으면 넣지 않음)
+    def add_document(self, owner, contact_id, slot, text):
+        if not isinstance(text, str) or not text:
+            return
+        doc = len(self.doc_owners)
+        self.doc_owners.append(owner)
+        self.doc_contacts.append(contact_id)
+        self.doc_slots.append(slot)
+        self.owner_docs[(id(owner), slot)] = doc
+        self.document_count += 1
+        self.total_length += len(text)
+        word_docs = self.word_docs
+        for word in self.words(text):
+            docs = word_docs.get(word)
+            if docs is None:
+                # 처음 나온 단어는 n-gram 목록에 등록
+                docs = word_docs[word] = array.array('i')
+                for gram in self.word_grams(word):
+                    self.gram_words.setdefault(gram, set()).add(word)
+            elif docs[-1] == doc:
+                continue  # 같은 문서에 같은 단어가 여러 번 나오면 한 번만 기록
+            docs.append(doc)
+
+    # 문서 하나를 색인에서 빼는 메소드 (내용을 바꾸기 전에 호출해야 예전 단어를 찾을 수 있음)
+    # 문서 번호는 그대로 두고, 그 문서가 들어 있던 단어별 문서 목록에서만 지움
+    def remove_document(self, owner, slot, text):
+        doc = self.owner_docs.pop((id(owner), slot), None)
+        if doc is None:
+            return
+        self.doc_owners[doc] = None
+        self.document_count -= 1
+        self.total_length -= len(text)
+        word_docs = self.word_docs
+        for word in set(self.words(text)):
+            docs = word_docs[word]
+            idx = bisect.bisect_left(docs, doc)
+            if idx < len(docs) and docs[idx] == doc:
+                del docs[idx]
+            if not docs:
+                # 더 이상 어느 문서에도 없는 단어는 n-gram 목록에서도 지움
+                del word_docs[word]
+                for gram in self.word_grams(word):
+                    words = self.gram_words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self.gram_words[gram]
+
+    # 대화 기록의 주제를 색인에 넣는 메소드 (positions를 주면 그 위치의 주제만)
+    def add_conversation(self, contact, record, positions=None):
+        if not self.ready:
+            return
+        for position, details in enumerate(record.details):
+            if positions is None or position in positions:
+                self.add_document(record, contact.id, position, details)
+
+    def remove_conversation(self, record, positions):
+        if not self.ready:
+            return
+        for position in positions:
+            self.remove_document(record, position, record.details[position])
+
+    def add_contact(self, contact, fields=CONTACT_FIELDS):
+        if not self.ready:
+            return
+        for number, field in enumerate(self.CONTACT_FIELDS):
+            if field in fields:
+                self.add_document(contact, contact.id, -1 - number, getattr(contact, field))
+
+    def remove_contact(self, contact, fields):
+        if not self.ready:
+            return
+        for number, field in enumerate(self.CONTACT_FIELDS):
+            if field in fields:
+                self.remove_document(contact, -1 - number, getattr(contact, field))
+
+    # 처음 검색할 때 모든 지인 정보와 대화 기록으로 색인을 만드는 메소드
+    def ensure(self):
+        if self.ready:
+            return
+        self.ready = True
+        with metrics.span("search.build_index"):
+            for contact in contacts:
+                self.add_contact(contact)
+                for record in contact.contact_history:
+                    self.add_conversation(contact, record)
+        metrics.count("search.documents_indexed", len(self.doc_owners))
+
+    # 검색어 단어가 들어 있는 색인 단어의 문서 번호 배열 목록
+    def matching_docs(self, word):
+        matches = None
+        for gram in sorted(self.word_grams(word), key=lambda gram: len(self.gram_words.get(gram, ()))):
+            words = self.gram_words.get(gram)
+            if not words:
+                return []
+            matches = set(words) if matches is None else matches & words
+        return [self.word_docs[match] for match in matches if word in match]
+
+    # 문서 번호 배열 여러 개를 합쳐 최근에 추가된 문서부터 차례로 돌려주는 생성기
+    @staticmethod
+    def newest_first(docs_list):
+        if len(docs_list) == 1:
+            return reversed(docs_list[0])
+        return (doc for doc, _ in itertools.groupby(heapq.merge(*map(reversed, docs_list), reverse=True)))
+
+    # 검색어의 모든 단어가 들어 있는 문서를 점수 순으로 최대 limit개 반환
+    # 카테고리, 중요도, 날짜 조건을 주면 대화 내용만 찾음 (date_from, date_to는 YYYY-MM-DD 문자열)
+    @metrics.timed("search.query")
+    def search(self, query, category=None, min_importance=None, max_importance=None,
+               date_from=None, date_to=None, limit=SEARCH_RESULT_LIMIT):
+        self.ensure()
+        words = list(dict.fromkeys(self.words(query)))
+        if not words or not self.document_count:
+            return []
+
+        # 단어마다 일치하는 문서 목록과 문서 수 (여러 색인 단어에 걸친 문서는 중복으로 세므로 추정값)
+        terms = []
+        for word in words:
+            docs_list = self.matching_docs(word)
+            if not docs_list:
+                return []
+            terms.append((sum(map(len, docs_list)), word, docs_list))
+        terms.sort(key=lambda term: term[0])
+
+        category_number = None
+        if category is not None:
+            category_number = category_numbers.get(category)
+            if category_number is None:
+                return []
+        day_from = date_ordinal(date_from) if date_from else None
+        day_to = date_ordinal(date_to) if date_to else None
+        topics_only = category is not None or min_importance is not None or max_importance is not None \
+            or day_from is not None or day_to is not None
+
+        # 가장 드문 단어의 문서를 후보로 보고, 드문 단어부터 내용을 확인하여 빨리 걸러냄
+        document_count = self.document_count
+        average_length = self.total_length / document_count
+        weights = [(word, math.log(1 + (document_count - count + 0.5) / (count + 0.5))) for count, word, _ in terms]
+        k1 = self.BM25_K1
+        b = self.BM25_B
+        doc_owners = self.doc_owners
+        doc_slots = self.doc_slots
+        scored = []
+        for doc in self.newest_first(terms[0][2]):
+            owner = doc_owners[doc]
+            slot = doc_slots[doc]
+            if slot >= 0:
+                if category_number is not None and owner.category_ids[slot] != category_number:
+                    continue
+                if min_importance is not None and owner.importance[slot] < min_importance:
+                    continue
+                if max_importance is not None and owner.importance[slot] > max_importance:
+                    continue
+                if day_from is not None or day_to is not None:
+                    day = owner.day
+                    if not isinstance(day, int) or (day_from is not None and day < day_from) or (day_to is not None and day > day_to):
+                        continue
+                text = owner.details[slot]
+            elif topics_only:
+                continue
+            else:
+                text = getattr(owner, self.CONTACT_FIELDS[-1 - slot]) or ""
+
+            text = text.lower()
+            length_norm = k1 * (1 - b + b * len(text) / average_length)
+            score = 0.0
+            for word, idf in weights:
+                tf = text.count(word)
+                if not tf:
+                    break
+                score += idf * tf * (k1 + 1) / (tf + length_norm)
+            else:
+                scored.append((score, doc))
+                if len(scored) >= SEARCH_MAX_MATCHES:
+                    break
+
+        metrics.count("search.candidates", terms[0][0])
+        metrics.count("search.matches", len(scored))
+
+        # 점수가 같으면 나중에 추가된 문서를 먼저 보여 줌
+        return [self.result(doc, score) for score, doc in heapq.nlargest(limit, scored)]
+
+    # 검색 결과 하나를 딕셔너리로 만드는 메소드
+    def result(self, doc, score):
+        owner = self.doc_owners[doc]
+        slot = self.doc_slots[doc]
+        contact = contacts[self.doc_contacts[doc]]
+        if slot >= 0:
+            return {
+                'score': score, 'contact': contact, 'field': category_names[owner.category_ids[slot]],
+                'date': owner.date, 'importance': owner.importance[slot], 'text': owner.details[slot]
+            }
+        field = self.CONTACT_FIELDS[-1 - slot]
+        return {
+            'score': score, 'contact': contact, 'field': self.FIELD_LABELS[field],
+            'date': None, 'importance': None, 'text': getattr(owner, field)
+        }
+
+# 전문 검색 색인
+search_index = ContextProxy('search_index')
+
+# 검색 결과를 출력하는 함수
+def print_search_results(results):
+    if not results:
+        print("검색 결과가 없습니다.")
+        return
+    for rank, result in enumerate(results, start=1):
+        if result['date'] is not None:
+            print(f"{rank}. [{result['contact'].name}] {result['date']} {result['field']} (중요도 {result['importance']}): {result['text']}")
+        else:
+            print(f"{rank}. [{result['contact'].name}] {result['field']}: {result['text']}")
+
+# 대화 내용과 지인 정보를 검색하는 함수 (메뉴용)
+def search_conversations():
+    query = input("검색어를 입력하세요: ").strip()
+    if not query:
+        print("검색어가 입력되지 않았습니다.")
+        return
+    category = input(f"카테고리 ({', '.join(CATEGORIES)}, 전체는 엔터): ").strip() or None
+    min_importance = input("최소 중요도 (1~5, 전체는 엔터): ").strip()
+    date_range = input("기간 (예: 2024-09-01~2024-09-30, 전체는 엔터): ").strip()
+    date_from, separator, date_to = [part.strip() or None for part in date_range.partition('~')]
+    if not separator:
+        date_to = date_from
+    if any(isinstance(date_ordinal(date), str) for date in (date_from, date_to) if date):
+        print("날짜 형식이 올바르지 않습니다.")
+        return
+
+    started = time.perf_counter()
+    results = search_index.search(query, category, int(min_importance) if min_importance else None, None, date_from, date_to)
+    print_search_results(results)
+    print(f"({(time.perf_counter() - started) * 1000:.1f}ms)")
 
 # 대화 기록 추가 함수
 def record_conversation(contact):
     date = input("대화를 나눈 날짜를 입력하세요 (예: 2024-09-20): ")
 
-    categories = ['일', '학업', '취미', '친목', '연애', '건강', '기타']
     conversation = {}
 
     # 카테고리별 대화 내용 및 중요도 입력
-    for category in categories:
+    for category in CATEGORIES:
         discussed = input(f"'{category}'에 대한 이야기를 나눴습니까? (y/n): ").lower()
         if discussed == 'y':
             importance = int(input(f"'{category}'에 대한 중요도를 입력하세요 (1~5): "))
@@ -134,7 +2806,7 @@ def record_conversation(contact):
                 'details': details
             }
 
-    contact.add_conversation(date, conversation)
+    commit_change('add_conversation', contact=contact.id, date=date, topics=conversation)
     print(f"대화 기록이 성공적으로 저장되었습니다!")
 
 # 대화 기록 수정 함수
@@ -162,70 +2834,248 @@ def edit_conversation():
     
     conversation_choice = int(input("수정할 대화의 번호를 선택하세요: ")) - 1
     conversation = contact.contact_history[conversation_choice]
+    changes = {}
     
     # 대화 수정
     date = input(f"기존 날짜: {conversation['date']} (수정하지 않으려면 엔터를 누르세요): ").strip()
     if date:
-        conversation['date'] = date
+        changes['date'] = date
 
+    topic_changes = {}
     for category, details in conversation['topics'].items():
         print(f"카테고리: {category}, 중요도: {details['importance']}, 내용: {details['details']}")
         new_importance = input(f"카테고리 '{category}'의 새로운 중요도를 입력하세요 (1~5) (수정하지 않으려면 엔터): ").strip()
         if new_importance:
-            conversation['topics'][category]['importance'] = int(new_importance)
+            topic_changes.setdefault(category, {})['importance'] = int(new_importance)
         
         new_details = input(f"카테고리 '{category}'의 새로운 내용을 입력하세요 (수정하지 않으려면 엔터): ").strip()
         if new_details:
-            conversation['topics'][category]['details'] = new_details
-    
-    print("대화 기록이 성공적으로 수정되었습니다!")
-
-# AI 대화 주제를 추천하는 함수
-def suggest_conversation_topic(contact):
-    global ai_enabled
+            topic_changes.setdefault(category, {})['details'] = new_details
+    if topic_changes:
+        changes['topics'] = topic_changes
 
-    # AI 기능이 비활성화되었으면 대화 주제를 추천하지 않음
-    if not ai_enabled:
-        return None  # AI 기능 비활성화 시 None 반환
+    # 수정된 항목만 저널에 기록
+    if changes:
+        commit_change('edit_conversation', contact=contact.id, index=conversation_choice, **changes)
+    print("대화 기록이 성공적으로 수정되었습니다!")
 
+# AI에 전달할 대화 주제 추천 메시지를 만드는 함수 (추정 토큰 수가 token_budget을 넘지 않도록 최근 대화를 넣음)
+def build_topic_messages(contact, token_budget=None):
+    token_budget = token_budget or TOPIC_PROMPT_TOKENS
     # None 값이 있는 경우 기본 값을 사용하거나 메시지를 생략하는 방식으로 처리
     birthday = contact.birthday if contact.birthday else "모름"
     residence = contact.residence if contact.residence else "모름"
     hobbies = contact.hobbies if contact.hobbies else "모름"
+    notes = shorten_text(contact.additional_info or "", TOPIC_DETAIL_CHARS)
 
-    # 대화 기록에서 가장 최근 대화 또는 중요도가 높은 대화들을 가져오기
-    recent_conversations = []
-    if contact.contact_history:
-        # 최근 3개의 대화를 가져오도록 설정 (필요에 따라 조정 가능)
-        recent_conversations = sorted(contact.contact_history, key=lambda x: x['date'], reverse=True)[:3]
+    system = "You are a helpful assistant that suggests conversation topics."
+    profile = f"Generate a conversation topic for {contact.name}. They were born on {birthday}, they live in {residence}, and their hobbies include {hobbies}. Additional notes: {notes}."
 
-    # 대화 기록을 프롬프트에 추가
-    conversation_summary = ""
-    for conv in recent_conversations:
-        conversation_summary += f"Date: {conv['date']}, Topics: {', '.join([f'{topic}: {details['importance']}' for topic, details in conv['topics'].items()])}. "
+    # 지금까지 나눈 주제: 중요도 합계가 큰 카테고리부터 횟수와 평균 중요도
+    topic_counts, importance_counts = aggregates.contact_topic_stats(contact)
+    topic_stats = ', '.join(
+        f"{category} {topic_counts[category]} times (avg importance {importance_counts[category] / topic_counts[category]:.1f})"
+        for category in sorted(topic_counts, key=lambda category: -importance_counts[category])
+    ) or "none"
+    content = f"{profile} Topics so far: {topic_stats}."
 
-    if not conversation_summary:
-        conversation_summary = "No recent conversations available."
+    # 최근 대화부터 토큰 예산 안에 들어가는 만큼 내용과 함께 추가 (요약에 보관된 최근 대화만 보므로 전체 기록 크기와 무관)
+    recent_header = " Recent conversations, newest first: "
+    used = estimate_tokens(system) + estimate_tokens(content) + estimate_tokens(recent_header)
+    conversation_summary = []
+    for conv in contact_summaries.recent_conversations(contact):
+        topics = '; '.join(f"{category} ({importance}): {shorten_text(details, TOPIC_DETAIL_CHARS)}" for category, importance, details in conv.topic_items())
+        line = f"[{conv['date']}] {topics}."
+        line_tokens = estimate_tokens(line)
+        if used + line_tokens > token_budget:
+            break
+        used += line_tokens
+        conversation_summary.append(line)
+    metrics.count("openai.prompt_tokens", used)
+    if conversation_summary:
+        content += recent_header + ' '.join(conversation_summary)
+    else:
+        content += " No recent conversations available."
 
     # AI에 전달할 메시지 생성
-    messages = [
-        {"role": "system", "content": "You are a helpful assistant that suggests conversation topics."},
-        {"role": "user", "content": f"Generate a conversation topic for {contact.name}. They were born on {birthday}, they live in {residence}, and their hobbies include {hobbies}. Recent conversation history: {conversation_summary}. Additional notes: {contact.additional_info}."}
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": content}
     ]
 
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=100
-        )
-        conversation_topic = response.choices[0].message['content'].strip()
-        return conversation_topic
-    except Exception as e:
-        # API 호출 실패 시 AI 기능 비활성화
-        print(f"AI 대화 주제 추천을 사용할 수 없습니다. (오류: {e})")
-        ai_enabled = False
-        return None
+# 문자열의 토큰 수를 추정하는 함수 (영문 등 ASCII는 4글자에 1토큰, 한글 등 나머지는 1글자에 1토큰으로 계산)
+def estimate_tokens(text):
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+# 긴 문자열을 length 글자로 자르는 함수
+def shorten_text(text, length):
+    return text if len(text) <= length else text[:length - 1] + "…"
+
+# 일정 간격 이상으로 API 요청을 보내지 않도록 막는 속도 제한기 (여러 스레드에서 공유)
+class RateLimiter:
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    # 다음 요청을 보낼 수 있을 때까지 기다리는 메소드
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            send_at = max(now, self.next_time)
+            self.next_time = send_at + self.interval
+        if send_at > now:
+            time.sleep(send_at - now)
+
+ai_rate_limiter = RateLimiter(AI_REQUESTS_PER_MINUTE)
+
+# 재시도해도 소용없는 오류인지 확인하는 함수 (인증 실패, 잘못된 요청 등)
+def is_fatal_ai_error(error):
+    errors = getattr(openai, 'error', None)
+    fatal_errors = tuple(
+        getattr(errors, name) for name in ('AuthenticationError', 'InvalidRequestError', 'PermissionError')
+        if hasattr(errors, name)
+    )
+    return isinstance(error, fatal_errors)
+
+# AI 요청 메시지 전체를 키로 대화 주제를 보관하는 디스크 캐시
+# (지인 정보나 대화 기록이 바뀌면 메시지가 달라지므로 자동으로 새로 요청됨)
+class TopicCache:
+    def __init__(self, path, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.path = path
+        self.conn = None
+        self.size = 0
+
+    # 처음 사용할 때 캐시 파일을 여는 메소드 (잠금을 잡은 상태에서 호출)
+    def connect(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS topic_cache (
+                key TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_topic_cache_last_used ON topic_cache(last_used);
+        """)
+        self.size = self.conn.execute("SELECT COUNT(*) FROM topic_cache").fetchone()[0]
+
+    # 모델과 메시지로 캐시 키(해시)를 만드는 메소드
+    @staticmethod
+    def make_key(model, messages):
+        payload = json.dumps({'model': model, 'messages': messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # 유효 기간 안의 주제를 찾아 반환하는 메소드 (없으면 None)
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            self.connect()
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT topic, created FROM topic_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self.conn.execute("UPDATE topic_cache SET last_used = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                # 유효 기간이 지난 항목은 삭제
+                self.conn.execute("DELETE FROM topic_cache WHERE key = ?", (key,))
+                self.size -= 1
+            self.misses += 1
+            return None
+
+    # 주제를 저장하고, 최대 개수를 넘으면 가장 오래 쓰이지 않은 항목부터 삭제하는 메소드
+    def put(self, key, topic):
+        now = time.time()
+        with self.lock:
+            self.connect()
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE topic_cache SET topic = ?, created = ?, last_used = ? WHERE key = ?", (topic, now, now, key))
+            if cursor.rowcount == 0:
+                self.conn.execute("INSERT INTO topic_cache (key, topic, created, last_used) VALUES (?, ?, ?, ?)", (key, topic, now, now))
+                self.size += 1
+            if self.size > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM topic_cache WHERE key IN (SELECT key FROM topic_cache ORDER BY last_used LIMIT ?)",
+                    (self.size - self.max_entries,)
+                )
+                self.size = self.max_entries
+
+    # 캐시 적중/미적중 횟수와 보관 개수를 반환하는 메소드
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': self.size
+        }
+
+topic_cache = TopicCache(TOPIC_CACHE_FILE, TOPIC_CACHE_TTL, TOPIC_CACHE_MAX_ENTRIES)
+metrics.sources['topic_cache'] = topic_cache.stats
+
+# 메시지 하나로 AI에 대화 주제를 요청하는 함수 (실패 시 지수 백오프로 재시도, 끝내 실패하면 None)
+@metrics.timed("openai.request")
+def request_topic(messages):
+    delay = AI_RETRY_BASE_DELAY
+    for attempt in range(AI_MAX_RETRIES + 1):
+        ai_rate_limiter.wait()
+        metrics.count("openai.attempts")
+        try:
+            response = openai.ChatCompletion.create(
+                model=AI_MODEL,
+                messages=messages,
+                max_tokens=100
+            )
+            return response.choices[0].message['content'].strip()
+        except Exception as e:
+            metrics.count("openai.errors")
+            if attempt == AI_MAX_RETRIES or is_fatal_ai_error(e):
+                # 이 요청만 실패로 처리하고, 이후 요청에서는 다시 AI를 사용
+                print(f"AI 대화 주제 추천을 사용할 수 없습니다. (오류: {e})")
+                return None
+            time.sleep(delay + random.uniform(0, delay))
+            delay *= 2
+
+# 캐시에 같은 요청의 주제가 있으면 그대로 쓰고, 없을 때만 AI에 요청하는 함수
+def fetch_topic(messages):
+    key = TopicCache.make_key(AI_MODEL, messages)
+    topic = topic_cache.get(key)
+    if topic is None:
+        topic = request_topic(messages)
+        if topic:
+            topic_cache.put(key, topic)
+    return topic
+
+# AI 대화 주제를 추천하는 함수
+def suggest_conversation_topic(contact):
+    # AI 기능이 비활성화되었거나 openai가 설치되어 있지 않으면 대화 주제를 추천하지 않음
+    if not ai_enabled or load_openai() is None:
+        return None  # AI 기능 비활성화 시 None 반환
+
+    return fetch_topic(build_topic_messages(contact))
+
+# 여러 지인의 대화 주제를 동시에 요청하고, 끝나는 순서대로 (지인, 주제)를 돌려주는 함수
+def suggest_conversation_topics(contact_list, max_workers=None):
+    if not ai_enabled or load_openai() is None:
+        for contact in contact_list:
+            yield contact, None
+        return
+
+    # 대화 기록 접근은 메인 스레드에서 끝내고, 작업 스레드는 API 호출만 수행
+    prompts = [(contact, build_topic_messages(contact)) for contact in contact_list]
+    with ThreadPoolExecutor(max_workers=max_workers or AI_MAX_CONCURRENCY) as executor:
+        futures = {executor.submit(fetch_topic, messages): contact for contact, messages in prompts}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
 # 지인에게 연락할 때 대화 주제 추천을 포함하는 함수
 def check_contact_due_with_topic(contact):
@@ -233,47 +3083,396 @@ def check_contact_due_with_topic(contact):
         print(f"{contact.name}에게는 아직 연락한 기록이 없습니다.")
         return
 
-    # 현재 날짜와 최근 연락 날짜의 차이 계산
-    days_since_last_contact = (datetime.now() - contact.last_contact_date).days
-    contact_interval = contact.group.contact_interval
-    tolerance = contact.group.tolerance
+    # 현재 날짜와 최근 연락 날짜의 차이 계산
+    days_since_last_contact = (datetime.now() - contact.last_contact_date).days
+    contact_interval = contact.group.contact_interval
+    tolerance = contact.group.tolerance
+
+    # 연락 주기와 오차 범위에 따른 알림 조건
+    if contact_interval - tolerance <= days_since_last_contact <= contact_interval + tolerance:
+        print(f"{contact.name}에게 연락할 때가 되었습니다! 마지막 연락으로부터 {days_since_last_contact}일 지났습니다.")
+        
+        # AI 대화 주제 추천
+        if ai_enabled:
+            topic = suggest_conversation_topic(contact)
+            if topic:
+                print(f"추천 대화 주제: {topic}")
+            else:
+                print("대화 주제 추천을 사용할 수 없습니다.")
+        else:
+            # AI 기능 비활성화 시 대화 주제 없이 단순 알림
+            print("대화 주제 추천 기능이 비활성화되었습니다.")
+    else:
+        print(f"{contact.name}은 아직 연락할 시간이 되지 않았습니다. 현재 {days_since_last_contact}일 지났습니다.")
+
+# 지인의 연락 가능 기간 [시작, 끝)을 계산하는 함수
+# (경과 일수가 연락 주기 ± 오차 범위 안에 드는 시각의 범위)
+def due_window(contact):
+    start = contact.last_contact_date + timedelta(days=contact.group.contact_interval - contact.group.tolerance)
+    end = contact.last_contact_date + timedelta(days=contact.group.contact_interval + contact.group.tolerance + 1)
+    return start, end
+
+# 연락 가능 기간의 시작/끝을 기준으로 지인을 최소 힙에 보관하는 스케줄러
+# (지인 정보가 바뀌면 버전을 올리고 새 항목을 넣으며, 예전 항목은 꺼낼 때 버림)
+class DueScheduler:
+    def __init__(self):
+        self.listeners = []  # 지인의 기간을 다시 계산할 때마다 지인 번호로 호출할 함수 (연락 알림 데몬)
+        self.reset()
+
+    # 모든 항목을 비우는 메소드
+    def reset(self):
+        self.pending = []  # (기간 시작, 지인 번호, 버전): 아직 기간이 열리지 않은 지인
+        self.open = []  # (기간 끝, 지인 번호, 버전): 지금 연락할 때인 지인
+        self.open_ids = {}  # 지금 연락할 때인 지인 번호 -> 기간 끝
+        self.overdue_ids = {}  # 기간이 지난 지인 번호 -> 기간 끝
+        self.versions = {}  # 지인 번호 -> 현재 버전
+        self.windows = {}  # 지인 번호 -> (기간 시작, 기간 끝)
+        self.group_members = {}  # 그룹 번호 -> 지인 번호 집합
+        self.contact_groups = {}  # 지인 번호 -> 그룹 번호
+        self.unscheduled = set()  # 연락 기록이 없어 일정이 없는 지인 번호
+        self.now = None  # 마지막으로 시간을 진행시킨 시각
+
+    # 전체 지인으로 스케줄러를 다시 만드는 메소드
+    def rebuild(self, contacts):
+        self.reset()
+        for contact in contacts:
+            self.update(contact)
+        metrics.count("due.contacts_scheduled", len(contacts))
+
+    # 지인 한 명의 연락 가능 기간을 다시 계산하여 넣는 메소드
+    def update(self, contact):
+        version = self.versions.get(contact.id, 0) + 1
+        self.versions[contact.id] = version
+        self.open_ids.pop(contact.id, None)
+        self.overdue_ids.pop(contact.id, None)
+        if contact.id in self.contact_groups:
+            self.group_members[self.contact_groups[contact.id]].discard(contact.id)
+        self.contact_groups[contact.id] = contact.group.id
+        self.group_members.setdefault(contact.group.id, set()).add(contact.id)
+
+        if contact.last_contact_date is None:
+            self.windows.pop(contact.id, None)
+            self.unscheduled.add(contact.id)
+        else:
+            self.unscheduled.discard(contact.id)
+            start, end = due_window(contact)
+            self.windows[contact.id] = (start, end)
+            if self.now is None or start > self.now:
+                heapq.heappush(self.pending, (start, contact.id, version))
+            elif end > self.now:
+                self.open_ids[contact.id] = end
+                heapq.heappush(self.open, (end, contact.id, version))
+            else:
+                self.overdue_ids[contact.id] = end
+        for listener in self.listeners:
+            listener(contact.id)
+
+    # 그룹의 연락 주기가 바뀌었을 때 해당 그룹의 지인만 다시 계산하는 메소드
+    def update_group(self, group):
+        for contact_id in list(self.group_members.get(group.id, ())):
+            self.update(contacts[contact_id])
+
+    # 현재 시각까지 기간이 열리거나 지난 항목을 옮기는 메소드
+    def advance(self, now):
+        if self.now is not None and now < self.now:
+            # 시간이 거꾸로 가면 처음부터 다시 계산
+            self.rebuild(contacts)
+        self.now = now
+
+        popped = 0
+        while self.pending and self.pending[0][0] <= now:
+            start, contact_id, version = heapq.heappop(self.pending)
+            popped += 1
+            if self.versions.get(contact_id) != version:
+                continue
+            end = self.windows[contact_id][1]
+            if end > now:
+                self.open_ids[contact_id] = end
+                heapq.heappush(self.open, (end, contact_id, version))
+            else:
+                self.overdue_ids[contact_id] = end
+
+        while self.open and self.open[0][0] <= now:
+            end, contact_id, version = heapq.heappop(self.open)
+            popped += 1
+            if self.versions.get(contact_id) != version:
+                continue
+            del self.open_ids[contact_id]
+            self.overdue_ids[contact_id] = end
+        if popped:
+            metrics.count("due.heap_entries_popped", popped)
+
+    # 지금 연락할 때인 지인 목록 (기간이 먼저 끝나는 순)
+    def due_now(self, now=None):
+        self.advance(now or datetime.now())
+        return [contacts[contact_id] for contact_id, end in sorted(self.open_ids.items(), key=lambda item: item[1])]
+
+    # 연락 가능 기간이 지나버린 지인 목록 (오래 지난 순)
+    def overdue(self, now=None):
+        self.advance(now or datetime.now())
+        return [contacts[contact_id] for contact_id, end in sorted(self.overdue_ids.items(), key=lambda item: item[1])]
+
+    # 앞으로 days일 안에 연락 가능 기간이 열리는 지인 목록 (열리는 순)
+    # 힙에서 기준 시각 이하인 노드만 따라 내려가므로 결과 수에 비례하는 시간만 걸림
+    def due_within(self, days, now=None):
+        now = now or datetime.now()
+        self.advance(now)
+        limit = now + timedelta(days=days)
+        found = []
+        visited = 0
+        stack = [0] if self.pending else []
+        while stack:
+            idx = stack.pop()
+            visited += 1
+            start, contact_id, version = self.pending[idx]
+            if start > limit:
+                continue
+            if self.versions.get(contact_id) == version:
+                found.append((start, contact_id))
+            for child in (2 * idx + 1, 2 * idx + 2):
+                if child < len(self.pending):
+                    stack.append(child)
+        metrics.count("due.heap_entries_visited", visited)
+        return [contacts[contact_id] for start, contact_id in sorted(found)]
+
+# 연락 주기 스케줄러
+scheduler = ContextProxy('scheduler')
+
+# 다가오는 연락 예정을 미리 보여줄 기간 (일 기준)
+DUE_LOOKAHEAD_DAYS = 7
+
+# 생일 문자열에서 월/일을 읽는 정규식 (예: 1990-01-01, 1990.1.1, 1990/01/01, 01-01, 1990년 1월 1일, 1월 1일, 19900101)
+BIRTHDAY_PATTERNS = (
+    re.compile(r'^(?:\d{4}\s*[-./]\s*)?(\d{1,2})\s*[-./]\s*(\d{1,2})\.?$'),
+    re.compile(r'^(?:\d{4}\s*년\s*)?(\d{1,2})\s*월\s*(\d{1,2})\s*일$'),
+    re.compile(r'^\d{4}(\d{2})(\d{2})$'),
+)
+
+# 생일 문자열을 (월, 일)로 바꾸는 함수 (읽을 수 없거나 없는 날짜이면 None)
+def parse_birthday(text):
+    if not text:
+        return None
+    text = text.strip()
+    for pattern in BIRTHDAY_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            month, day = int(match.group(1)), int(match.group(2))
+            try:
+                # 2000년은 윤년이므로 2월 29일도 올바른 생일로 인정
+                datetime(2000, month, day)
+            except ValueError:
+                return None
+            return month, day
+    return None
+
+# 월/일을 윤년 기준 1월 1일부터의 번호(0~365)로 바꾸는 함수
+def birthday_day_of_year(month, day):
+    return datetime(2000, month, day).timetuple().tm_yday - 1
+
+# 생일을 윤년 기준 날짜 번호(0~365) 366칸에 나누어 담아 두는 색인
+# 생일 문자열은 지인을 추가/수정할 때 한 번만 읽어 두고, "앞으로 N일 안의 생일"은 N칸만 확인하므로 N + 결과 수에 비례하는 시간만 걸림
+class BirthdayIndex:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buckets = [set() for _ in range(366)]  # 날짜 번호 -> 지인 번호 집합
+        self.birthdays = {}  # 지인 번호 -> (월, 일)
+
+    # 지인의 생일을 다시 읽어 색인에 반영하는 메소드
+    def update(self, contact):
+        previous = self.birthdays.pop(contact.id, None)
+        if previous:
+            self.buckets[birthday_day_of_year(*previous)].discard(contact.id)
+        birthday = parse_birthday(contact.birthday)
+        if birthday:
+            self.birthdays[contact.id] = birthday
+            self.buckets[birthday_day_of_year(*birthday)].add(contact.id)
+
+    # 오늘부터 days일 안에 생일인 지인 목록 [(지인, 생일 날짜, 남은 일수)] (가까운 순)
+    # 윤년이 아닌 해에는 2월 29일생의 생일을 2월 28일로 봄
+    def upcoming(self, days, today=None):
+        today = (today or datetime.now()).date()
+        found = []
+        for offset in range(min(days, 365) + 1):
+            date = today + timedelta(days=offset)
+            bucket_ids = self.buckets[birthday_day_of_year(date.month, date.day)]
+            if date.month == 2 and date.day == 28 and not is_leap_year(date.year):
+                bucket_ids = bucket_ids | self.buckets[birthday_day_of_year(2, 29)]
+            for contact_id in sorted(bucket_ids):
+                found.append((contacts[contact_id], date, offset))
+        metrics.count("birthday.days_checked", min(days, 365) + 1)
+        return found
+
+def is_leap_year(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+# 생일 색인
+birthday_index = ContextProxy('birthday_index')
+
+# 다가오는 생일을 미리 보여줄 기간 (일 기준)
+BIRTHDAY_LOOKAHEAD_DAYS = int(os.environ.get("CONNECTUTOR_BIRTHDAY_DAYS", "14"))
+
+# 날짜와 시각을 마이크로초 단위 정수로 바꾸는 함수 (작업 프로세스 결과를 배열로 주고받기 위해 사용)
+def datetime_micros(value):
+    return (value - datetime.min) // timedelta(microseconds=1)
+
+# 지인 일부(shard)의 연락 주기를 확인하는 함수 (작업 프로세스에서 실행)
+# group_ids가 None이면 지인 번호를 shard_count로 나눈 나머지가 shard인 지인을, 아니면 해당 그룹들의 지인을 확인
+# 지인 목록은 부모 프로세스에서 물려받은 것을 그대로 쓰고, 결과는 due_window와 같은 기간을 마이크로초 정수로 계산하여
+# 지금 연락할 지인(기간 끝 순), 기간이 지난 지인(기간 끝 순), 곧 연락할 지인(기간 시작 순)마다 (정렬 기준 배열, 지인 번호 배열)로 돌려줌
+# 반환: (지금 연락할 지인, 기간이 지난 지인, 곧 연락할 지인, 연락 기록 없는 지인 수)
+def check_due_shard(shard, shard_count, group_ids, now, lookahead_days):
+    if group_ids is None:
+        members = contacts[shard::shard_count]
+    else:
+        members = [contact for group_id in group_ids for contact in data_index.contacts_in_group(groups[group_id])]
+
+    day = 24 * 60 * 60 * 1000000
+    now_micros = datetime_micros(now)
+    limit = now_micros + lookahead_days * day
+    due, overdue, soon = [], [], []
+    never_contacted = 0
+    for contact in members:
+        if contact.last_contact_date is None:
+            never_contacted += 1
+            continue
+        last = datetime_micros(contact.last_contact_date)
+        group = contact.group
+        start = last + (group.contact_interval - group.tolerance) * day
+        end = last + (group.contact_interval + group.tolerance + 1) * day
+        if end <= now_micros:
+            overdue.append((end, contact.id))
+        elif start <= now_micros:
+            due.append((end, contact.id))
+        elif start <= limit:
+            soon.append((start, contact.id))
+
+    results = []
+    for entries in (due, overdue, soon):
+        entries.sort()
+        results.append((array.array('q', [key for key, _ in entries]), array.array('i', [contact_id for _, contact_id in entries])))
+    return results[0], results[1], results[2], never_contacted
+
+# 그룹을 지인 수가 비슷하도록 shard_count개로 나누는 함수 (큰 그룹부터 지인이 가장 적은 묶음에 배정)
+def partition_groups(shard_count):
+    shards = [[] for _ in range(shard_count)]
+    sizes = [(0, shard) for shard in range(shard_count)]
+    for group in sorted(groups, key=lambda group: -len(data_index.group_contacts.get(group.id, ()))):
+        size, shard = heapq.heappop(sizes)
+        shards[shard].append(group.id)
+        heapq.heappush(sizes, (size + len(data_index.group_contacts.get(group.id, ())), shard))
+    return shards
+
+# fork를 쓸 수 있으면 작업 프로세스가 메모리의 지인 목록을 복사하지 않고 물려받음
+def due_pool_context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+# 작업 프로세스에서 부모 프로세스와 같은 사용자의 데이터를 현재 사용자로 설정하는 함수
+# (fork로 시작되었으면 물려받은 데이터를 그대로 쓰고, 아니면 저장소에서 직접 불러옴)
+def init_due_worker(tenant):
+    if tenant is not None:
+        current_context.set(tenant_pool.acquire(tenant))
+    elif not contacts:
+        load_data(quiet=True, schedule=False)
+
+# 지인을 여러 프로세스에 나누어 연락 주기를 확인하고 결과를 하나로 합치는 함수 (partition: "hash" 또는 "group")
+# 반환: (지금 연락할 지인, 기간이 지난 지인, 곧 연락할 지인, 연락 기록 없는 지인 수), 정렬 순서는 스케줄러와 같음
+@metrics.timed("due_check.sharded")
+def sharded_due_check(now, workers=None, partition="hash", lookahead_days=DUE_LOOKAHEAD_DAYS):
+    workers = workers or DUE_WORKERS
+    if partition == "group":
+        tasks = [(shard, workers, group_ids) for shard, group_ids in enumerate(partition_groups(workers))]
+    else:
+        tasks = [(shard, workers, None) for shard in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=due_pool_context(),
+                             initializer=init_due_worker, initargs=(active_context().tenant,)) as pool:
+        futures = [pool.submit(check_due_shard, shard, shard_count, group_ids, now, lookahead_days) for shard, shard_count, group_ids in tasks]
+        results = [future.result() for future in futures]
+    metrics.count("due.contacts_scanned", len(contacts))
+
+    # 작업 프로세스마다 정렬된 결과를 순서대로 합침
+    due, overdue, soon = [
+        [contacts[contact_id] for _, contact_id in heapq.merge(*(zip(*result[kind]) for result in results))]
+        for kind in range(3)
+    ]
+    return due, overdue, soon, sum(result[3] for result in results)
+
+# 모든 지인에 대해 연락 주기를 체크하는 함수 (스케줄러에서 해당하는 지인만 꺼내 확인)
+# workers를 지정하면 지인을 여러 프로세스에 나누어 확인 (partition: "hash" 또는 "group")
+@metrics.timed("due_check")
+def check_all_contacts_due(workers=None, partition="hash"):
+    if not contacts:
+        print("등록된 지인이 없습니다.")
+        return
+
+    now = datetime.now()
+    if workers:
+        started = time.perf_counter()
+        due_contacts, overdue_contacts, upcoming_contacts, never_contacted = sharded_due_check(now, workers, partition)
+        print(f"지인 {len(contacts)}명을 프로세스 {workers}개로 나누어 확인했습니다. ({time.perf_counter() - started:.2f}초)")
+    else:
+        due_contacts = scheduler.due_now(now)
+        overdue_contacts = scheduler.overdue(now)
+        upcoming_contacts = scheduler.due_within(DUE_LOOKAHEAD_DAYS, now)
+        never_contacted = len(scheduler.unscheduled)
 
-    # 연락 주기와 오차 범위에 따른 알림 조건
-    if contact_interval - tolerance <= days_since_last_contact <= contact_interval + tolerance:
-        print(f"{contact.name}에게 연락할 때가 되었습니다! 마지막 연락으로부터 {days_since_last_contact}일 지났습니다.")
-        
-        # AI 대화 주제 추천
+    for contact in due_contacts:
+        print(f"{contact.name}에게 연락할 때가 되었습니다! 마지막 연락으로부터 {(now - contact.last_contact_date).days}일 지났습니다.")
+    if not due_contacts:
+        print("지금 연락할 때가 된 지인이 없습니다.")
+
+    # 연락할 지인을 모두 모은 뒤 대화 주제를 한꺼번에 요청하고, 끝나는 대로 출력
+    if due_contacts:
         if ai_enabled:
-            topic = suggest_conversation_topic(contact)
-            if topic:
-                print(f"추천 대화 주제: {topic}")
-            else:
-                print("대화 주제 추천을 사용할 수 없습니다.")
+            for contact, topic in suggest_conversation_topics(due_contacts):
+                if topic:
+                    print(f"추천 대화 주제 ({contact.name}): {topic}")
+                else:
+                    print(f"{contact.name}: 대화 주제 추천을 사용할 수 없습니다.")
+            cache_stats = topic_cache.stats()
+            print(f"대화 주제 캐시: 적중 {cache_stats['hits']}회, 미적중 {cache_stats['misses']}회")
         else:
             # AI 기능 비활성화 시 대화 주제 없이 단순 알림
             print("대화 주제 추천 기능이 비활성화되었습니다.")
-    else:
-        print(f"{contact.name}은 아직 연락할 시간이 되지 않았습니다. 현재 {days_since_last_contact}일 지났습니다.")
 
-# 모든 지인에 대해 연락 주기를 체크하는 함수
-def check_all_contacts_due():
-    if not contacts:
-        print("등록된 지인이 없습니다.")
-        return
-    for contact in contacts:
-        check_contact_due_with_topic(contact)
+    if overdue_contacts:
+        print("\n연락 주기가 지난 지인:")
+        for contact in overdue_contacts:
+            print(f"- {contact.name}: 마지막 연락으로부터 {(now - contact.last_contact_date).days}일 지났습니다.")
+
+    if upcoming_contacts:
+        print(f"\n{DUE_LOOKAHEAD_DAYS}일 안에 연락할 때가 되는 지인:")
+        for contact in upcoming_contacts:
+            print(f"- {contact.name}: {due_window(contact)[0].strftime('%Y-%m-%d')}부터")
+
+    if never_contacted:
+        print(f"\n아직 연락한 기록이 없는 지인: {never_contacted}명")
+
+    birthdays = birthday_index.upcoming(BIRTHDAY_LOOKAHEAD_DAYS, now)
+    if birthdays:
+        print(f"\n{BIRTHDAY_LOOKAHEAD_DAYS}일 안에 생일인 지인:")
+        for contact, date, days_left in birthdays:
+            print(f"- {contact.name}: {date.month}월 {date.day}일 ({'오늘' if days_left == 0 else f'{days_left}일 후'})")
 
 # 대화 기록을 날짜별로 조회하는 함수
 def view_conversations_by_date():
-    search_date = input("확인하고 싶은 날짜를 입력하세요 (예: 2024-09-20): ")
+    search_date = input("확인하고 싶은 날짜를 입력하세요 (예: 2024-09-20, 기간은 2024-09-01~2024-09-30): ").strip()
+    if '~' in search_date:
+        start, end = [part.strip() for part in search_date.split('~', 1)]
+        records = store.conversations_between(start, end)
+    else:
+        records = store.conversations_by_date(search_date)
+
     found = False
-    for contact in contacts:
-        for record in contact.contact_history:
-            if record['date'] == search_date:
-                print(f"\n[{contact.name}]와의 대화 기록 ({search_date}):")
-                for category, details in record['topics'].items():
-                    print(f"- {category}: 중요도 {details['importance']}, 내용: {details['details']}")
-                found = True
+    for contact, record in records:
+        print(f"\n[{contact.name}]와의 대화 기록 ({record['date']}):")
+        for category, details in record['topics'].items():
+            print(f"- {category}: 중요도 {details['importance']}, 내용: {details['details']}")
+        found = True
     if not found:
         print("해당 날짜에 대한 기록이 없습니다.")
 
@@ -313,13 +3512,14 @@ def update_contact_date():
     # 새로운 날짜 입력
     new_date = input(f"{contact.name}의 새로운 최근 연락 날짜를 입력하세요 (예: 2024-09-20): ")
     try:
-        contact.last_contact_date = datetime.strptime(new_date, "%Y-%m-%d")
+        last_contact_date = datetime.strptime(new_date, "%Y-%m-%d")
+        commit_change('update_last_contact_date', contact=contact.id, last_contact_date=last_contact_date.strftime(DATETIME_FORMAT))
         print(f"{contact.name}의 최근 연락 날짜가 {new_date}로 업데이트되었습니다.")
     except ValueError:
         print("잘못된 날짜 형식입니다. YYYY-MM-DD 형식으로 입력하세요.")
 
 # 그룹 리스트
-groups = []
+groups = ContextProxy('groups')
 
 # 그룹을 추가하는 함수 (에러 처리 포함)
 def add_group():
@@ -334,11 +3534,8 @@ def add_group():
         except ValueError:
             print("잘못된 입력입니다. 숫자를 입력하세요.")
 
-    # 새로운 그룹 객체 생성
-    group = Group(group_name, contact_interval, tolerance)
-    
-    # 그룹 리스트에 추가
-    groups.append(group)
+    # 새로운 그룹을 생성하여 그룹 리스트에 추가
+    commit_change('add_group', name=group_name, contact_interval=contact_interval, tolerance=tolerance)
     print(f"{group_name} 그룹이 성공적으로 추가되었습니다!")
 
 # 그룹 정보를 수정하는 함수
@@ -367,23 +3564,26 @@ def edit_group():
     new_contact_interval = input(f"연락 주기를 수정하세요 (현재: {group.contact_interval}) [비워두면 수정하지 않음]: ").strip()
     new_tolerance = input(f"오차 범위를 수정하세요 (현재: {group.tolerance}) [비워두면 수정하지 않음]: ").strip()
 
+    changes = {}
     if new_name:
-        group.name = new_name
+        changes['name'] = new_name
     if new_contact_interval:
         try:
-            group.contact_interval = int(new_contact_interval)
+            changes['contact_interval'] = int(new_contact_interval)
         except ValueError:
             print("연락 주기는 숫자여야 합니다.")
     if new_tolerance:
         try:
-            group.tolerance = int(new_tolerance)
+            changes['tolerance'] = int(new_tolerance)
         except ValueError:
             print("오차 범위는 숫자여야 합니다.")
-    
+
+    if changes:
+        commit_change('edit_group', group=group.id, **changes)
     print(f"{group.name} 그룹 정보가 수정되었습니다!")
 
 # 지인 리스트
-contacts = []
+contacts = ContextProxy('contacts')
 
 # 지인 정보를 입력하는 함수 (에러 처리 포함, 공란 허용)
 def add_contact():
@@ -431,14 +3631,13 @@ def add_contact():
     if not hobbies:
         hobbies = None
 
-    # 지인 생성
-    contact = Contact(name, group, birthday, gender, residence, hobbies)
-
     additional_info = input("지인에 대한 추가 정보를 입력하세요 (메모) (비워둘 수 있습니다): ").strip()
-    contact.add_additional_info(additional_info)
 
-    # 지인 리스트에 추가
-    contacts.append(contact)
+    # 지인 생성 후 지인 리스트에 추가
+    commit_change(
+        'add_contact', name=name, group=group.id, birthday=birthday, gender=gender,
+        residence=residence, hobbies=hobbies, additional_info=additional_info
+    )
     print(f"{name}이(가) 성공적으로 추가되었습니다!")
 
 # 지인 정보를 수정하는 함수
@@ -470,20 +3669,23 @@ def edit_contact():
     new_hobbies = input(f"취미를 수정하세요 (현재: {contact.hobbies}) [비워두면 수정하지 않음]: ").strip()
     new_additional_info = input(f"추가 정보를 수정하세요 (현재: {contact.additional_info}) [비워두면 수정하지 않음]: ").strip()
 
-    # 정보 업데이트
+    # 정보 업데이트 (입력된 항목만)
+    changes = {}
     if new_name:
-        contact.name = new_name
+        changes['name'] = new_name
     if new_birthday:
-        contact.birthday = new_birthday
+        changes['birthday'] = new_birthday
     if new_gender:
-        contact.gender = new_gender
+        changes['gender'] = new_gender
     if new_residence:
-        contact.residence = new_residence
+        changes['residence'] = new_residence
     if new_hobbies:
-        contact.hobbies = new_hobbies
+        changes['hobbies'] = new_hobbies
     if new_additional_info:
-        contact.add_additional_info(new_additional_info)
-    
+        changes['additional_info'] = new_additional_info
+
+    if changes:
+        commit_change('edit_contact', contact=contact.id, **changes)
     print(f"{contact.name}의 정보가 수정되었습니다!")
 
 # 모든 지인 정보를 출력하는 함수
@@ -504,16 +3706,83 @@ def display_contacts():
 # 대시보드 시각화 기능 추가
 # -----------------------
 
+# 막대 그래프 하나를 현재 figure에 그리는 함수 (spec: title, xlabel, ylabel, labels, values, color)
+def draw_chart(plt, spec):
+    plt.bar(spec['labels'], spec['values'], color=spec['color'])
+    plt.title(spec['title'])
+    if spec.get('xlabel'):
+        plt.xlabel(spec['xlabel'])
+    plt.ylabel(spec['ylabel'])
+
+# 작업 프로세스에서 그래프를 Agg 백엔드로 그려 파일로 저장하는 함수
+def render_chart_file(spec, path, file_format):
+    plt = load_pyplot("Agg")
+    figure = plt.figure()
+    try:
+        draw_chart(plt, spec)
+        temp_path = path + ".tmp"
+        figure.savefig(temp_path, format=file_format)
+        os.replace(temp_path, path)
+    finally:
+        plt.close(figure)
+    return path
+
+# 그래프를 그리는 작업 프로세스 풀 (처음 사용할 때 생성)
+chart_pool = None
+
+def get_chart_pool(workers=None):
+    global chart_pool
+    if chart_pool is None:
+        chart_pool = ProcessPoolExecutor(max_workers=workers or CHART_WORKERS)
+    return chart_pool
+
+# 그래프 파일 경로 (데이터가 같으면 같은 경로가 되도록 그래프 내용의 해시를 이름에 넣음)
+def chart_path(name, spec, file_format):
+    stamp = hashlib.sha1(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CHART_DIR, f"{name}-{stamp}.{file_format}")
+
+# 그래프를 파일로 그리도록 작업 프로세스에 맡기는 함수 (같은 데이터로 이미 그린 파일이 있으면 그대로 사용)
+# (경로, Future)를 반환하며, 캐시된 파일이면 Future는 None
+def render_chart(name, spec, file_format=None, pool=None):
+    file_format = file_format or CHART_FORMAT
+    path = chart_path(name, spec, file_format)
+    if os.path.exists(path):
+        metrics.count("chart_cache.hits")
+        return path, None
+    metrics.count("chart_cache.misses")
+
+    # 같은 그래프의 예전 버전 파일은 정리
+    os.makedirs(CHART_DIR, exist_ok=True)
+    prefix = f"{name}-"
+    for filename in os.listdir(CHART_DIR):
+        if filename.startswith(prefix) and filename.endswith(f".{file_format}") and len(filename) == len(prefix) + 16 + len(file_format) + 1:
+            os.remove(os.path.join(CHART_DIR, filename))
+    return path, (pool or get_chart_pool()).submit(render_chart_file, spec, path, file_format)
+
+# 그래프를 설정에 따라 화면에 띄우거나(show) 파일로 그리는 함수(file)
+# (파일 모드에서는 작업 프로세스가 그리는 동안 메뉴를 바로 이어서 사용할 수 있음)
+@metrics.timed("chart.show")
+def show_chart(name, spec):
+    if not matplotlib_installed():
+        print("matplotlib이 설치되어 있지 않아 그래프를 그릴 수 없습니다. (pip install matplotlib)")
+        return
+    if CHART_MODE != "file":
+        plt = load_pyplot()
+        draw_chart(plt, spec)
+        plt.show()
+        return
+
+    path, future = render_chart(name, spec)
+    if future is None:
+        print(f"변경된 데이터가 없어 저장된 그래프를 사용합니다: {path}")
+        return
+    print(f"그래프를 그리는 중입니다: {path}")
+    future.add_done_callback(lambda done: done.exception() and print(f"그래프를 그리는 중 오류 발생: {done.exception()}"))
+
 # 1. 전체적으로 어떤 카테고리의 대화가 중요도가 높았는지 분석
+@metrics.timed("dashboard.category_importance")
 def visualize_category_importance():
-    category_importance = {}
-    for contact in contacts:
-        for record in contact.contact_history:
-            for category, details in record['topics'].items():
-                if category not in category_importance:
-                    category_importance[category] = details['importance']
-                else:
-                    category_importance[category] += details['importance']
+    category_importance = analytics.category_importance()
     
     # 데이터가 없는 경우 처리
     if not category_importance:
@@ -521,70 +3790,50 @@ def visualize_category_importance():
         return
 
     # 데이터가 있는 경우 그래프 생성
-    categories = list(category_importance.keys())
-    importance_values = list(category_importance.values())
-    plt.bar(categories, importance_values, color='lightblue')
-    plt.title("카테고리별 대화 중요도")
-    plt.xlabel("카테고리")
-    plt.ylabel("중요도 합계")
-    plt.show()
+    show_chart("category-importance", {
+        'title': "카테고리별 대화 중요도", 'xlabel': "카테고리", 'ylabel': "중요도 합계",
+        'labels': list(category_importance.keys()), 'values': list(category_importance.values()), 'color': 'lightblue'
+    })
 
-# 2. 지인별 대화 주제 빈도 및 중요도 시각화
-def visualize_contact_conversations(contact):
-    topic_counts = {}
-    importance_counts = {}
+    # 중요도 합계가 큰 지인 목록
+    print("대화 중요도 합계 상위 지인:")
+    for rank, (contact, total) in enumerate(analytics.top_contacts(5), start=1):
+        print(f"{rank}. {contact.name}: {total}")
 
-    for record in contact.contact_history:
-        for category, details in record['topics'].items():
-            # 카테고리별 대화 빈도 계산
-            if category not in topic_counts:
-                topic_counts[category] = 1
-            else:
-                topic_counts[category] += 1
+# 지인별 대화 주제 빈도 및 중요도 그래프 목록 [(이름, spec)]
+def contact_conversation_charts(contact):
+    # 카테고리별 대화 빈도 및 중요도 합계 계산
+    topic_counts, importance_counts = analytics.contact_topic_stats(contact)
+    charts = []
+    if topic_counts:
+        charts.append((f"contact-{contact.id}-topics", {
+            'title': f"{contact.name}과(와)의 대화 카테고리 빈도", 'xlabel': '카테고리', 'ylabel': '대화 빈도',
+            'labels': list(topic_counts.keys()), 'values': list(topic_counts.values()), 'color': 'lightgreen'
+        }))
+    if importance_counts:
+        charts.append((f"contact-{contact.id}-importance", {
+            'title': f"{contact.name}과(와)의 대화 중요도", 'xlabel': '카테고리', 'ylabel': '중요도 합계',
+            'labels': list(importance_counts.keys()), 'values': list(importance_counts.values()), 'color': 'salmon'
+        }))
+    return charts
 
-            # 카테고리별 중요도 합계 계산
-            if category not in importance_counts:
-                importance_counts[category] = details['importance']
-            else:
-                importance_counts[category] += details['importance']
+# 2. 지인별 대화 주제 빈도 및 중요도 시각화
+@metrics.timed("dashboard.contact_conversations")
+def visualize_contact_conversations(contact):
+    charts = contact_conversation_charts(contact)
 
     # 데이터가 없는 경우 처리
-    if not topic_counts:
+    if not charts:
         print(f"{contact.name}과의 기록된 대화가 없습니다. 시각화할 데이터가 없습니다.")
         return
 
-    # 대화 빈도 그래프
-    categories = list(topic_counts.keys())
-    counts = list(topic_counts.values())
-    plt.bar(categories, counts, color='lightgreen')
-    plt.title(f"{contact.name}과(와)의 대화 카테고리 빈도")
-    plt.xlabel('카테고리')
-    plt.ylabel('대화 빈도')
-    plt.show()
-
-    # 중요도 그래프
-    if not importance_counts:
-        print(f"{contact.name}과의 중요한 대화가 없습니다. 중요도 데이터를 시각화할 수 없습니다.")
-        return
-
-    categories = list(importance_counts.keys())
-    importance_values = list(importance_counts.values())
-    plt.bar(categories, importance_values, color='salmon')
-    plt.title(f"{contact.name}과(와)의 대화 중요도")
-    plt.xlabel('카테고리')
-    plt.ylabel('중요도 합계')
-    plt.show()
+    for name, spec in charts:
+        show_chart(name, spec)
 
 # 3. 중요도가 높은 대화 주제 시각화
+@metrics.timed("dashboard.important_conversations")
 def visualize_important_conversations(contact):
-    important_conversations = {}
-    for record in contact.contact_history:
-        for category, details in record['topics'].items():
-            if details['importance'] >= 4:  # 중요도가 4 이상인 대화 주제
-                if category not in important_conversations:
-                    important_conversations[category] = [details['details']]
-                else:
-                    important_conversations[category].append(details['details'])
+    important_conversations = analytics.important_topics(contact, 4)  # 중요도가 4 이상인 대화 주제
 
     # 중요도가 높은 대화 주제를 출력
     if important_conversations:
@@ -593,15 +3842,18 @@ def visualize_important_conversations(contact):
     else:
         print(f"{contact.name}과의 중요한 대화 내용이 없습니다.")
 
+# 날짜별 연락 내역을 (구간, {구간 이름: 대화 수})로 반환 (기간을 지정하지 않으면 막대가 너무 많지 않도록 일/주/월 중에서 선택)
+def contact_history_counts(period=None):
+    for period in ([period] if period else list(HISTORY_PERIODS)):
+        contact_dates = analytics.conversations_by_period(period)
+        if len(contact_dates) <= VISUALIZE_MAX_BARS:
+            break
+    return period, contact_dates
+
 # 4. 날짜별 연락 내역 시각화
-def visualize_contact_history():
-    contact_dates = {}
-    for contact in contacts:
-        for record in contact.contact_history:
-            if record['date'] not in contact_dates:
-                contact_dates[record['date']] = 1
-            else:
-                contact_dates[record['date']] += 1
+@metrics.timed("dashboard.contact_history")
+def visualize_contact_history(period=None):
+    period, contact_dates = contact_history_counts(period)
 
     # 데이터가 없는 경우 처리
     if not contact_dates:
@@ -609,121 +3861,1254 @@ def visualize_contact_history():
         return
 
     # 데이터가 있는 경우 그래프 생성
-    dates = list(contact_dates.keys())
-    frequencies = list(contact_dates.values())
-    plt.bar(dates, frequencies, color='purple')
-    plt.title("날짜별 연락 내역")
-    plt.xlabel("날짜")
-    plt.ylabel("연락 빈도")
-    plt.show()
+    show_chart(f"contact-history-{period}", {
+        'title': f"{HISTORY_PERIODS[period]}별 연락 내역", 'xlabel': HISTORY_PERIODS[period], 'ylabel': "연락 빈도",
+        'labels': list(contact_dates.keys()), 'values': list(contact_dates.values()), 'color': 'purple'
+    })
+
+# 지인의 연락 상태 그래프 (이름, spec, 연락 주기 초과 여부), 최근 연락 기록이 없으면 None
+def contact_schedule_chart(contact, now=None):
+    if not contact.last_contact_date:
+        return None
+    days_since_last_contact = ((now or datetime.now()) - contact.last_contact_date).days
+    contact_interval = contact.group.contact_interval
+    next_contact_in = contact_interval - days_since_last_contact
+
+    # 연락 주기가 초과되었는지 확인
+    overdue = next_contact_in < 0
+    if overdue:
+        next_contact_in = 0  # 음수일 경우 0으로 처리
+
+    return f"contact-{contact.id}-schedule", {
+        'title': f"{contact.name}의 연락 상태", 'ylabel': '일',
+        'labels': ['마지막 연락', '다음 연락까지 남은 일수'], 'values': [days_since_last_contact, next_contact_in],
+        'color': ['lightcoral', 'lightgreen']
+    }, overdue
 
 # 5. 연락 주기 및 예정 시각화
+@metrics.timed("dashboard.contact_schedule")
 def visualize_contact_schedule(contact):
-    if contact.last_contact_date:
-        days_since_last_contact = (datetime.now() - contact.last_contact_date).days
-        contact_interval = contact.group.contact_interval
-        next_contact_in = contact_interval - days_since_last_contact
-
-        # 연락 주기가 초과되었는지 확인
-        if next_contact_in < 0:
-            next_contact_in = 0  # 음수일 경우 0으로 처리
-            print(f"{contact.name}의 연락 주기가 초과되었습니다! 가능한 빨리 연락해야 합니다.")
-
-        labels = ['마지막 연락', '다음 연락까지 남은 일수']
-        values = [days_since_last_contact, next_contact_in]
-
-        plt.bar(labels, values, color=['lightcoral', 'lightgreen'])
-        plt.title(f"{contact.name}의 연락 상태")
-        plt.ylabel('일')
-        plt.show()
-    else:
+    chart = contact_schedule_chart(contact)
+    if chart is None:
         print(f"{contact.name}의 최근 연락 기록이 없습니다.")
+        return
+
+    name, spec, overdue = chart
+    if overdue:
+        print(f"{contact.name}의 연락 주기가 초과되었습니다! 가능한 빨리 연락해야 합니다.")
+    show_chart(name, spec)
+
+# 모든 지인의 대화 주제/중요도 그래프와 연락 상태 그래프를 여러 프로세스에서 한꺼번에 파일로 그리는 함수
+@metrics.timed("chart.render_all")
+def render_all_charts(file_format=None, workers=None):
+    if not matplotlib_installed():
+        print("matplotlib이 설치되어 있지 않아 그래프를 그릴 수 없습니다. (pip install matplotlib)")
+        return 0, 0, 0
+    started = time.perf_counter()
+    charts = []
+    for contact in contacts:
+        charts.extend(contact_conversation_charts(contact))
+        schedule = contact_schedule_chart(contact)
+        if schedule is not None:
+            charts.append(schedule[:2])
+
+    rendered = cached = failed = 0
+    with ProcessPoolExecutor(max_workers=workers or CHART_WORKERS) as pool:
+        futures = []
+        for name, spec in charts:
+            path, future = render_chart(name, spec, file_format, pool)
+            if future is None:
+                cached += 1
+            else:
+                futures.append(future)
+        for future in as_completed(futures):
+            if future.exception() is None:
+                rendered += 1
+            else:
+                failed += 1
+                print(f"그래프를 그리는 중 오류 발생: {future.exception()}")
 
-# 프로그램 실행 시 대시보드 선택 메뉴 추가
-while True:
-    print("\n1. 그룹 추가")
-    print("2. 지인 추가")
-    print("3. 지인 목록 보기")
-    print("4. 모든 지인에 대해 연락 주기 체크")
-    print("5. 대화 기록 추가")
-    print("6. 날짜별 대화 기록 보기")
-    print("7. 지인별 대화 기록 보기")
-    print("8. 대시보드: 카테고리별 중요도 분석")
-    print("9. 대시보드: 지인별 대화 주제 및 중요도 분석")
-    print("10. 대시보드: 중요한 대화 내용 분석")
-    print("11. 대시보드: 날짜별 연락 내역")
-    print("12. 대시보드: 연락 주기 및 상태")
-    print("13. 그룹 정보 수정")  # 그룹 수정 메뉴 추가
-    print("14. 지인 정보 수정")  # 지인 수정 메뉴 추가
-    print("15. 대화 기록 수정")  # 대화 기록 수정 메뉴 추가
-    print("16. 최근 연락 날짜 업데이트")  # 최근 연락 날짜 업데이트 메뉴 추가
-    print("17. 종료 (데이터 저장)")
-
-    choice = input("선택: ")
-
-    if choice == "1":
-        add_group()
-    elif choice == "2":
-        add_contact()
-    elif choice == "3":
-        display_contacts()
-    elif choice == "4":
-        check_all_contacts_due()
-    elif choice == "5":
-        if contacts:
-            print("대화를 기록할 지인을 선택하세요:")
-            for idx, contact in enumerate(contacts, start=1):
-                print(f"[{idx}] {contact.name}")
-            contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
-            record_conversation(contacts[contact_choice])
+    print(f"그래프 {rendered}개를 그렸습니다. (변경 없음 {cached}개, 실패 {failed}개, {time.perf_counter() - started:.1f}초) → {CHART_DIR}")
+    return rendered, cached, failed
+
+# 대시보드 선택 메뉴를 보여주고 선택한 기능을 실행하는 함수 (대화형 실행용)
+def run_menu():
+    while True:
+        print("\n1. 그룹 추가")
+        print("2. 지인 추가")
+        print("3. 지인 목록 보기")
+        print("4. 모든 지인에 대해 연락 주기 체크")
+        print("5. 대화 기록 추가")
+        print("6. 날짜별 대화 기록 보기")
+        print("7. 지인별 대화 기록 보기")
+        print("8. 대시보드: 카테고리별 중요도 분석")
+        print("9. 대시보드: 지인별 대화 주제 및 중요도 분석")
+        print("10. 대시보드: 중요한 대화 내용 분석")
+        print("11. 대시보드: 날짜별 연락 내역")
+        print("12. 대시보드: 연락 주기 및 상태")
+        print("13. 그룹 정보 수정")  # 그룹 수정 메뉴 추가
+        print("14. 지인 정보 수정")  # 지인 수정 메뉴 추가
+        print("15. 대화 기록 수정")  # 대화 기록 수정 메뉴 추가
+        print("16. 최근 연락 날짜 업데이트")  # 최근 연락 날짜 업데이트 메뉴 추가
+        print("17. 대화 내용 및 지인 정보 검색")
+        print("18. 종료 (데이터 저장)")
+
+        choice = input("선택: ")
+
+        # 다른 프로세스(다른 메뉴, API 서버, 가져오기 작업)가 그동안 기록한 변경을 반영
+        store.refresh()
+
+        if choice == "1":
+            add_group()
+        elif choice == "2":
+            add_contact()
+        elif choice == "3":
+            display_contacts()
+        elif choice == "4":
+            check_all_contacts_due()
+        elif choice == "5":
+            if contacts:
+                print("대화를 기록할 지인을 선택하세요:")
+                for idx, contact in enumerate(contacts, start=1):
+                    print(f"[{idx}] {contact.name}")
+                contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
+                record_conversation(contacts[contact_choice])
+            else:
+                print("등록된 지인이 없습니다.")
+        elif choice == "6":
+            view_conversations_by_date()
+        elif choice == "7":
+            view_conversations_by_contact()
+        elif choice == "8":
+            visualize_category_importance()
+        elif choice == "9":
+            if contacts:
+                print("대화를 시각화할 지인을 선택하세요:")
+                for idx, contact in enumerate(contacts, start=1):
+                    print(f"[{idx}] {contact.name}")
+                contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
+                visualize_contact_conversations(contacts[contact_choice])
+            else:
+                print("등록된 지인이 없습니다.")
+        elif choice == "10":
+            if contacts:
+                print("중요한 대화를 시각화할 지인을 선택하세요:")
+                for idx, contact in enumerate(contacts, start=1):
+                    print(f"[{idx}] {contact.name}")
+                contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
+                visualize_important_conversations(contacts[contact_choice])
+            else:
+                print("등록된 지인이 없습니다.")
+        elif choice == "11":
+            visualize_contact_history()
+        elif choice == "12":
+            if contacts:
+                print("연락 주기를 시각화할 지인을 선택하세요:")
+                for idx, contact in enumerate(contacts, start=1):
+                    print(f"[{idx}] {contact.name}")
+                contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
+                visualize_contact_schedule(contacts[contact_choice])
+            else:
+                print("등록된 지인이 없습니다.")
+        elif choice == "13":
+            edit_group()  # 그룹 정보 수정 기능 호출
+        elif choice == "14":
+            edit_contact()  # 지인 정보 수정 기능 호출
+        elif choice == "15":
+            edit_conversation()  # 대화 기록 수정 기능 호출
+        elif choice == "16":
+            update_contact_date()  # 최근 연락 날짜 업데이트 기능 호출
+        elif choice == "17":
+            search_conversations()
+        elif choice == "18":
+            save_data()  # 프로그램 종료 시 데이터 저장
+            print("프로그램을 종료합니다.")
+            break
         else:
-            print("등록된 지인이 없습니다.")
-    elif choice == "6":
-        view_conversations_by_date()
-    elif choice == "7":
-        view_conversations_by_contact()
-    elif choice == "8":
-        visualize_category_importance()
-    elif choice == "9":
-        if contacts:
-            print("대화를 시각화할 지인을 선택하세요:")
-            for idx, contact in enumerate(contacts, start=1):
-                print(f"[{idx}] {contact.name}")
-            contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
-            visualize_contact_conversations(contacts[contact_choice])
+            print("잘못된 선택입니다.")
+
+# 환경 변수나 파일에서 OpenAI API 키를 읽어 설정하는 함수 (대화형 실행이면 직접 입력받음)
+def configure_api_key(api_key_file=None, interactive=False):
+    global ai_enabled, openai_api_key
+
+    api_key = os.environ.get("OPENAI_API_KEY", "").strip()
+    api_key_file = api_key_file or os.environ.get("CONNECTUTOR_API_KEY_FILE")
+    if not api_key and api_key_file:
+        with open(api_key_file, 'r', encoding='utf-8') as file:
+            api_key = file.read().strip()
+
+    if not api_key and interactive:
+        # 유저가 직접 API 키를 입력하도록 요청
+        api_key = input("OpenAI API 키를 입력하세요: ").strip()
+
+        # API 키가 없으면 프로그램 실행 중단
+        if not api_key:
+            raise ValueError("API 키가 입력되지 않았습니다. 프로그램을 종료합니다.")
+
+    if api_key:
+        openai_api_key = api_key
+        if openai is not None:
+            openai.api_key = api_key
+    else:
+        # 자동 실행에서는 API 키가 없으면 대화 주제 추천 없이 진행
+        ai_enabled = False
+        print("API 키가 설정되지 않아 대화 주제 추천 없이 실행합니다.")
+
+# 전체 데이터를 JSON 조각으로 차례로 만들어 내는 생성기 (지인 한 명씩 직렬화하여 전체를 한 번에 메모리에 만들지 않음)
+def iter_export_json():
+    yield '{"groups": ' + json.dumps([serialize_group(group) for group in groups], ensure_ascii=False) + ', "contacts": ['
+    for idx, contact in enumerate(contacts):
+        contact_data = dict(serialize_contact(contact), contact_history=history_to_list(contact.read_history()))
+        yield (", " if idx else "") + json.dumps(contact_data, ensure_ascii=False)
+    yield "]}"
+
+# 전체 데이터를 파일로 내보내는 함수 (대화 기록 포함, 형식을 지정하지 않으면 확장자가 .bin일 때 바이너리)
+@metrics.timed("export")
+def export_data(path, file_format=None):
+    if file_format is None:
+        file_format = "binary" if path.lower().endswith(".bin") else "json"
+
+    with data_lock:
+        if file_format == "binary":
+            base = store.snapshot if isinstance(store, BinaryStore) else None
+            chunks = encode_binary_snapshot({'journal_seq': 0, 'aggregates': aggregates.to_dict()}, base, store)
         else:
-            print("등록된 지인이 없습니다.")
-    elif choice == "10":
-        if contacts:
-            print("중요한 대화를 시각화할 지인을 선택하세요:")
-            for idx, contact in enumerate(contacts, start=1):
-                print(f"[{idx}] {contact.name}")
-            contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
-            visualize_important_conversations(contacts[contact_choice])
+            chunks = iter_export_json()
+        write_file_atomic(path, chunks)
+    print(f"지인 {len(contacts)}명의 데이터를 {path}에 내보냈습니다.")
+
+# 내보낸 파일을 (그룹 목록, 대화 기록을 포함한 지인 데이터 목록 또는 생성기, 닫을 스냅샷)으로 여는 함수
+def read_export_file(path):
+    with open(path, 'rb') as file:
+        binary = file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    if binary:
+        snapshot = BinarySnapshot(path)
+        contact_list = (dict(contact_data, contact_history=history_to_list(snapshot.history(idx)))
+                        for idx, contact_data in enumerate(snapshot.meta['contacts']))
+        return snapshot.meta['groups'], contact_list, snapshot
+
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return data.get('groups', []), data.get('contacts', []), None
+
+# 내보낸 JSON/바이너리 파일의 그룹/지인/대화 기록을 현재 데이터에 합치는 함수
+# (같은 이름의 그룹은 그대로 사용하고, 같은 그룹에 같은 이름의 지인이 이미 있으면 건너뜀)
+@metrics.timed("import")
+def import_data(path):
+    group_list, contact_list, snapshot = read_export_file(path)
+    try:
+        merge_imported_data(group_list, contact_list)
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+# 가져온 그룹/지인 데이터를 현재 데이터에 합치는 함수
+def merge_imported_data(group_list, contact_list):
+    # 새 그룹을 먼저 한 번에 기록 (지인을 추가할 때 그룹 번호가 필요함)
+    group_changes = []
+    for group_data in group_list:
+        if data_index.group_by_name(group_data['name']) is None and all(change['name'] != group_data['name'] for change in group_changes):
+            group_changes.append({'op': 'add_group', 'name': group_data['name'], 'contact_interval': group_data['contact_interval'], 'tolerance': group_data['tolerance']})
+    if group_changes:
+        commit_changes(group_changes)
+    added_groups = len(group_changes)
+
+    # 지인과 대화 기록은 IMPORT_BATCH_SIZE개씩 모아 한 번에 기록
+    # (지인 번호는 기록될 순서대로 미리 정해지므로, 그 사이 다른 변경이 끼어들지 않도록 잠금을 잡은 채 진행)
+    added_contacts = skipped_contacts = 0
+    with data_lock:
+        changes = []
+        next_contact_id = len(contacts)
+        added_keys = set()  # 이번에 추가하는 (지인 이름, 그룹 번호)
+        for contact_data in contact_list:
+            group = data_index.group_by_name(contact_data['group'])
+            if group is None or (contact_data['name'], group.id) in added_keys or any(contact.group is group for contact in data_index.find_contacts(contact_data['name'])):
+                skipped_contacts += 1
+                continue
+            added_keys.add((contact_data['name'], group.id))
+
+            contact_id = next_contact_id
+            next_contact_id += 1
+            changes.append({
+                'op': 'add_contact', 'name': contact_data['name'], 'group': group.id, 'birthday': contact_data.get('birthday'),
+                'gender': contact_data.get('gender'), 'residence': contact_data.get('residence'),
+                'hobbies': contact_data.get('hobbies'), 'additional_info': contact_data.get('additional_info', "")
+            })
+            for record in contact_data.get('contact_history', []):
+                changes.append({'op': 'add_conversation', 'contact': contact_id, 'date': record['date'], 'topics': record['topics']})
+            if contact_data.get('last_contact_date'):
+                changes.append({'op': 'update_last_contact_date', 'contact': contact_id, 'last_contact_date': contact_data['last_contact_date']})
+            added_contacts += 1
+
+            if len(changes) >= IMPORT_BATCH_SIZE:
+                commit_changes(changes)
+                changes = []
+        if changes:
+            commit_changes(changes)
+
+    print(f"그룹 {added_groups}개, 지인 {added_contacts}명을 가져왔습니다. (건너뜀: {skipped_contacts}명)")
+
+# 통화/채팅 기록 등을 JSONL 또는 CSV 파일에서 대화 기록으로 일괄 가져오는 클래스
+# (파일을 한 줄씩 읽어 검증하고, 정해진 개수씩 모아 저장소에 한 번에 기록)
+# JSONL 한 줄: {"contact": 이름, "group": 그룹(선택), "date": 날짜, "topics": {카테고리: {"importance": 1~5, "details": 내용}}}
+# CSV 한 줄 (또는 topics 없는 JSONL 한 줄): contact, group(선택), date, category, importance, details
+# (카테고리별로 나뉜 줄은 지인과 날짜가 같으면 연이어 있는 줄끼리 하나의 대화로 합침)
+class ConversationImporter:
+    MAX_REJECT_SAMPLES = 10
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.fingerprints = {}  # 지인 번호 -> 이미 있는 대화 기록의 지문 집합 (중복 방지)
+        self.rows = 0  # 읽은 줄 수
+        self.imported = 0  # 가져온 대화 수
+        self.duplicates = 0  # 이미 있어서 건너뛴 대화 수
+        self.rejects = {}  # 거부 사유 -> 줄 수
+        self.reject_samples = []  # (줄 번호, 사유) 일부
+
+    def reject(self, line_no, reason):
+        self.rejects[reason] = self.rejects.get(reason, 0) + 1
+        if len(self.reject_samples) < self.MAX_REJECT_SAMPLES:
+            self.reject_samples.append((line_no, reason))
+
+    # 파일을 한 줄씩 읽어 (줄 번호, 딕셔너리)를 돌려주는 메소드 (파싱할 수 없는 줄은 거부)
+    def read_rows(self, path, file_format):
+        if file_format == "csv":
+            with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+                reader = csv.DictReader(file)
+                for row in reader:
+                    yield reader.line_num, row
+            return
+
+        with open(path, 'r', encoding='utf-8') as file:
+            for line_no, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    self.rows += 1
+                    self.reject(line_no, "JSON 형식 오류")
+                    continue
+                if not isinstance(row, dict):
+                    self.rows += 1
+                    self.reject(line_no, "JSON 형식 오류")
+                    continue
+                yield line_no, row
+
+    # 날짜를 검증하여 대화 날짜 형식으로 반환 (시각이 포함되어 있으면 날짜만 사용)
+    @staticmethod
+    def parse_date(value):
+        try:
+            return datetime.fromisoformat(str(value or "").strip()).strftime(DATE_FORMAT)
+        except ValueError:
+            raise ValueError("날짜 형식 오류")
+
+    # 중요도를 1~5 사이의 정수로 검증
+    @staticmethod
+    def parse_importance(value):
+        if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+            raise ValueError("중요도 형식 오류")
+        try:
+            importance = int(value)
+        except (TypeError, ValueError):
+            raise ValueError("중요도 형식 오류")
+        if not 1 <= importance <= 5:
+            raise ValueError("중요도 범위 오류 (1~5)")
+        return importance
+
+    # 카테고리별 주제 하나를 검증
+    def parse_topic(self, category, values):
+        category = str(category or "").strip()
+        if not category:
+            raise ValueError("카테고리 누락")
+        return category, {
+            'importance': self.parse_importance(values.get('importance')),
+            'details': str(values.get('details') or "")
+        }
+
+    # 한 줄을 검증하여 (지인 이름, 그룹 이름, 날짜, 주제, 합칠 수 있는지 여부)로 반환
+    def parse_row(self, row):
+        name = str(row.get('contact') or "").strip()
+        if not name:
+            raise ValueError("지인 이름 누락")
+        group_name = str(row.get('group') or "").strip()
+        date = self.parse_date(row.get('date'))
+
+        if 'topics' in row:
+            if not isinstance(row['topics'], dict) or not row['topics']:
+                raise ValueError("주제 형식 오류")
+            topics = {}
+            for category, values in row['topics'].items():
+                if not isinstance(values, dict):
+                    raise ValueError("주제 형식 오류")
+                category, details = self.parse_topic(category, values)
+                topics[category] = details
+            return name, group_name, date, topics, False
+
+        category, details = self.parse_topic(row.get('category'), row)
+        return name, group_name, date, {category: details}, True
+
+    # 검증된 줄을 대화 단위로 묶어 (시작 줄 번호, 지인 이름, 그룹 이름, 날짜, 주제)로 반환
+    def conversations(self, path, file_format):
+        pending = None
+        for line_no, row in self.read_rows(path, file_format):
+            self.rows += 1
+            try:
+                name, group_name, date, topics, mergeable = self.parse_row(row)
+            except ValueError as e:
+                self.reject(line_no, str(e))
+                continue
+
+            # 카테고리별로 나뉜 줄은 바로 앞 대화와 지인/날짜가 같으면 한 대화로 합침
+            key = (name, group_name, date)
+            if mergeable and pending is not None and pending[3] and pending[1] == key:
+                pending[2].update(topics)
+                continue
+            if pending is not None:
+                yield (pending[0],) + pending[1] + (pending[2],)
+            pending = (line_no, key, topics, mergeable)
+        if pending is not None:
+            yield (pending[0],) + pending[1] + (pending[2],)
+
+    # 이름(과 그룹)으로 지인을 찾는 메소드 (없거나 동명이인을 구분할 수 없으면 거부)
+    def resolve_contact(self, name, group_name):
+        matches = data_index.find_contacts(name)
+        if group_name:
+            matches = [contact for contact in matches if contact.group.name == group_name]
+        if not matches:
+            raise ValueError("지인을 찾을 수 없음")
+        if len(matches) > 1:
+            raise ValueError("동명이인 구분 불가 (group 필요)")
+        return matches[0]
+
+    # 날짜와 주제로 대화 기록의 지문을 만드는 메소드
+    @staticmethod
+    def fingerprint(date, topics):
+        text = json.dumps([date, topics], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    # 지인의 기존 대화 기록 지문 집합 (처음 나온 지인만 대화 기록을 읽어 만듦)
+    def known_fingerprints(self, contact):
+        known = self.fingerprints.get(contact.id)
+        if known is None:
+            known = {self.fingerprint(record.date, record.to_dict()['topics']) for record in contact.contact_history}
+            self.fingerprints[contact.id] = known
+        return known
+
+    # 파일 전체를 가져오는 메소드
+    def run(self, path, file_format):
+        started = time.perf_counter()
+        batch = []
+        for line_no, name, group_name, date, topics in self.conversations(path, file_format):
+            try:
+                contact = self.resolve_contact(name, group_name)
+            except ValueError as e:
+                self.reject(line_no, str(e))
+                continue
+
+            known = self.known_fingerprints(contact)
+            fingerprint = self.fingerprint(date, topics)
+            if fingerprint in known:
+                self.duplicates += 1
+                continue
+            known.add(fingerprint)
+
+            batch.append({'op': 'add_conversation', 'contact': contact.id, 'date': date, 'topics': topics})
+            if len(batch) >= self.batch_size:
+                commit_changes(batch)
+                self.imported += len(batch)
+                batch = []
+        if batch:
+            commit_changes(batch)
+            self.imported += len(batch)
+        self.elapsed = time.perf_counter() - started
+        metrics.count("import.rows", self.rows)
+        metrics.count("import.imported", self.imported)
+        metrics.count("import.duplicates", self.duplicates)
+        metrics.count("import.rejected", sum(self.rejects.values()))
+
+    def print_summary(self):
+        rejected = sum(self.rejects.values())
+        rate = self.rows / self.elapsed if self.elapsed > 0 else 0
+        print(f"대화 기록 {self.imported}건을 가져왔습니다. "
+              f"(읽은 줄 {self.rows}개, 중복 {self.duplicates}건, 거부 {rejected}줄, {self.elapsed:.2f}초, 초당 {rate:.0f}줄)")
+        for reason, count in sorted(self.rejects.items(), key=lambda item: -item[1]):
+            print(f"- {reason}: {count}줄")
+        for line_no, reason in self.reject_samples:
+            print(f"  {line_no}번째 줄: {reason}")
+
+# JSONL/CSV 파일에서 대화 기록을 일괄 가져오는 함수 (형식을 지정하지 않으면 확장자로 판단)
+@metrics.timed("import_conversations")
+def import_conversations(path, file_format=None, batch_size=IMPORT_BATCH_SIZE):
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    importer = ConversationImporter(batch_size)
+    importer.run(path, file_format)
+    importer.print_summary()
+    return importer
+
+# 전체 현황 요약을 딕셔너리로 만드는 함수
+@metrics.timed("report")
+def build_report(now=None):
+    now = now or datetime.now()
+    return {
+        'generated_at': now.strftime(DATETIME_FORMAT),
+        'groups': len(groups),
+        'contacts': len(contacts),
+        'conversations': sum(aggregates.date_counts.values()),
+        'due_now': [contact.name for contact in scheduler.due_now(now)],
+        'overdue': [contact.name for contact in scheduler.overdue(now)],
+        'due_soon': [contact.name for contact in scheduler.due_within(DUE_LOOKAHEAD_DAYS, now)],
+        'never_contacted': len(scheduler.unscheduled),
+        'birthdays': [{'name': contact.name, 'date': date.strftime('%Y-%m-%d'), 'days_left': days_left}
+                      for contact, date, days_left in birthday_index.upcoming(BIRTHDAY_LOOKAHEAD_DAYS, now)],
+        'category_importance': aggregates.category_importance
+    }
+
+# 현황 요약을 출력하는 함수 (as_json이면 JSON으로 출력)
+def print_report(as_json=False):
+    report = build_report()
+    if as_json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"[{report['generated_at']}] 그룹 {report['groups']}개, 지인 {report['contacts']}명, 대화 기록 {report['conversations']}건")
+    print(f"지금 연락할 지인 {len(report['due_now'])}명, 연락 주기가 지난 지인 {len(report['overdue'])}명, "
+          f"{DUE_LOOKAHEAD_DAYS}일 안에 연락할 지인 {len(report['due_soon'])}명, 연락 기록 없음 {report['never_contacted']}명, "
+          f"{BIRTHDAY_LOOKAHEAD_DAYS}일 안에 생일 {len(report['birthdays'])}명")
+    for category, importance in sorted(report['category_importance'].items(), key=lambda item: -item[1]):
+        print(f"- {category}: 중요도 합계 {importance}")
+
+# 지인들의 대화 주제를 한꺼번에 추천받아 출력하는 함수
+def print_suggestions(contact_list):
+    if not contact_list:
+        print("대화 주제를 추천할 지인이 없습니다.")
+        return
+    for contact, topic in suggest_conversation_topics(contact_list):
+        print(f"{contact.name}: {topic if topic else '대화 주제 추천을 사용할 수 없습니다.'}")
+
+# -----------------------
+# HTTP API 서버
+# -----------------------
+
+# API 요청 처리 중 클라이언트에 돌려줄 오류 (HTTP 상태 코드와 메시지)
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+# API 요청 하나 (경로에서 읽은 값, 쿼리 문자열, JSON 본문)
+class ApiRequest:
+    def __init__(self, params, query, body):
+        self.params = params
+        self.query = query
+        self.body = body
+
+    # 쿼리 문자열 값을 convert로 변환하여 반환 (없으면 default, 변환할 수 없으면 400 오류)
+    def arg(self, name, convert=str, default=None):
+        value = self.query.get(name, "")
+        if value == "":
+            return default
+        try:
+            return convert(value)
+        except (ValueError, argparse.ArgumentTypeError):
+            raise ApiError(400, f"{name} 값이 올바르지 않습니다: {value}")
+
+    # JSON 본문의 값을 반환 (required인데 없으면 400 오류)
+    def field(self, name, required=False, default=None):
+        if not isinstance(self.body, dict):
+            raise ApiError(400, "요청 본문은 JSON 객체여야 합니다.")
+        value = self.body.get(name)
+        if value is None or value == "":
+            if required:
+                raise ApiError(400, f"{name} 항목이 필요합니다.")
+            return default
+        return value
+
+    # 경로의 지인 번호로 지인을 찾는 메소드
+    def contact(self):
+        contact_id = int(self.params['contact'])
+        if contact_id >= len(contacts):
+            raise ApiError(404, f"{contact_id}번 지인이 없습니다.")
+        return contacts[contact_id]
+
+# 그룹/지인/대화 기록을 API 응답용 딕셔너리로 만드는 함수
+def group_json(group):
+    return dict(serialize_group(group), id=group.id, contacts=len(data_index.contacts_in_group(group)))
+
+def contact_json(contact):
+    return dict(serialize_contact(contact), id=contact.id, group_id=contact.group.id)
+
+def contact_summary_json(contact, now):
+    return {
+        'id': contact.id, 'name': contact.name, 'group': contact.group.name,
+        'last_contact_date': contact.last_contact_date.strftime(DATETIME_FORMAT) if contact.last_contact_date else None,
+        'days_since_last_contact': (now - contact.last_contact_date).days if contact.last_contact_date else None
+    }
+
+def conversation_json(contact, record, index=None):
+    result = dict(record.to_dict(), contact=contact.id)
+    if index is not None:
+        result['index'] = index
+    return result
+
+# 숫자로 된 값을 검증하는 함수 (0 이상의 정수가 아니면 400 오류)
+def api_count(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ApiError(400, f"{name}은(는) 0 이상의 정수여야 합니다.")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name}은(는) 0 이상의 정수여야 합니다.")
+    if value < 0:
+        raise ApiError(400, f"{name}은(는) 0 이상의 정수여야 합니다.")
+    return value
+
+# 대화 기록 요청 본문의 날짜와 카테고리별 주제를 검증하는 함수 (일괄 가져오기와 같은 규칙)
+def api_conversation_topics(request):
+    importer = ConversationImporter()
+    try:
+        date = importer.parse_date(request.field('date', required=True))
+        topics = request.field('topics', required=True)
+        if not isinstance(topics, dict) or not all(isinstance(values, dict) for values in topics.values()):
+            raise ValueError("주제 형식 오류")
+        return date, dict(importer.parse_topic(category, values) for category, values in topics.items())
+    except ValueError as e:
+        raise ApiError(400, str(e))
+
+# GET /groups
+def api_list_groups(request):
+    return [group_json(group) for group in groups]
+
+# POST /groups {"name", "contact_interval", "tolerance"}
+def api_add_group(request):
+    group = commit_change(
+        'add_group', name=str(request.field('name', required=True)),
+        contact_interval=api_count('contact_interval', request.field('contact_interval', required=True)),
+        tolerance=api_count('tolerance', request.field('tolerance', default=0))
+    )
+    return 201, group_json(group)
+
+# GET /contacts[?group=번호][&name=이름]
+def api_list_contacts(request):
+    name = request.arg('name')
+    group_id = request.arg('group', int)
+    if name is not None:
+        selected = data_index.find_contacts(name)
+    elif group_id is not None:
+        selected = data_index.contacts_in_group(groups[group_id]) if 0 <= group_id < len(groups) else []
+    else:
+        selected = contacts
+    return [contact_json(contact) for contact in selected if group_id is None or contact.group.id == group_id]
+
+# POST /contacts {"name", "group"(번호 또는 이름), "birthday", "gender", "residence", "hobbies", "additional_info"}
+def api_add_contact(request):
+    group_key = request.field('group', required=True)
+    if isinstance(group_key, int) and not isinstance(group_key, bool) and 0 <= group_key < len(groups):
+        group = groups[group_key]
+    else:
+        group = data_index.group_by_name(str(group_key))
+    if group is None:
+        raise ApiError(400, f"그룹이 없습니다: {group_key}")
+    fields = {field: request.field(field) for field in ('birthday', 'gender', 'residence', 'hobbies')}
+    fields = {field: None if value is None else str(value) for field, value in fields.items()}
+    contact = commit_change(
+        'add_contact', name=str(request.field('name', required=True)).strip(), group=group.id,
+        additional_info=str(request.field('additional_info', default="")), **fields
+    )
+    return 201, contact_json(contact)
+
+# GET /contacts/<번호>
+def api_get_contact(request):
+    return contact_json(request.contact())
+
+# PATCH /contacts/<번호> {수정할 항목만}
+def api_edit_contact(request):
+    contact = request.contact()
+    changes = {field: request.field(field) for field in ('name', 'birthday', 'gender', 'residence', 'hobbies', 'additional_info')}
+    changes = {field: str(value) for field, value in changes.items() if value is not None}
+    if changes:
+        commit_change('edit_contact', contact=contact.id, **changes)
+    return contact_json(contact)
+
+# POST /contacts/<번호>/contacted {"date"(생략하면 지금)}
+def api_update_contact_date(request):
+    contact = request.contact()
+    date = request.field('date')
+    try:
+        last_contact_date = datetime.fromisoformat(date) if date else datetime.now().replace(microsecond=0)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"날짜 형식이 올바르지 않습니다: {date}")
+    commit_change('update_last_contact_date', contact=contact.id, last_contact_date=last_contact_date.strftime(DATETIME_FORMAT))
+    return contact_json(contact)
+
+# GET /contacts/<번호>/conversations
+def api_list_contact_conversations(request):
+    contact = request.contact()
+    return [conversation_json(contact, record, index) for index, record in enumerate(contact.contact_history)]
+
+# POST /contacts/<번호>/conversations {"date", "topics": {카테고리: {"importance", "details"}}}
+def api_add_conversation(request):
+    contact = request.contact()
+    date, topics = api_conversation_topics(request)
+    commit_change('add_conversation', contact=contact.id, date=date, topics=topics)
+    return 201, conversation_json(contact, contact.contact_history[-1], len(contact.contact_history) - 1)
+
+# GET /conversations?date=날짜 또는 ?from=날짜&to=날짜 (&limit=N&offset=N으로 나눠 받음)
+# 전체 기록을 한 번에 내려보내지 않도록 date나 from/to 중 하나는 있어야 하고, 한 번에 최대 limit개만 반환
+def api_list_conversations(request):
+    date = request.arg('date', iso_date)
+    date_from = request.arg('from', iso_date)
+    date_to = request.arg('to', iso_date)
+    limit = request.arg('limit', int, API_CONVERSATION_LIMIT)
+    offset = request.arg('offset', int, 0)
+    if not 1 <= limit <= API_MAX_CONVERSATION_LIMIT or offset < 0:
+        raise ApiError(400, f"limit은 1~{API_MAX_CONVERSATION_LIMIT}, offset은 0 이상이어야 합니다.")
+
+    if date is not None:
+        records = store.conversations_by_date(date)
+    elif date_from is not None or date_to is not None:
+        records = store.conversations_between(date_from or "0000-00-00", date_to or "9999-99-99")
+    else:
+        raise ApiError(400, "date 또는 from/to 항목이 필요합니다.")
+    return [conversation_json(contact, record) for contact, record in records[offset:offset + limit]]
+
+# GET /due
+def api_due(request):
+    now = datetime.now()
+    return {
+        'due_now': [contact_summary_json(contact, now) for contact in scheduler.due_now(now)],
+        'overdue': [contact_summary_json(contact, now) for contact in scheduler.overdue(now)],
+        'due_soon': [contact_summary_json(contact, now) for contact in scheduler.due_within(DUE_LOOKAHEAD_DAYS, now)],
+        'never_contacted': len(scheduler.unscheduled),
+        'birthdays': [dict(contact_summary_json(contact, now), birthday=date.strftime('%Y-%m-%d'), days_left=days_left)
+                      for contact, date, days_left in birthday_index.upcoming(BIRTHDAY_LOOKAHEAD_DAYS, now)]
+    }
+
+# GET /report
+def api_report(request):
+    return build_report()
+
+# GET /dashboard[?period=day|week|month]
+def api_dashboard(request):
+    period = request.arg('period')
+    if period is not None and period not in HISTORY_PERIODS:
+        raise ApiError(400, f"period는 {', '.join(HISTORY_PERIODS)} 중 하나여야 합니다.")
+    period, contact_dates = contact_history_counts(period)
+    return {
+        'category_importance': analytics.category_importance(),
+        'top_contacts': [{'id': contact.id, 'name': contact.name, 'importance': total} for contact, total in analytics.top_contacts(5)],
+        'contact_history': {'period': period, 'counts': contact_dates}
+    }
+
+# GET /contacts/<번호>/dashboard
+def api_contact_dashboard(request):
+    contact = request.contact()
+    charts = contact_conversation_charts(contact)
+    schedule = contact_schedule_chart(contact)
+    if schedule is not None:
+        charts.append(schedule[:2])
+    return {
+        'charts': [dict(spec, name=name) for name, spec in charts],
+        'important_topics': analytics.important_topics(contact, 4),
+        'overdue': schedule is not None and schedule[2]
+    }
+
+# GET /search?q=검색어[&category=][&min_importance=][&max_importance=][&from=][&to=][&limit=]
+def api_search(request):
+    query = request.arg('q')
+    if not query:
+        raise ApiError(400, "q 항목이 필요합니다.")
+    results = search_index.search(
+        query, request.arg('category'), request.arg('min_importance', int), request.arg('max_importance', int),
+        request.arg('from', iso_date), request.arg('to', iso_date), request.arg('limit', int, SEARCH_RESULT_LIMIT)
+    )
+    return [dict(result, contact={'id': result['contact'].id, 'name': result['contact'].name}) for result in results]
+
+# GET /contacts/<번호>/suggestion 의 앞부분: AI에 보낼 메시지를 데이터 잠금 안에서 만듦
+def api_topic_messages(request):
+    contact = request.contact()
+    return contact, build_topic_messages(contact)
+
+# GET /metrics: 지금까지의 성능 측정 결과
+def api_metrics(request):
+    return metrics.snapshot()
+
+# (메소드, 경로 패턴, 처리 함수) 목록
+API_ROUTES = [
+    ("GET", r"/groups", api_list_groups),
+    ("POST", r"/groups", api_add_group),
+    ("GET", r"/contacts", api_list_contacts),
+    ("POST", r"/contacts", api_add_contact),
+    ("GET", r"/contacts/(?P<contact>\d+)", api_get_contact),
+    ("PATCH", r"/contacts/(?P<contact>\d+)", api_edit_contact),
+    ("POST", r"/contacts/(?P<contact>\d+)/contacted", api_update_contact_date),
+    ("GET", r"/contacts/(?P<contact>\d+)/conversations", api_list_contact_conversations),
+    ("POST", r"/contacts/(?P<contact>\d+)/conversations", api_add_conversation),
+    ("GET", r"/contacts/(?P<contact>\d+)/dashboard", api_contact_dashboard),
+    ("GET", r"/contacts/(?P<contact>\d+)/suggestion", api_topic_messages),
+    ("GET", r"/conversations", api_list_conversations),
+    ("GET", r"/due", api_due),
+    ("GET", r"/report", api_report),
+    ("GET", r"/dashboard", api_dashboard),
+    ("GET", r"/search", api_search),
+    ("GET", r"/metrics", api_metrics),
+]
+API_ROUTES = [(method, re.compile(pattern), handler) for method, pattern, handler in API_ROUTES]
+
+# asyncio로 연결을 받고, 데이터 처리는 스레드 풀에서 실행하는 HTTP API 서버
+# 이벤트 루프는 요청을 읽고 응답을 쓰기만 하므로, 저장소 기록이나 AI 요청을 기다리는 동안에도 다른 클라이언트의 요청을 받음
+# 데이터 처리는 사용자별 데이터 잠금 안에서 실행하고, AI 대화 주제 요청은 잠금 밖의 별도 스레드 풀에서 기다림
+class ApiServer:
+    def __init__(self, context, workers=API_WORKERS):
+        self.context = context  # X-Tenant 헤더가 없는 요청이 사용할 데이터
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.ai_executor = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="api-ai")
+
+    # 요청한 사용자의 데이터 잠금 안에서 처리 함수를 실행하는 메소드 (작업 스레드에서 실행)
+    # 없는 사용자는 쓰기 요청(create=True)에서만 새로 만듦
+    def call(self, tenant, handler, request, create=False):
+        with contextlib.ExitStack() as stack:
+            if tenant:
+                try:
+                    stack.enter_context(tenant_pool.session(tenant, create=create))
+                except ValueError as e:
+                    raise ApiError(400, str(e))
+                except FileNotFoundError as e:
+                    raise ApiError(404, str(e))
+                except DataLoadError as e:
+                    raise ApiError(500, f"데이터를 불러오지 못했습니다: {e}")
+            else:
+                stack.enter_context(use_context(self.context))
+            with data_lock:
+                try:
+                    store.refresh()
+                except DataLoadError as e:
+                    raise ApiError(500, f"데이터를 불러오지 못했습니다: {e}")
+                return handler(request)
+
+    # 경로에 맞는 처리 함수를 찾아 실행하고 (상태 코드, 응답 데이터)를 반환하는 메소드
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        allowed = []
+        for route_method, pattern, handler in API_ROUTES:
+            match = pattern.fullmatch(url.path.rstrip('/') or '/')
+            if match:
+                allowed.append(route_method)
+                if route_method == method:
+                    break
         else:
-            print("등록된 지인이 없습니다.")
-    elif choice == "11":
-        visualize_contact_history()
-    elif choice == "12":
-        if contacts:
-            print("연락 주기를 시각화할 지인을 선택하세요:")
-            for idx, contact in enumerate(contacts, start=1):
-                print(f"[{idx}] {contact.name}")
-            contact_choice = int(input("지인 번호를 선택하세요: ")) - 1
-            visualize_contact_schedule(contacts[contact_choice])
+            if allowed:
+                raise ApiError(405, f"허용되지 않는 메소드입니다: {method} (허용: {', '.join(allowed)})")
+            raise ApiError(404, f"없는 경로입니다: {url.path}")
+
+        try:
+            payload = json.loads(body) if body else None
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ApiError(400, "요청 본문이 JSON 형식이 아닙니다.")
+        request = ApiRequest(match.groupdict(), dict(parse_qsl(url.query)), payload)
+        tenant = headers.get('x-tenant')
+        loop = asyncio.get_running_loop()
+
+        with metrics.span(handler.__name__):
+            result = await loop.run_in_executor(self.executor, self.call, tenant, handler, request, method != "GET")
+            if handler is api_topic_messages:
+                # 대화 주제 추천: 메시지만 잠금 안에서 만들고, AI 응답은 잠금 밖에서 기다림
+                contact, messages = result
+                topic = await loop.run_in_executor(self.ai_executor, self.fetch_topic, messages)
+                return 200, {'id': contact.id, 'name': contact.name, 'topic': topic}
+        return result if isinstance(result, tuple) else (200, result)
+
+    # AI에 대화 주제를 요청하는 메소드 (AI를 사용할 수 없으면 None)
+    def fetch_topic(self, messages):
+        if not ai_enabled or load_openai() is None:
+            return None
+        return fetch_topic(messages)
+
+    # 연결 하나에서 요청을 차례로 읽어 응답하는 메소드 (HTTP/1.1 keep-alive 지원)
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = False
+                try:
+                    # 요청 줄은 ASCII 공백으로만 나눔 (str.split()은 UTF-8 바이트 0x85, 0xA0도 공백으로 보므로 한글 경로가 깨짐)
+                    method, target, version = request_line.rstrip(b'\r\n').split(b' ')
+                    method, target, version = method.decode('ascii'), target.decode('utf-8'), version.decode('ascii')
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' or version == 'HTTP/1.1' and connection != 'close'
+                    length = int(headers.get('content-length') or 0)
+                    if length > API_MAX_BODY:
+                        keep_alive = False
+                        raise ApiError(413, f"요청 본문이 너무 큽니다. (최대 {API_MAX_BODY}바이트)")
+                    body = await reader.readexactly(length) if length else b''
+                    status, result = await self.dispatch(method.upper(), target, headers, body)
+                except ApiError as e:
+                    status, result = e.status, {'error': e.message}
+                except ValueError:
+                    status, result, keep_alive = 400, {'error': "잘못된 HTTP 요청입니다."}, False
+                except (KeyError, TypeError, IndexError) as e:
+                    status, result = 400, {'error': f"요청 값이 올바르지 않습니다: {e}"}
+                except Exception as e:
+                    print(f"API 요청 처리 중 오류 발생: {e}")
+                    status, result = 500, {'error': "서버 오류가 발생했습니다."}
+
+                data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    # 서버를 실행하는 메소드 (SIGINT/SIGTERM을 받으면 종료)
+    async def serve(self, host, port):
+        listener = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"API 서버가 http://{host}:{port} 에서 실행 중입니다. (종료: Ctrl+C)", flush=True)
+        async with listener:
+            await wait_for_stop_signal()
+
+    def close(self):
+        self.executor.shutdown()
+        self.ai_executor.shutdown()
+
+# SIGINT/SIGTERM을 받을 때까지 기다리는 함수
+async def wait_for_stop_signal():
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        # Windows에서는 지원하지 않으므로 Ctrl+C(KeyboardInterrupt)로 종료
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signum, stopping.set)
+    await stopping.wait()
+
+# HTTP API 서버를 실행하는 함수 (Ctrl+C로 종료하면 데이터를 저장)
+def run_api_server(host=API_HOST, port=API_PORT, workers=API_WORKERS):
+    load_asyncio()
+    server = ApiServer(active_context(), workers)
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    save_data()
+    print("API 서버를 종료합니다.")
+
+# -----------------------
+# 연락 알림 데몬
+# -----------------------
+
+# 지인마다 다음 연락 가능 기간이 열리는 시각에 asyncio 타이머를 걸어 두고, 그 시각에 알림을 출력하는 데몬
+# 주기적으로 전체 지인을 확인하지 않고, 스케줄러가 다시 계산한 지인(최근 연락 날짜, 그룹 연락 주기)의 타이머만 다시 검
+# 시작할 때는 저장된 최근 연락 날짜로 만든 스케줄러에서 모든 타이머를 새로 걸고, 꺼져 있는 동안 열린 기간은 바로 알림
+class ReminderDaemon:
+    def __init__(self, context):
+        self.context = context
+        self.loop = None
+        self.timers = {}  # 지인 번호 -> (타이머, 종류 "open"/"overdue", 예정 시각)
+        self.announced = {}  # 지인 번호 -> 이미 알린 연락 가능 기간의 시작 시각
+        self.pending_topics = []  # 대화 주제를 요청할 지인 (한꺼번에 요청)
+        self.ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reminder-ai")
+
+    # 스케줄러가 지인의 기간을 다시 계산했을 때 불리는 메소드 (API 작업 스레드에서 불릴 수 있으므로 이벤트 루프로 넘김)
+    def changed(self, contact_id):
+        metrics.count("reminder.rescheduled")
+        self.loop.call_soon_threadsafe(self.schedule, contact_id)
+
+    # 모든 지인의 타이머를 걸고 스케줄러의 변경 알림을 받기 시작하는 메소드 (이벤트 루프 안에서 호출)
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        with use_context(self.context), data_lock:
+            now = datetime.now()
+            print(f"연락 알림 데몬을 시작합니다. 일정이 있는 지인 {len(scheduler.windows)}명, "
+                  f"연락 주기가 지난 지인 {len(scheduler.overdue(now))}명, 연락 기록이 없는 지인 {len(scheduler.unscheduled)}명 (종료: Ctrl+C)", flush=True)
+            for contact_id in list(scheduler.windows):
+                self.schedule(contact_id, now)
+            scheduler.listeners.append(self.changed)
+
+    # 지인 한 명의 타이머를 다시 거는 메소드 (기간이 이미 열렸고 아직 알리지 않았으면 바로 알림)
+    def schedule(self, contact_id, now=None):
+        with use_context(self.context), data_lock:
+            timer = self.timers.pop(contact_id, None)
+            if timer:
+                timer[0].cancel()
+            window = scheduler.windows.get(contact_id)
+            if window is None:
+                self.announced.pop(contact_id, None)
+                return
+            start, end = window
+            now = now or datetime.now()
+            if now < start:
+                self.arm(contact_id, "open", start, now)
+            elif now < end:
+                if self.announced.get(contact_id) != start:
+                    self.remind(contacts[contact_id], start, end, now)
+                self.arm(contact_id, "overdue", end, now)
+
+    def arm(self, contact_id, kind, at, now):
+        timer = self.loop.call_later((at - now).total_seconds(), self.fire, contact_id, kind, at)
+        self.timers[contact_id] = (timer, kind, at)
+
+    # 타이머가 울렸을 때 실행되는 메소드 (시스템 시계가 바뀌어 일찍 울렸으면 schedule에서 다시 걸림)
+    def fire(self, contact_id, kind, at):
+        self.timers.pop(contact_id, None)
+        now = datetime.now()
+        if kind == "overdue" and now >= at:
+            with use_context(self.context), data_lock:
+                contact = contacts[contact_id]
+                print(f"[{now.strftime(DATETIME_FORMAT)}] {contact.name}: 연락 주기가 지났습니다. "
+                      f"마지막 연락으로부터 {(now - contact.last_contact_date).days}일 지났습니다.", flush=True)
+            metrics.count("reminder.overdue")
+        self.schedule(contact_id, now)
+
+    # 연락할 때가 된 지인을 알리는 메소드 (AI를 사용할 수 있으면 대화 주제는 잠시 모았다가 한꺼번에 요청)
+    def remind(self, contact, start, end, now):
+        self.announced[contact.id] = start
+        metrics.count("reminder.fired")
+        print(f"[{now.strftime(DATETIME_FORMAT)}] {contact.name}에게 연락할 때가 되었습니다! "
+              f"마지막 연락으로부터 {(now - contact.last_contact_date).days}일 지났습니다. ({end.strftime('%Y-%m-%d')}까지)", flush=True)
+        if ai_enabled:
+            if not self.pending_topics:
+                self.loop.call_soon(self.request_topics)
+            self.pending_topics.append(contact)
+
+    def request_topics(self):
+        contact_list, self.pending_topics = self.pending_topics, []
+        self.loop.run_in_executor(self.ai_executor, self.print_topics, contact_list)
+
+    # 대화 주제를 요청하여 출력하는 메소드 (작업 스레드에서 실행)
+    def print_topics(self, contact_list):
+        with use_context(self.context):
+            try:
+                for contact, topic in suggest_conversation_topics(contact_list):
+                    if topic:
+                        print(f"추천 대화 주제 ({contact.name}): {topic}", flush=True)
+            except Exception as e:
+                print(f"대화 주제 추천 중 오류 발생: {e}", flush=True)
+
+    def close(self):
+        with use_context(self.context):
+            if self.changed in scheduler.listeners:
+                scheduler.listeners.remove(self.changed)
+        for timer, kind, at in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        self.ai_executor.shutdown()
+
+# 연락 알림 데몬을 실행하는 함수 (serve이면 같은 이벤트 루프에서 HTTP API도 실행하여 API로 바뀐 내용을 바로 반영)
+def run_reminder_daemon(serve=False, host=API_HOST, port=API_PORT, workers=API_WORKERS):
+    load_asyncio()
+    daemon = ReminderDaemon(active_context())
+    server = ApiServer(active_context(), workers) if serve else None
+
+    async def run():
+        daemon.start()
+        if server:
+            await server.serve(host, port)
         else:
-            print("등록된 지인이 없습니다.")
-    elif choice == "13":
-        edit_group()  # 그룹 정보 수정 기능 호출
-    elif choice == "14":
-        edit_contact()  # 지인 정보 수정 기능 호출
-    elif choice == "15":
-        edit_conversation()  # 대화 기록 수정 기능 호출
-    elif choice == "16":
-        update_contact_date()  # 최근 연락 날짜 업데이트 기능 호출
-    elif choice == "17":
-        save_data()  # 프로그램 종료 시 데이터 저장
-        print("프로그램을 종료합니다.")
-        break
+            await wait_for_stop_signal()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+        if server:
+            server.close()
+    if server:
+        save_data()
+    print("연락 알림 데몬을 종료합니다.")
+
+# 명령행의 날짜 인자를 YYYY-MM-DD 형식으로 맞추는 함수
+def iso_date(value):
+    try:
+        return datetime.fromisoformat(value).strftime(DATE_FORMAT)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"날짜 형식이 올바르지 않습니다: {value}")
+
+# 명령행의 사용자 이름 인자를 확인하는 함수
+def tenant_name(value):
+    if not ContextPool.TENANT_PATTERN.fullmatch(value):
+        raise argparse.ArgumentTypeError(f"사용자 이름은 영문, 숫자, '-', '_'로 64자까지 가능합니다: {value}")
+    return value
+
+# 명령행 인자 구성
+def build_parser():
+    parser = argparse.ArgumentParser(description="지인 연락 관리 도구 (하위 명령 없이 터미널에서 실행하면 메뉴 실행)")
+    parser.add_argument("--tenant", type=tenant_name, help="사용할 사용자 이름 (데이터는 CONNECTUTOR_TENANTS_DIR 아래 사용자 폴더에 저장)")
+    parser.add_argument("--api-key-file", help="OpenAI API 키가 저장된 파일 (기본: OPENAI_API_KEY 환경 변수)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("menu", help="대화형 메뉴 실행")
+
+    due_parser = subparsers.add_parser("due", help="연락할 때가 된 지인 확인")
+    due_parser.add_argument("--no-ai", action="store_true", help="대화 주제 추천 없이 확인")
+    due_parser.add_argument("--workers", type=int, nargs="?", const=DUE_WORKERS,
+                            help="지인을 여러 프로세스에 나누어 확인 (숫자를 생략하면 CONNECTUTOR_DUE_WORKERS 또는 CPU 코어 수)")
+    due_parser.add_argument("--partition", choices=("hash", "group"), default="hash",
+                            help="지인을 나누는 기준 (hash: 지인 번호, group: 그룹 단위)")
+
+    suggest_parser = subparsers.add_parser("suggest", help="대화 주제 추천")
+    target = suggest_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--all", action="store_true", help="지금 연락할 때가 된 모든 지인")
+    target.add_argument("--contact", help="이름으로 지정한 지인")
+
+    import_parser = subparsers.add_parser("import", help="내보낸 JSON/바이너리 파일의 데이터를 가져오기")
+    import_parser.add_argument("path")
+
+    conversations_parser = subparsers.add_parser("import-conversations", help="JSONL/CSV 파일의 대화 기록을 일괄 가져오기")
+    conversations_parser.add_argument("path")
+    conversations_parser.add_argument("--format", choices=("jsonl", "csv"), help="파일 형식 (기본: 확장자로 판단)")
+    conversations_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="한 번에 기록할 대화 수")
+
+    export_parser = subparsers.add_parser("export", help="전체 데이터를 JSON 또는 바이너리 파일로 내보내기")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=("json", "binary"), help="파일 형식 (기본: 확장자가 .bin이면 바이너리)")
+
+    render_parser = subparsers.add_parser("render-all", help="모든 지인의 그래프를 파일로 그리기")
+    render_parser.add_argument("--format", choices=("png", "svg"), help="그래프 파일 형식 (기본: CONNECTUTOR_CHART_FORMAT 또는 png)")
+    render_parser.add_argument("--workers", type=int, help="그래프를 그릴 프로세스 수 (기본: CPU 코어 수)")
+
+    search_parser = subparsers.add_parser("search", help="대화 내용과 지인 정보(취미, 거주지, 메모) 검색")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--category", choices=CATEGORIES, help="대화 카테고리")
+    search_parser.add_argument("--min-importance", type=int, choices=range(1, 6), help="최소 중요도")
+    search_parser.add_argument("--max-importance", type=int, choices=range(1, 6), help="최대 중요도")
+    search_parser.add_argument("--from", dest="date_from", type=iso_date, help="시작 날짜 (YYYY-MM-DD)")
+    search_parser.add_argument("--to", dest="date_to", type=iso_date, help="끝 날짜 (YYYY-MM-DD)")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_RESULT_LIMIT, help="최대 결과 수")
+
+    report_parser = subparsers.add_parser("report", help="전체 현황 요약")
+    report_parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+
+    serve_parser = subparsers.add_parser("serve", help="HTTP API 서버 실행")
+    serve_parser.add_argument("--host", default=API_HOST, help="서버 주소 (기본: CONNECTUTOR_API_HOST 또는 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=API_PORT, help="서버 포트 (기본: CONNECTUTOR_API_PORT 또는 8000)")
+    serve_parser.add_argument("--workers", type=int, default=API_WORKERS, help="요청을 처리할 스레드 수 (기본: CONNECTUTOR_API_WORKERS 또는 8)")
+
+    daemon_parser = subparsers.add_parser("daemon", help="연락 가능 기간이 열리는 시각에 알림을 출력하는 데몬 실행")
+    daemon_parser.add_argument("--no-ai", action="store_true", help="대화 주제 추천 없이 알림")
+    daemon_parser.add_argument("--serve", action="store_true", help="같은 프로세스에서 HTTP API 서버도 실행 (API로 바뀐 내용을 바로 반영)")
+    daemon_parser.add_argument("--host", default=API_HOST)
+    daemon_parser.add_argument("--port", type=int, default=API_PORT)
+    daemon_parser.add_argument("--workers", type=int, default=API_WORKERS)
+    return parser
+
+# 데이터를 바꾸지 않는 명령 (하나의 읽기 스냅샷 안에서 실행)
+READ_ONLY_COMMANDS = ("due", "suggest", "export", "render-all", "search", "report")
+
+# 프로그램 진입점
+def main(argv=None):
+    global ai_enabled
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    command = args.command
+    if command is None:
+        # 하위 명령이 없으면 터미널에서 실행한 경우에만 메뉴를 띄움
+        if not sys.stdin.isatty():
+            parser.print_help()
+            return 1
+        command = "menu"
+
+    # AI 대화 주제 추천이 필요한 명령에서만 API 키를 설정
+    if command == "due" and args.no_ai:
+        ai_enabled = False
+    elif command == "daemon" and args.no_ai:
+        ai_enabled = False
+    elif command in ("menu", "due", "suggest", "serve", "daemon"):
+        configure_api_key(args.api_key_file, interactive=(command == "menu"))
+
+    # CONNECTUTOR_PROFILE을 설정하면 데이터 불러오기부터 명령 종료까지 cProfile로 측정 (메인 스레드만 측정됨)
+    profiler = None
+    if PROFILE_FILE:
+        profiler = importlib.import_module("cProfile").Profile()
+        profiler.enable()
+
+    # --tenant를 지정하면 그 사용자의 데이터 폴더를 사용
+    if args.tenant:
+        session = tenant_pool.session(args.tenant, load=False, create=True)
     else:
-        print("잘못된 선택입니다.")
+        session = use_context(active_context())
+    try:
+        with session as context:
+            # 조회만 하는 명령은 불러오기부터 끝까지 한 시점의 데이터를 봄 (다른 프로세스의 쓰기를 막지 않음)
+            snapshot = context.store.read_snapshot() if command in READ_ONLY_COMMANDS else contextlib.nullcontext()
+            with snapshot:
+                # 프로그램 실행 시 데이터를 불러오기 (JSON 출력 시에는 안내 메시지 생략)
+                context.open(quiet=(command == "report" and args.json), schedule=not (command == "due" and args.workers))
+                with metrics.span(f"command.{command}"):
+                    return run_command(args, command)
+    except DataLoadError as e:
+        print(f"데이터 불러오기 중 오류 발생: {e}")
+        return 1
+    finally:
+        tenant_pool.close_all()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(PROFILE_FILE)
+        if METRICS_FILE:
+            try:
+                metrics.export(METRICS_FILE)
+            except OSError as e:
+                print(f"성능 측정 결과 저장 중 오류 발생: {e}")
+
+# 하위 명령을 실행하는 함수 (데이터를 불러온 뒤 호출)
+def run_command(args, command):
+    if command == "menu":
+        run_menu()
+    elif command == "due":
+        check_all_contacts_due(args.workers, args.partition)
+    elif command == "suggest":
+        if args.all:
+            print_suggestions(scheduler.due_now())
+        else:
+            matches = data_index.find_contacts(args.contact)
+            if not matches:
+                print(f"{args.contact}(이)라는 지인이 없습니다.")
+                return 1
+            print_suggestions(matches)
+    elif command == "import":
+        import_data(args.path)
+        save_data()
+    elif command == "import-conversations":
+        import_conversations(args.path, args.format, args.batch_size)
+        save_data()
+    elif command == "export":
+        export_data(args.path, args.format)
+    elif command == "render-all":
+        render_all_charts(args.format, args.workers)
+    elif command == "search":
+        print_search_results(search_index.search(
+            args.query, args.category, args.min_importance, args.max_importance, args.date_from, args.date_to, args.limit
+        ))
+    elif command == "report":
+        print_report(args.json)
+    elif command == "serve":
+        run_api_server(args.host, args.port, args.workers)
+    elif command == "daemon":
+        run_reminder_daemon(args.serve, args.host, args.port, args.workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import builtins
+import importlib.util
+import itertools
+import json
+import shutil
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "connectutor_code.py"
+module_numbers = itertools.count()
+
+
+# 스크립트를 임시 폴더에 복사해 불러오는 함수를 돌려주는 픽스처
+# (데이터 파일이 스크립트 옆에 생기므로 테스트마다 새 폴더를 사용하고, 같은 폴더에서 다시 불러오면 저장된 데이터를 읽음)
+@pytest.fixture
+def load_app(tmp_path, monkeypatch):
+    script = tmp_path / SCRIPT.name
+    shutil.copy(SCRIPT, script)
+    monkeypatch.setenv("CONNECTUTOR_AI_RPM", "0")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+    # API 키를 물으면 테스트용 키를, 메뉴를 띄우면 종료를 선택
+    def answer(prompt=""):
+        return "17" if "선택" in prompt else "test-key"
+    monkeypatch.setattr(builtins, "input", answer)
+
+    modules = []
+
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        name = f"connectutor_test_{next(module_numbers)}"
+        spec = importlib.util.spec_from_file_location(name, script)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        modules.append(name)
+        try:
+            spec.loader.exec_module(module)
+        except ModuleNotFoundError as e:
+            pytest.skip(f"{e.name} 패키지가 설치되어 있지 않습니다")
+        # 하위 명령이 있는 버전은 불러올 때 API 키와 데이터를 설정하지 않으므로 main처럼 직접 설정
+        if hasattr(module, "main"):
+            module.configure_api_key()
+            module.load_data()
+        return module
+
+    yield load
+    for name in modules:
+        sys.modules.pop(name, None)
+
+
+# 대화 주제 요청을 받아 사용자 메시지를 그대로 돌려주는 가짜 채팅 완성 서버
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        content = body["messages"][-1]["content"]
+        payload = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": f" {content} "}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server(monkeypatch):
+    pytest.importorskip("openai")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCompletionHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_BASE", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    yield server
+    server.shutdown()
+    server.server_close()
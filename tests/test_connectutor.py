@@ -0,0 +1,331 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+
+# 그룹 하나와 지인 세 명, 대화 기록 두 개를 추가하는 함수
+def add_sample_data(app):
+    app.commit_change('add_group', name='친구', contact_interval=10, tolerance=2)
+    for name in ('철수', '영희', '민수'):
+        app.commit_change('add_contact', name=name, group=0, birthday='2000-01-01', gender=None, residence='서울', hobbies='등산')
+    app.commit_change('add_conversation', contact=0, date='2024-01-01', topics={'일': {'importance': 3, 'details': '이직 준비'}})
+    app.commit_change('add_conversation', contact=1, date='2024-01-05', topics={'취미': {'importance': 5, 'details': '등산 계획'}, '건강': {'importance': 2, 'details': '감기'}})
+    app.commit_change('update_last_contact_date', contact=0, last_contact_date='2024-01-01 00:00:00')
+    app.commit_change('update_last_contact_date', contact=1, last_contact_date='2024-01-05 00:00:00')
+
+
+# 비교하기 쉽도록 메모리의 그룹/지인 데이터를 기본 자료형으로 바꾸는 함수
+def dump(app):
+    return {
+        'groups': [(group.name, group.contact_interval, group.tolerance) for group in app.groups],
+        'contacts': [(
+            contact.name, contact.group.name, contact.birthday, contact.residence, contact.hobbies,
+            contact.last_contact_date,
+            [(record['date'], {category: (values['importance'], values['details']) for category, values in record['topics'].items()})
+             for record in contact.contact_history]
+        ) for contact in app.contacts],
+    }
+
+
+def names(contact_list):
+    return [contact.name for contact in contact_list]
+
+
+# 저장하지 않고 종료해도 저널을 재생하여 모든 변경이 복원되는지 확인
+def test_journal_replay_restores_unsaved_changes(load_app):
+    app = load_app()
+    add_sample_data(app)
+    expected = dump(app)
+    assert os.path.exists(app.JOURNAL_FILE)
+
+    assert dump(load_app()) == expected
+
+
+# 저장(압축) 후 추가한 변경도 스냅샷과 저널을 합쳐 복원되는지 확인
+def test_compaction_then_replay(load_app):
+    app = load_app()
+    add_sample_data(app)
+    app.save_data()
+    assert not os.path.exists(app.JOURNAL_FILE)
+    app.commit_change('edit_contact', contact=2, name='민준')
+    expected = dump(app)
+
+    assert dump(load_app()) == expected
+
+
+# 압축이 실패해 남은 압축 중 저널을 다음 압축이 덮어쓰지 않는지 확인
+def test_failed_compaction_keeps_pending_journal(load_app, monkeypatch):
+    app = load_app()
+    add_sample_data(app)
+    write_file_atomic = app.write_file_atomic
+
+    def fail(path, data):
+        raise OSError("디스크가 가득 찼습니다")
+    monkeypatch.setattr(app, 'write_file_atomic', fail)
+    app.save_data()
+    assert os.path.exists(app.JOURNAL_FILE + ".compacting")
+
+    monkeypatch.setattr(app, 'write_file_atomic', write_file_atomic)
+    app.commit_change('add_contact', name='지수', group=0, birthday=None, gender=None, residence=None, hobbies=None)
+    app.save_data()
+    expected = dump(app)
+
+    assert dump(load_app()) == expected
+
+
+# 백그라운드 압축에서 난 오류가 버려지지 않고 다음 저장에서 다시 발생하는지 확인
+def test_background_compaction_error_is_raised_on_next_save(load_app, monkeypatch):
+    app = load_app()
+    add_sample_data(app)
+
+    def fail(path, data):
+        raise OSError("디스크가 가득 찼습니다")
+    monkeypatch.setattr(app, 'write_file_atomic', fail)
+    app.store.compact(background=True)
+    app.store.compaction_thread.join()
+
+    with pytest.raises(OSError):
+        app.store.compact()
+
+
+# 저널 번호가 중간에 빠져 있으면 이어서 재생하지 않는지 확인
+# (잠금 없이 읽을 때는 False를 돌려 다시 불러오게 하고, 잠금을 잡은 마지막 시도에서는 오류를 발생시킴)
+def test_replay_stops_at_sequence_gap(load_app):
+    app = load_app()
+    add_sample_data(app)
+    with open(app.JOURNAL_FILE, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    with open(app.JOURNAL_FILE, 'w', encoding='utf-8') as file:
+        file.writelines(lines[:1] + lines[2:])
+
+    app.groups.clear()
+    app.contacts.clear()
+    app.store.journal_seq = 0
+    assert app.store.replay_journal(app.JOURNAL_FILE) is False
+    assert names(app.contacts) == []
+
+    app.store.journal_offsets = {}
+    with pytest.raises(ValueError):
+        app.store.replay_journal(app.JOURNAL_FILE, strict=False)
+    assert names(app.contacts) == []
+
+
+# SQLite 저장소에 기록한 데이터가 다시 불러왔을 때 그대로인지 확인
+def test_sqlite_round_trip(load_app):
+    app = load_app(CONNECTUTOR_STORAGE="sqlite")
+    add_sample_data(app)
+    app.commit_change('edit_conversation', contact=1, index=0, topics={'취미': {'importance': 4}})
+    app.save_data()
+    expected = dump(app)
+
+    reloaded = load_app(CONNECTUTOR_STORAGE="sqlite")
+    assert dump(reloaded) == expected
+    assert reloaded.aggregates.category_importance == {'일': 3, '취미': 4, '건강': 2}
+    assert reloaded.aggregates.contact_topic_stats(reloaded.contacts[1]) == ({'취미': 1, '건강': 1}, {'취미': 4, '건강': 2})
+
+
+# 비어 있는 SQLite 저장소가 기존 JSON 데이터를 옮겨오는지 확인
+def test_sqlite_migrates_json_data(load_app):
+    app = load_app()
+    add_sample_data(app)
+    app.save_data()
+    expected = dump(app)
+
+    assert dump(load_app(CONNECTUTOR_STORAGE="sqlite")) == expected
+
+
+# 스케줄러가 연락 가능 기간에 따라 지인을 나누고, 그룹 주기 변경을 반영하는지 확인
+def test_due_scheduler(load_app):
+    app = load_app()
+    add_sample_data(app)
+    scheduler = app.scheduler
+
+    # 철수: 1월 9일 ~ 1월 13일, 영희: 1월 13일 ~ 1월 17일, 민수: 연락 기록 없음
+    assert names(scheduler.due_now(datetime(2024, 1, 10))) == ['철수']
+    assert names(scheduler.overdue(datetime(2024, 1, 10))) == []
+    assert names(scheduler.due_within(5, datetime(2024, 1, 10))) == ['영희']
+
+    assert names(scheduler.due_now(datetime(2024, 1, 15))) == ['영희']
+    assert names(scheduler.overdue(datetime(2024, 1, 15))) == ['철수']
+
+    # 연락 주기를 20일로 늘리면 철수는 1월 19일부터, 영희는 1월 23일부터 연락할 때가 됨
+    app.commit_change('edit_group', group=0, contact_interval=20)
+    assert names(scheduler.due_now(datetime(2024, 1, 15))) == []
+    assert names(scheduler.overdue(datetime(2024, 1, 15))) == []
+    assert names(scheduler.due_within(5, datetime(2024, 1, 15))) == ['철수']
+
+    # 시간을 되돌려도 처음부터 다시 계산
+    assert names(scheduler.due_now(datetime(2024, 1, 24))) == ['영희']
+    assert names(scheduler.due_now(datetime(2024, 1, 20))) == ['철수']
+
+
+# 가짜 채팅 완성 서버로 모든 지인의 대화 주제를 받아오는지 확인
+def test_topics_from_fake_completion_server(load_app, completion_server):
+    app = load_app()
+    add_sample_data(app)
+
+    topics = dict(app.suggest_conversation_topics(app.contacts))
+
+    assert len(completion_server.requests) == 3
+    assert sorted(names(topics)) == sorted(['철수', '영희', '민수'])
+    for contact, topic in topics.items():
+        assert contact.name in topic
+
+
+# 내보낸 파일을 새 데이터로 가져오면 그대로 복원되고, 변경은 한 건씩이 아니라 묶어서 기록되는지 확인
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_export_import_round_trip(load_app, tmp_path, monkeypatch, storage):
+    app = load_app()
+    add_sample_data(app)
+    export_path = str(tmp_path / "export.json")
+    app.export_data(export_path)
+    expected = dump(app)
+    for name in os.listdir(tmp_path):
+        if name.startswith("contacts_data"):
+            os.remove(tmp_path / name)
+
+    fresh = load_app(CONNECTUTOR_STORAGE=storage)
+    def fail(*args, **kwargs):
+        raise AssertionError("가져오기는 commit_changes로 묶어서 기록해야 합니다")
+    monkeypatch.setattr(fresh, 'commit_change', fail)
+    fresh.import_data(export_path)
+    fresh.import_data(export_path)  # 같은 파일을 다시 가져오면 모두 건너뜀
+    assert dump(fresh) == expected
+
+    fresh.save_data()
+    assert dump(load_app(CONNECTUTOR_STORAGE=storage)) == expected
+
+
+# 바이너리 스냅샷 저장소가 저장/저널 재생/재압축 후에도 같은 데이터를 복원하는지 확인
+@pytest.mark.parametrize("lazy_load", ["1", "0"])
+def test_binary_round_trip(load_app, lazy_load):
+    app = load_app(CONNECTUTOR_STORAGE="binary", CONNECTUTOR_LAZY_LOAD=lazy_load)
+    add_sample_data(app)
+    app.save_data()
+    app.commit_change('add_conversation', contact=2, date='2024-02-01', topics={'기타': {'importance': 1, 'details': '안부'}})
+    expected = dump(app)
+
+    # 저널이 남은 상태로 다시 불러오기
+    reloaded = load_app()
+    assert dump(reloaded) == expected
+
+    # 불러온 스냅샷을 바탕으로 다시 압축한 뒤 불러오기
+    reloaded.commit_change('edit_conversation', contact=0, index=0, topics={'일': {'details': '이직 완료'}})
+    reloaded.save_data()
+    expected = dump(reloaded)
+    assert dump(load_app()) == expected
+
+
+# 바이너리로 내보낸 파일을 다른 저장소로 가져올 수 있고, 기존 JSON 데이터가 바이너리 저장소로 옮겨지는지 확인
+def test_binary_export_and_migration(load_app, tmp_path):
+    app = load_app()
+    add_sample_data(app)
+    app.save_data()
+    expected = dump(app)
+    export_path = str(tmp_path / "export.bin")
+    app.export_data(export_path)
+
+    assert dump(load_app(CONNECTUTOR_STORAGE="binary")) == expected
+
+    for name in os.listdir(tmp_path):
+        if name.startswith("contacts_data"):
+            os.remove(tmp_path / name)
+    fresh = load_app(CONNECTUTOR_STORAGE="sqlite")
+    fresh.import_data(export_path)
+    assert dump(fresh) == expected
+
+
+# 수정된 대화 내용과 지인 정보는 새 내용으로만 찾아지고, 예전 내용은 색인에서 빠지는지 확인
+def test_search_index_replaces_edited_documents(load_app):
+    app = load_app()
+    add_sample_data(app)
+    index = app.search_index
+
+    assert [result['text'] for result in index.search("이직")] == ['이직 준비']
+    words = len(index.word_docs)
+
+    for _ in range(3):
+        app.commit_change('edit_conversation', contact=0, index=0, topics={'일': {'details': '이직 준비'}})
+    app.commit_change('edit_conversation', contact=1, index=0, topics={'취미': {'details': '캠핑 계획'}})
+    app.commit_change('edit_contact', contact=2, residence='부산')
+
+    assert [result['text'] for result in index.search("이직")] == ['이직 준비']
+    assert index.search("등산 계획") == []
+    assert [result['text'] for result in index.search("캠핑")] == ['캠핑 계획']
+    assert sorted(result['contact'].name for result in index.search("서울")) == ['영희', '철수']
+    assert [result['contact'].name for result in index.search("부산")] == ['민수']
+    assert index.document_count == 9
+    assert len(index.word_docs) == words + 2  # '캠핑'과 '부산'만 늘어남 ('등산'은 취미에, '서울'은 다른 지인에 남음)
+
+
+# 사용자 풀이 마지막으로 사용(반납)한 순서대로 닫고, 요청이 없어도 오래 쓰지 않은 사용자를 정리하는지 확인
+def test_context_pool_lru_and_idle_sweep(load_app, tmp_path):
+    app = load_app()
+    pool = app.ContextPool(str(tmp_path / "tenants"), max_open=2, idle_seconds=0.5)
+    try:
+        with pytest.raises(FileNotFoundError):
+            pool.acquire("nobody")
+
+        alice = pool.acquire("alice", load=False, create=True)
+        bob = pool.acquire("bob", load=False, create=True)
+        pool.release(bob)
+        pool.release(alice)  # alice가 더 최근에 사용됨
+        pool.release(pool.acquire("carol", load=False, create=True))
+        assert list(pool.contexts) == ["alice", "carol"]
+
+        deadline = time.monotonic() + 5
+        while pool.contexts and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert pool.stats()['open'] == 0
+        assert pool.sweep_timer is None
+    finally:
+        pool.close_all()
+
+
+# 날짜별 대화 기록 API는 범위를 요구하고 limit/offset으로 나눠 돌려주는지 확인
+def test_api_list_conversations_requires_range_and_pages(load_app):
+    app = load_app()
+    add_sample_data(app)
+    for day in range(1, 6):
+        app.commit_change('add_conversation', contact=2, date=f'2024-02-0{day}', topics={'기타': {'importance': 1, 'details': f'{day}일'}})
+
+    def get(**query):
+        return app.api_list_conversations(app.ApiRequest({}, {name: str(value) for name, value in query.items()}, None))
+
+    with pytest.raises(app.ApiError) as error:
+        get()
+    assert error.value.status == 400
+    with pytest.raises(app.ApiError):
+        get(**{'from': '2024-01-01', 'limit': app.API_MAX_CONVERSATION_LIMIT + 1})
+
+    assert len(get(**{'from': '2024-01-01'})) == 7
+    pages = [get(**{'from': '2024-02-01', 'to': '2024-02-28', 'limit': 2, 'offset': offset}) for offset in (0, 2, 4)]
+    assert [[record['date'] for record in page] for page in pages] == [['2024-02-01', '2024-02-02'], ['2024-02-03', '2024-02-04'], ['2024-02-05']]
+    assert [record['date'] for record in get(date='2024-01-05')] == ['2024-01-05']
+
+
+# 데이터를 불러오지 못하면 프로세스를 끝내지 않고 DataLoadError를 발생시키고, main은 1을, API는 500을 돌려주는지 확인
+def test_failed_load_raises_instead_of_exiting(load_app):
+    app = load_app()
+    with app.tenant_pool.session("broken", create=True):
+        add_sample_data(app)
+        app.save_data()
+        data_file = app.store.data_file
+    app.tenant_pool.close_all()
+    with open(data_file, 'w', encoding='utf-8') as file:
+        file.write("{")
+
+    with pytest.raises(app.DataLoadError):
+        app.tenant_pool.acquire("broken")
+
+    server = app.ApiServer(app.active_context(), 1)
+    try:
+        with pytest.raises(app.ApiError) as error:
+            server.call("broken", app.api_list_groups, app.ApiRequest({}, {}, None))
+        assert error.value.status == 500
+    finally:
+        server.close()
+
+    assert app.main(["--tenant", "broken", "due", "--no-ai"]) == 1